@@ -0,0 +1,356 @@
+"""
+Micro-benchmarks for document text extraction.
+
+Generates a reproducible corpus of PDF, DOCX and TXT files at several sizes,
+times every extraction backend on it, and compares the result with a JSON
+baseline. Exits non-zero when a backend got slower, or allocates more, than
+the baseline allows.
+
+    python benchmarks/extraction.py                      # compare with the baseline
+    python benchmarks/extraction.py --save-baseline      # record a new baseline
+    python benchmarks/extraction.py --sizes small --repeat 3 --output run.json
+"""
+import argparse
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import docx  # noqa: E402
+from lxml import etree  # noqa: E402
+
+from utils.file_handler import (extract_text_from_docx, extract_text_from_pdf,  # noqa: E402
+                                extract_text_from_txt)
+from utils.pdf_extraction import extract_page_batch, join_pages  # noqa: E402
+
+try:
+    import pypdf
+except ImportError:  # optional: only benchmarked when installed
+    pypdf = None
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:  # optional: only benchmarked when installed
+    fitz = None
+
+BASELINE = ROOT / "benchmarks" / "baselines" / "extraction.json"
+
+# Pages per PDF, paragraphs per DOCX and lines per TXT, by size
+SIZES = {
+    "small": {"pdf": 2, "docx": 40, "txt": 80},
+    "medium": {"pdf": 20, "docx": 400, "txt": 2_000},
+    "large": {"pdf": 100, "docx": 2_000, "txt": 40_000},
+}
+
+LINES_PER_PAGE = 40
+
+WORDS = ("led designed built shipped scaled migrated reduced improved automated "
+         "python fastapi postgres kafka kubernetes terraform react latency throughput "
+         "services pipeline platform team customers revenue reliability deployment "
+         "engineer senior staff cloud data api backend frontend testing monitoring").split()
+
+
+def _line(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 14))).capitalize()
+
+
+def make_pdf(lines_by_page: List[List[str]]) -> bytes:
+    """A PDF with the given lines of Helvetica text on each page"""
+    pages = len(lines_by_page)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(pages))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    font = 3 + 2 * pages
+    for i, lines in enumerate(lines_by_page):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R"
+            f" /Resources << /Font << /F1 {font} 0 R >> >> >>".encode())
+        shown = " ".join(f"({line}) Tj T*" for line in lines)
+        stream = f"BT /F1 10 Tf 12 TL 50 760 Td {shown} ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+def make_docx(paragraphs: List[str]) -> bytes:
+    document = docx.Document()
+    for index, paragraph in enumerate(paragraphs):
+        if index % 20 == 0:
+            document.add_heading(paragraph[:40], level=2)
+        else:
+            document.add_paragraph(paragraph)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+@dataclass
+class Document:
+    """One corpus file"""
+    name: str
+    kind: str
+    size: str
+    path: Path
+    bytes: int
+    pages: int
+
+
+def build_corpus(directory: Path, sizes: List[str], seed: int = 0) -> List[Document]:
+    """
+    Write the corpus to directory. The same seed always gives the same text,
+    so runs on different days measure the same work.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    corpus = []
+    for size in sizes:
+        counts = SIZES[size]
+        rng = random.Random(f"{seed}-{size}")
+
+        pdf_lines = [[_line(rng) for _ in range(LINES_PER_PAGE)] for _ in range(counts["pdf"])]
+        docx_paragraphs = [_line(rng) for _ in range(counts["docx"])]
+        txt_lines = [_line(rng) for _ in range(counts["txt"])]
+        files = {
+            "pdf": (make_pdf(pdf_lines), counts["pdf"]),
+            "docx": (make_docx(docx_paragraphs), -(-counts["docx"] // LINES_PER_PAGE)),
+            "txt": ("\n".join(txt_lines).encode(), -(-counts["txt"] // LINES_PER_PAGE)),
+        }
+        for kind, (content, pages) in files.items():
+            path = directory / f"{size}.{kind}"
+            path.write_bytes(content)
+            corpus.append(Document(f"{kind}-{size}", kind, size, path, len(content), pages))
+    return corpus
+
+
+def _file_handler(extract: Callable) -> Callable[[Path], str]:
+    def run(path: Path) -> str:
+        with open(path, "rb") as f:
+            return extract(f)
+    return run
+
+
+def _page_batches(path: Path) -> str:
+    # The per-worker function behind /tailor-upload, run for the whole document
+    return join_pages(extract_page_batch(str(path), 0, sys.maxsize).texts)
+
+
+def _docx_xml(path: Path) -> str:
+    # Reads paragraph text straight from word/document.xml, skipping python-docx
+    namespace = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+    with zipfile.ZipFile(path) as archive:
+        root = etree.fromstring(archive.read("word/document.xml"))
+    return "\n".join("".join(node.text or "" for node in paragraph.iter(f"{namespace}t"))
+                     for paragraph in root.iter(f"{namespace}p")).strip()
+
+
+def _pypdf(path: Path) -> str:
+    return "\n".join(page.extract_text() for page in pypdf.PdfReader(path).pages)
+
+
+def _pymupdf(path: Path) -> str:
+    with fitz.open(path) as document:
+        return "\n".join(page.get_text() for page in document)
+
+
+def backends() -> Dict[str, Dict[str, Callable[[Path], str]]]:
+    """Extraction functions to measure, by file type"""
+    available = {
+        "pdf": {
+            "file_handler.extract_text_from_pdf": _file_handler(extract_text_from_pdf),
+            "pdf_extraction.extract_page_batch": _page_batches,
+        },
+        "docx": {
+            "file_handler.extract_text_from_docx": _file_handler(extract_text_from_docx),
+            "lxml.document_xml": _docx_xml,
+        },
+        "txt": {
+            "file_handler.extract_text_from_txt": _file_handler(extract_text_from_txt),
+        },
+    }
+    if pypdf is not None:
+        available["pdf"]["pypdf"] = _pypdf
+    if fitz is not None:
+        available["pdf"]["pymupdf"] = _pymupdf
+    return available
+
+
+def measure(extract: Callable[[Path], str], document: Document, repeat: int) -> dict:
+    """
+    Time extract on document repeat times, then run it once more under
+    tracemalloc for its peak Python allocation.
+    """
+    extract(document.path)  # warm up imports and the page cache
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = extract(document.path)
+        seconds.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        extract(document.path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(seconds)
+    return {
+        "bytes": document.bytes,
+        "pages": document.pages,
+        "chars": len(text),
+        "median_ms": round(median * 1000, 3),
+        "min_ms": round(min(seconds) * 1000, 3),
+        "per_page_ms": round(median * 1000 / document.pages, 3),
+        "mb_per_s": round(document.bytes / 1_000_000 / median, 2),
+        "pages_per_s": round(document.pages / median, 1),
+        "peak_alloc_kb": peak // 1024,
+    }
+
+
+def calibrate(repeat: int = 5) -> float:
+    """
+    Milliseconds for a fixed pure-Python workload. Times are scaled by the
+    ratio of calibrations before comparing, so a slower or busier machine
+    is not mistaken for a slower extractor.
+    """
+    text = " ".join(WORDS) * 200
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(20):
+            "\n".join(word.capitalize() for word in text.split()).encode().decode()
+        seconds.append(time.perf_counter() - started)
+    return round(min(seconds) * 1000, 3)
+
+
+def run(corpus: List[Document], repeat: int) -> Dict[str, Dict[str, dict]]:
+    """Results keyed by document name, then backend"""
+    available = backends()
+    return {
+        document.name: {name: measure(extract, document, repeat)
+                        for name, extract in available[document.kind].items()}
+        for document in corpus
+    }
+
+
+@dataclass
+class Regression:
+    document: str
+    backend: str
+    metric: str
+    baseline: float
+    current: float
+
+    def __str__(self) -> str:
+        change = (self.current / self.baseline - 1) * 100 if self.baseline else float("inf")
+        return (f"{self.document} {self.backend}: {self.metric} "
+                f"{self.baseline} -> {self.current} (+{change:.0f}%)")
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.4,
+            memory_threshold: float = 0.25, min_delta_ms: float = 1.0,
+            speed: float = 1.0) -> List[Regression]:
+    """
+    Cases where current is worse than baseline by more than the thresholds.
+
+    Time is compared on the fastest run, which moves far less between runs
+    than the median, and must also grow by min_delta_ms so noise on
+    millisecond cases is not reported. Current times are multiplied by
+    speed (baseline calibration / current calibration) first. Cases missing
+    from either side are ignored.
+    """
+    regressions = []
+    for document, results in current.items():
+        for backend, result in results.items():
+            before = baseline.get(document, {}).get(backend)
+            if before is None:
+                continue
+            fastest = round(result["min_ms"] * speed, 3)
+            if (fastest > before["min_ms"] * (1 + threshold)
+                    and fastest - before["min_ms"] > min_delta_ms):
+                regressions.append(Regression(document, backend, "min_ms",
+                                              before["min_ms"], fastest))
+            if result["peak_alloc_kb"] > before["peak_alloc_kb"] * (1 + memory_threshold):
+                regressions.append(Regression(document, backend, "peak_alloc_kb",
+                                              before["peak_alloc_kb"], result["peak_alloc_kb"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", type=Path,
+                        help="Keep the corpus in this directory (default: a temp dir)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write the results to --baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=0.4,
+                        help="Allowed slowdown of the fastest run (0.4 = 40%%)")
+    parser.add_argument("--memory-threshold", type=float, default=0.25,
+                        help="Allowed growth of peak allocation")
+    parser.add_argument("--output", type=Path, help="Also write the results here")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="extraction-corpus-") as workdir:
+        corpus = build_corpus(args.corpus or Path(workdir), args.sizes, args.seed)
+        calibration_ms = calibrate()
+        results = run(corpus, args.repeat)
+
+    report = {
+        "config": {"repeat": args.repeat, "seed": args.seed, "sizes": args.sizes},
+        "environment": {"python": platform.python_version(), "machine": platform.machine(),
+                        "calibration_ms": calibration_ms},
+        "corpus": [{k: v for k, v in asdict(doc).items() if k != "path"} for doc in corpus],
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text + "\n")
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(text + "\n")
+        print(f"Saved baseline to {args.baseline}", file=sys.stderr)
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline", file=sys.stderr)
+        return 0
+    baseline = json.loads(args.baseline.read_text())
+    speed = baseline["environment"]["calibration_ms"] / calibration_ms
+    regressions = compare(baseline["results"], results, args.threshold,
+                          args.memory_threshold, speed=speed)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    if not regressions:
+        print("No regressions against the baseline", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
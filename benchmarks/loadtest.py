@@ -0,0 +1,279 @@
+"""
+Open-loop load test for /tailor and /tailor-upload.
+
+Requests are started at a fixed rate whether or not earlier ones have
+finished, so a slow server shows up as latency and errors rather than as a
+quietly lower request rate. With --start the mock OpenAI server and the app
+are launched locally and wired together; otherwise --url is driven as is.
+
+    python benchmarks/loadtest.py --start --rps 20 --duration 60 \\
+        --mix tailor=0.7,upload=0.3 --output benchmarks/results/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SKILLS = ["Python", "FastAPI", "PostgreSQL", "Kubernetes", "React", "Terraform",
+          "AWS", "Kafka", "Redis", "Go", "TypeScript", "Airflow", "Spark", "Docker"]
+
+
+def _resume(rng: random.Random) -> str:
+    skills = ", ".join(rng.sample(SKILLS, 6))
+    years = rng.randint(2, 15)
+    return (
+        f"Software engineer with {years} years of experience building web services. "
+        f"Skills: {skills}. Led a team of {rng.randint(2, 9)} engineers delivering "
+        f"a platform that served {rng.randint(1, 50)} million requests a day, and "
+        f"cut infrastructure costs by {rng.randint(5, 60)} percent."
+    )
+
+
+def _job_description(rng: random.Random) -> str:
+    skills = ", ".join(rng.sample(SKILLS, 4))
+    return (f"We are hiring a senior engineer (ref {rng.randint(1000, 9999)}) "
+            f"with strong {skills} experience to scale our backend.")
+
+
+def make_tailor_request(client: httpx.AsyncClient, rng: random.Random):
+    return client.post("/tailor", json={
+        "resume_text": _resume(rng),
+        "job_description": _job_description(rng),
+        "save_output": False
+    })
+
+
+def make_upload_request(client: httpx.AsyncClient, rng: random.Random):
+    return client.post(
+        "/tailor-upload",
+        files={
+            "Resume": ("resume.txt", _resume(rng).encode(), "text/plain"),
+            "JD": ("job.txt", _job_description(rng).encode(), "text/plain")
+        },
+        data={"Save": "false"}
+    )
+
+
+ENDPOINTS = {"tailor": make_tailor_request, "upload": make_upload_request}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of values (0 for none)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(results: List[dict], duration: float) -> dict:
+    """
+    Throughput, latency percentiles and error rate, per endpoint and overall.
+
+    Each result is ``{"endpoint", "status", "latency"}`` with latency in
+    seconds; status 0 means the request failed without a response.
+    """
+    def stats(rows: List[dict]) -> dict:
+        latencies = [row["latency"] * 1000 for row in rows]
+        ok = sum(1 for row in rows if 200 <= row["status"] < 300)
+        errors = Counter(str(row["status"]) for row in rows
+                         if not 200 <= row["status"] < 300)
+        return {
+            "requests": len(rows),
+            "ok": ok,
+            "errors": dict(sorted(errors.items())),
+            "error_rate": round(1 - ok / len(rows), 4) if rows else 0.0,
+            "throughput_rps": round(ok / duration, 2) if duration else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50), 1),
+                "p95": round(percentile(latencies, 95), 1),
+                "p99": round(percentile(latencies, 99), 1),
+                "mean": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+                "max": round(max(latencies), 1) if latencies else 0.0
+            }
+        }
+
+    by_endpoint: Dict[str, List[dict]] = defaultdict(list)
+    for row in results:
+        by_endpoint[row["endpoint"]].append(row)
+    return {
+        "overall": stats(results),
+        "endpoints": {name: stats(rows) for name, rows in sorted(by_endpoint.items())}
+    }
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}'")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def run_load(url: str, rps: float, duration: float, mix: Dict[str, float],
+                   concurrency: int, seed: Optional[int] = None,
+                   timeout: float = 120.0) -> List[dict]:
+    """Start requests at rps for duration seconds and collect their outcomes"""
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    results: List[dict] = []
+    slots = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits,
+                                 headers={"Cache-Control": "no-cache"}) as client:
+        async def one(name: str):
+            async with slots:
+                started = time.perf_counter()
+                try:
+                    response = await ENDPOINTS[name](client, rng)
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 0
+                results.append({"endpoint": name, "status": status,
+                                "latency": time.perf_counter() - started})
+
+        tasks = []
+        start = time.perf_counter()
+        for index in range(int(rps * duration)):
+            # Keep to the schedule rather than sleeping a fixed interval
+            delay = start + index / rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name = rng.choices(names, weights)[0]
+            tasks.append(asyncio.create_task(one(name)))
+        await asyncio.gather(*tasks)
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def start_stack(args, workdir: Path) -> List[subprocess.Popen]:
+    """Launch the mock OpenAI server and the app pointed at it"""
+    mock_port, app_port = _free_port(), _free_port()
+    mock = subprocess.Popen([
+        sys.executable, str(ROOT / "benchmarks" / "mock_openai.py"),
+        "--port", str(mock_port), "--latency", args.mock_latency,
+        "--rate-limit-ratio", str(args.mock_rate_limit_ratio),
+        "--error-ratio", str(args.mock_error_ratio),
+        *(["--seed", str(args.seed)] if args.seed is not None else [])
+    ])
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "sk-mock",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{mock_port}/v1",
+        # The mock speaks HTTP/1.1 only
+        "OPENAI_HTTP2": "false",
+        "RATE_LIMIT_REQUESTS": "1000000",
+        "CACHE_DIR": str(workdir / "cache"),
+        "JOBS_DB": str(workdir / "jobs.db"),
+        "OUTPUT_DIR": str(workdir / "output"),
+        "METRICS_DIR": str(workdir / "metrics"),
+        "LOG_DIR": str(workdir / "logs"),
+        "LOG_LEVEL": "WARNING"
+    }
+    app = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "api.app:app", "--app-dir", str(ROOT / "src"),
+        "--host", "127.0.0.1", "--port", str(app_port),
+        "--workers", str(args.workers), "--log-level", "warning"
+    ], env=env)
+    processes = [mock, app]
+    try:
+        _wait_for(f"http://127.0.0.1:{mock_port}/mock/stats")
+        _wait_for(f"http://127.0.0.1:{app_port}/ping")
+    except Exception:
+        stop_stack(processes)
+        raise
+    args.url = f"http://127.0.0.1:{app_port}"
+    return processes
+
+
+def stop_stack(processes: List[subprocess.Popen]):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rps", type=float, default=10.0, help="Requests started per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to generate load")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("tailor=0.5,upload=0.5"),
+                        help="Endpoint weights, e.g. tailor=0.7,upload=0.3")
+    parser.add_argument("--concurrency", type=int, default=256,
+                        help="Most requests in flight at once")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", type=Path, help="Write the JSON report here")
+    parser.add_argument("--start", action="store_true",
+                        help="Launch the mock OpenAI server and the app locally")
+    parser.add_argument("--workers", type=int, default=1, help="App workers with --start")
+    parser.add_argument("--mock-latency", default="lognormal:1.5,0.4")
+    parser.add_argument("--mock-rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--mock-error-ratio", type=float, default=0.0)
+    args = parser.parse_args()
+
+    processes = []
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as workdir:
+        if args.start:
+            processes = start_stack(args, Path(workdir))
+        try:
+            started = time.perf_counter()
+            results = asyncio.run(run_load(args.url, args.rps, args.duration, args.mix,
+                                           args.concurrency, args.seed, args.timeout))
+            elapsed = time.perf_counter() - started
+        finally:
+            stop_stack(processes)
+
+    report = {
+        "config": {"rps": args.rps, "duration_s": args.duration, "mix": args.mix,
+                   "concurrency": args.concurrency, "workers": args.workers,
+                   "mock_latency": args.mock_latency if args.start else None},
+        "elapsed_s": round(elapsed, 2),
+        **summarize(results, elapsed)
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
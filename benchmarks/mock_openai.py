@@ -0,0 +1,204 @@
+"""
+Local stand-in for the OpenAI chat completions API, for load tests.
+
+Serves POST /v1/chat/completions (plain and streamed) with configurable
+latency, completion size, 429s carrying Retry-After, and 5xx errors. Point
+the app at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+
+    python benchmarks/mock_openai.py --port 9100 --latency lognormal:1.5,0.4 \\
+        --rate-limit-ratio 0.02 --error-ratio 0.01
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Filler the mock "generates"; only its size matters
+WORD = "experience "
+
+
+@dataclass
+class Latency:
+    """
+    A latency distribution in seconds, parsed from "kind:args":
+    fixed:S, uniform:LOW,HIGH, normal:MEAN,SD or lognormal:MEDIAN,SIGMA.
+    """
+    kind: str = "fixed"
+    args: tuple = (0.0,)
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        kind, _, args = spec.partition(":")
+        values = tuple(float(arg) for arg in args.split(",") if arg)
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if expected.get(kind) != len(values):
+            raise ValueError(f"Bad latency spec '{spec}'")
+        return cls(kind, values)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            return rng.uniform(*self.args)
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(*self.args))
+        if self.kind == "lognormal":
+            median, sigma = self.args
+            return rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        return self.args[0]
+
+
+@dataclass
+class MockConfig:
+    latency: Latency = field(default_factory=Latency)
+    completion_tokens: int = 400
+    rate_limit_ratio: float = 0.0
+    retry_after: float = 1.0
+    error_ratio: float = 0.0
+    error_status: int = 500
+    seed: Optional[int] = None
+
+
+def _prompt_tokens(messages: list) -> int:
+    # Roughly 4 characters per token, plus the chat framing
+    return 3 + sum(3 + len(str(m.get("content", ""))) // 4 for m in messages)
+
+
+def create_app(config: MockConfig) -> FastAPI:
+    app = FastAPI(title="Mock OpenAI")
+    rng = random.Random(config.seed)
+    stats = {"requests": 0, "rate_limited": 0, "errors": 0, "streams": 0}
+
+    def fault() -> Optional[JSONResponse]:
+        roll = rng.random()
+        if roll < config.rate_limit_ratio:
+            stats["rate_limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={
+                    "retry-after": f"{config.retry_after:g}",
+                    "retry-after-ms": str(int(config.retry_after * 1000)),
+                    "x-ratelimit-reset-requests": f"{config.retry_after:g}s"
+                },
+                content={"error": {"message": "Rate limit reached (mock)",
+                                   "type": "requests", "code": "rate_limit_exceeded"}}
+            )
+        if roll < config.rate_limit_ratio + config.error_ratio:
+            stats["errors"] += 1
+            return JSONResponse(
+                status_code=config.error_status,
+                content={"error": {"message": "Injected server error (mock)",
+                                   "type": "server_error", "code": None}}
+            )
+        return None
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        failure = fault()
+        if failure is not None:
+            return failure
+
+        model = body.get("model", "gpt-4")
+        prompt_tokens = _prompt_tokens(body.get("messages", []))
+        completion_tokens = min(config.completion_tokens,
+                                body.get("max_tokens") or config.completion_tokens)
+        usage = {"prompt_tokens": prompt_tokens,
+                 "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        latency = config.latency.sample(rng)
+
+        if not body.get("stream"):
+            await asyncio.sleep(latency)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": WORD * completion_tokens},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            }
+
+        stats["streams"] += 1
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+        chunks = max(1, completion_tokens // 10)
+
+        def chunk(delta: dict, finish_reason=None, chunk_usage=None) -> str:
+            choices = [] if delta is None else [
+                {"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            return "data: " + json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": choices,
+                "usage": chunk_usage
+            }) + "\n\n"
+
+        async def events():
+            # Latency is spread evenly over the chunks
+            yield chunk({"role": "assistant", "content": ""})
+            for index in range(chunks):
+                await asyncio.sleep(latency / chunks)
+                words = completion_tokens // chunks + (index < completion_tokens % chunks)
+                yield chunk({"content": WORD * words})
+            yield chunk({}, finish_reason="stop")
+            if include_usage:
+                yield chunk(None, chunk_usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/mock/stats")
+    async def mock_stats():
+        return stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=Latency.parse, default=Latency.parse("lognormal:1.5,0.4"),
+                        help="fixed:S, uniform:LOW,HIGH, normal:MEAN,SD or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--completion-tokens", type=int, default=400)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0,
+                        help="Share of requests answered 429")
+    parser.add_argument("--retry-after", type=float, default=1.0,
+                        help="Seconds sent in Retry-After on 429s")
+    parser.add_argument("--error-ratio", type=float, default=0.0,
+                        help="Share of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = MockConfig(
+        latency=args.latency,
+        completion_tokens=args.completion_tokens,
+        rate_limit_ratio=args.rate_limit_ratio,
+        retry_after=args.retry_after,
+        error_ratio=args.error_ratio,
+        error_status=args.error_status,
+        seed=args.seed
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Cold-start benchmark: how long `import api.app` takes, and what it loads.
+
+Runs the import in fresh interpreters under `python -X importtime`, reports
+the total and the slowest modules, and compares with a JSON baseline. Exits
+non-zero if the import got slower than the baseline allows or pulled in a
+module that is meant to load lazily (the OpenAI SDK, the document parsers).
+
+    python benchmarks/startup.py                   # compare with the baseline
+    python benchmarks/startup.py --save-baseline   # record a new baseline
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE = ROOT / "benchmarks" / "baselines" / "startup.json"
+
+# Loaded by the lifespan's warm-up or on first use, never by the import
+LAZY_MODULES = ("openai", "PyPDF2", "docx", "lxml", "tiktoken", "numpy")
+
+# Imported first, in the same interpreter, to scale for machine speed
+CALIBRATION_MODULE = "asyncio"
+
+
+def parse_importtime(stderr: str) -> Dict[str, dict]:
+    """
+    Self and cumulative microseconds by module, from -X importtime output.
+
+    Lines look like ``import time:   self [us] | cumulative | name``,
+    with the name indented by nesting depth.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us)}
+    return modules
+
+
+def measure_once(env: Dict[str, str]) -> Dict[str, dict]:
+    code = f"import {CALIBRATION_MODULE}; import api.app"
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT / "src", env=env, capture_output=True, text=True, check=False)
+    if process.returncode != 0:
+        raise RuntimeError(f"import api.app failed:\n{process.stderr[-2000:]}")
+    return parse_importtime(process.stderr)
+
+
+def measure(repeat: int, top: int = 15) -> dict:
+    """Import api.app repeat times in fresh interpreters and summarize"""
+    with tempfile.TemporaryDirectory(prefix="startup-") as workdir:
+        env = {
+            **os.environ,
+            "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-benchmark"),
+            "CACHE_DIR": str(Path(workdir) / "cache"),
+            "JOBS_DB": str(Path(workdir) / "jobs.sqlite3"),
+            "OUTPUT_DIR": str(Path(workdir) / "output"),
+            "METRICS_DIR": str(Path(workdir) / "metrics"),
+            "LOG_DIR": str(Path(workdir) / "logs"),
+        }
+        runs = [measure_once(env) for _ in range(repeat)]
+
+    totals = [run["api.app"]["cumulative_us"] / 1000 for run in runs]
+    calibrations = [run[CALIBRATION_MODULE]["cumulative_us"] / 1000 for run in runs]
+    fastest = runs[totals.index(min(totals))]
+    slowest_modules = sorted(fastest.items(), key=lambda item: item[1]["self_us"],
+                             reverse=True)[:top]
+    return {
+        "import_ms": {"min": round(min(totals), 1), "median": round(statistics.median(totals), 1)},
+        "calibration_ms": round(min(calibrations), 2),
+        "modules_loaded": len(fastest),
+        "lazy_modules_loaded": sorted(name for name in LAZY_MODULES if name in fastest),
+        "slowest_modules": [{"module": name, "self_ms": round(times["self_us"] / 1000, 1),
+                             "cumulative_ms": round(times["cumulative_us"] / 1000, 1)}
+                            for name, times in slowest_modules],
+    }
+
+
+def compare(baseline: Optional[dict], current: dict, threshold: float = 0.3) -> List[str]:
+    """Problems with current compared with baseline (empty if none)"""
+    problems = [f"{name} is imported by api.app; it should load lazily"
+                for name in current["lazy_modules_loaded"]]
+    if baseline is None:
+        return problems
+    speed = baseline["calibration_ms"] / current["calibration_ms"] if current["calibration_ms"] else 1.0
+    before = baseline["import_ms"]["min"]
+    now = round(current["import_ms"]["min"] * speed, 1)
+    if now > before * (1 + threshold):
+        problems.append(f"import api.app took {now}ms (scaled), baseline {before}ms "
+                        f"(+{(now / before - 1) * 100:.0f}%)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=7, help="Fresh interpreters to time")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write the results to --baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=0.3,
+                        help="Allowed slowdown of the fastest import (0.3 = 30%%)")
+    args = parser.parse_args()
+
+    report = {"environment": {"python": platform.python_version(),
+                              "machine": platform.machine()},
+              **measure(args.repeat)}
+    text = json.dumps(report, indent=2)
+    print(text)
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(text + "\n")
+        print(f"Saved baseline to {args.baseline}", file=sys.stderr)
+        return 0
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+    problems = compare(baseline, report, args.threshold)
+    for problem in problems:
+        print(f"REGRESSION {problem}", file=sys.stderr)
+    if not problems:
+        print("No regressions against the baseline", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
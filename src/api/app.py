@@ -1,42 +1,109 @@
 from fastapi.middleware.gzip import GZipMiddleware
-from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+import asyncio
+import importlib
+from datetime import datetime
 from pathlib import Path
-import os
-from fastapi import FastAPI, Depends, Request, UploadFile, File, Form
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+import json
+from fastapi import FastAPI, Depends, Request, UploadFile, File, Form, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from openai import OpenAIError
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from .models import (
     TailorRequest, TailorResponse, HealthResponse,
+    ScoreRequest, ScoreResponse,
+    BatchTailorRequest, BatchTailorResponse, BatchItemResult,
+    JobRequest, JobResponse,
     ApiError, ValidationError, ApiConfig,
-    DetailedApiError, ErrorCode, DetailedApiException
+    DetailedApiError, ErrorCode, DetailedApiException, OptimizeForEnum, StatusEnum
 )
+from .models.errors import ErrorDetail
+from .models.request import MAX_BATCH_SIZE
 from .exceptions import TokenLimitError, APIRateLimitError
-from services import ResumeService, ResumeServiceInterface
-from utils import (
-    load_environment,
-    CustomLogger,
-)
-from utils.file_handler import extract_text_from_file
+from .rate_limit import RateLimiter, RateLimitRule
+from .request_limits import RequestSizeLimitMiddleware
+from .request_context import RequestContextMiddleware
+from .request_metrics import RequestMetricsMiddleware
+from .server_timing import ServerTimingMiddleware
+from .container import ServiceContainer
+from resume_tailor.retry import CircuitOpenError, openai_error_type
+from services import ResumeServiceInterface
+from services.cache import ResultCache, MemoryLRU
+from services.jobs import CallbackPolicy, CallbackRejected, JobQueue, JobStore
+from services.scoring import KeywordScorer
+from utils import CustomLogger
+from utils.logger import get_correlation_id, set_request_context
+from utils import metrics, timing
+from utils.disk_cache import DiskCache
+from utils.output_store import OutputStore
+from utils.file_handler import ExtractedDocument, extract_document, shutdown_extraction_pool
+from utils.upload import UploadTooLargeError
 import time
-from asyncio import Lock
+from config import configure_tokenizer
 from config.production import ProductionSettings
 
-# Load environment variables
-load_environment()
-
 # Initialize config
-api_config = ApiConfig()
+api_config = ApiConfig(rate_limit=ProductionSettings.RATE_LIMIT_REQUESTS,
+                       rate_limit_period=ProductionSettings.RATE_LIMIT_PERIOD)
 
 # Validate production settings if in production
 if ProductionSettings.is_production():
     ProductionSettings.validate()
+elif not ProductionSettings.OPENAI_API_KEY:
+    raise ValueError(
+        "Missing required environment variables: OPENAI_API_KEY. "
+        "Set them in .env file (local) or pass via docker-compose (Docker)."
+    )
+
+configure_tokenizer(ProductionSettings)
+
+# Per-client token buckets; routes mapped to None are exempt
+rate_limiter = RateLimiter(
+    default_rule=RateLimitRule(api_config.rate_limit,
+                               api_config.rate_limit_period),
+    route_rules={
+        path: RateLimitRule(limit, api_config.rate_limit_period)
+        if limit is not None else None
+        for path, limit in api_config.rate_limit_routes.items()
+    }
+)
+
+
+# Slow imports left out of start-up; the lifespan loads them in the
+# background once the worker is already serving
+WARM_UP_MODULES = ("resume_tailor.tailor", "PyPDF2", "docx", "numpy")
+
+
+async def warm_up():
+    """Import the OpenAI SDK and parsers off the event loop, then build the container"""
+    await asyncio.to_thread(
+        lambda: [importlib.import_module(name) for name in WARM_UP_MODULES])
+    get_container()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start-up and shutdown hooks for per-worker resources"""
+    # A request arriving before the warm-up finishes builds the container
+    # itself, so the worker can answer /ping straight away
+    warming = asyncio.create_task(warm_up())
+    await job_queue.start()
+    metrics.registry.start(ProductionSettings.METRICS_FLUSH_INTERVAL)
+    yield
+    warming.cancel()
+    await job_queue.stop()
+    await close_container()
+    await rate_limiter.close()
+    await metrics.registry.close()
+    shutdown_extraction_pool()
+
 
 app = FastAPI(
     title="Resume Tailor API",
     description="API for tailoring resumes using OpenAI GPT",
     version="0.1.0",
-    debug=not ProductionSettings.is_production()
+    debug=not ProductionSettings.is_production(),
+    lifespan=lifespan
 )
 
 # Add production middleware
@@ -60,17 +127,83 @@ app.add_middleware(
 # Add GZip middleware properly
 app.add_middleware(
     GZipMiddleware,
-    minimum_size=api_config.max_request_size
+    minimum_size=api_config.gzip_minimum_size
+)
+
+# Refuse oversized bodies, and oversized files within uploads, before they
+# are read, let alone spooled
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    max_request_bytes=lambda: api_config.max_request_size,
+    max_body_bytes=lambda: api_config.max_body_size,
+    max_part_bytes=lambda: api_config.max_upload_size,
+    too_large=lambda message: _error_response(DetailedApiException(
+        error_code=ErrorCode.PAYLOAD_TOO_LARGE,
+        message=message,
+        suggestion="Upload smaller files or fewer at once"
+    ))
 )
 
 logger = CustomLogger()
 
+# Tailoring results shared by every request in this worker (and, through the
+# SQLite file, with the other workers)
+result_cache = ResultCache(
+    memory=MemoryLRU(
+        max_entries=ProductionSettings.RESULT_CACHE_MEMORY_ENTRIES,
+        ttl=ProductionSettings.RESULT_CACHE_TTL
+    ),
+    disk=DiskCache(
+        Path(ProductionSettings.CACHE_DIR) / "results.sqlite3",
+        max_bytes=ProductionSettings.RESULT_CACHE_MAX_BYTES,
+        ttl=ProductionSettings.RESULT_CACHE_TTL
+    )
+) if ProductionSettings.RESULT_CACHE_ENABLED else None
+
+# Local keyword scoring for /score and the tailoring metadata
+keyword_scorer = KeywordScorer()
+
+# Saved resumes, content-addressed so concurrent saves never collide
+output_store = OutputStore(
+    Path(ProductionSettings.OUTPUT_DIR),
+    compress=ProductionSettings.OUTPUT_COMPRESS,
+    max_files=ProductionSettings.OUTPUT_MAX_FILES or None,
+    max_age=ProductionSettings.OUTPUT_MAX_AGE or None
+)
+
+# Service, tailor and OpenAI client for this worker; built by the lifespan,
+# or on first use when the app runs without one
+container: Optional[ServiceContainer] = None
+
+
+def get_container() -> ServiceContainer:
+    global container
+    if container is None:
+        container = ServiceContainer.build(cache=result_cache, scorer=keyword_scorer)
+    return container
+
+
+async def close_container():
+    global container
+    current, container = container, None
+    if current is not None:
+        await current.aclose()
+
+
 # Dependency provider
 
 
 def get_resume_service() -> ResumeServiceInterface:
-    """Provide ResumeService instance"""
-    return ResumeService()
+    """Provide the worker's shared ResumeService"""
+    return get_container().service
+
+
+def allows_cached_response(cache_control: str = Header(default=None)) -> bool:
+    """False when the client sent Cache-Control: no-cache"""
+    if not cache_control:
+        return True
+    directives = {d.strip().lower() for d in cache_control.split(",")}
+    return "no-cache" not in directives
 
 
 @app.get("/ping")
@@ -85,13 +218,10 @@ async def health():
     start_time = time.time()
 
     try:
-        # Check OpenAI connection (lightweight test)
-        import openai
-        client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-        # Just verify the client is configured (doesn't make API call)
+        # Just verify the shared client is configured (doesn't make API call)
+        services = get_container()
         api_key_valid = bool(
-            client.api_key and client.api_key.startswith("sk-"))
+            services.client.api_key and services.client.api_key.startswith("sk-"))
 
         status = "healthy" if api_key_valid else "degraded"
 
@@ -103,7 +233,8 @@ async def health():
             dependencies={
                 "openai": "connected" if api_key_valid else "error",
                 "file_system": "ok"
-            }
+            },
+            openai_pool=services.pool_stats()
         )
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
@@ -119,66 +250,248 @@ async def health():
         )
 
 
-# Add a simple in-memory store for rate limiting
-# In production, use Redis or similar
-request_counts = {}
-request_counts_lock = Lock()
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus metrics, aggregated across all worker processes"""
+    body = await asyncio.to_thread(metrics.registry.render)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+def _client_key(request: Request) -> str:
+    """Identify the client a request is rate limited as"""
+    return request.client.host if request.client else "unknown"
 
 
 @app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next):
-    async with request_counts_lock:
-        """Implement rate limiting using api_config.rate_limit"""
-        # Get client IP
-        client_ip = request.client.host
-
-        # Get current timestamp
-        now = datetime.now()
-        minute_window = now.strftime('%Y-%m-%d-%H-%M')
-
-        # Initialize or get request count for this minute
-        if minute_window not in request_counts:
-            # Cleanup old entries
-            current_minute = datetime.now()
-            for window in list(request_counts.keys()):
-                window_time = datetime.strptime(window, '%Y-%m-%d-%H-%M')
-                if window_time < current_minute - timedelta(minutes=1):
-                    del request_counts[window]
-            request_counts[minute_window] = {}
-
-        if client_ip not in request_counts[minute_window]:
-            request_counts[minute_window][client_ip] = 0
-
-        # Check rate limit
-        if request_counts[minute_window][client_ip] >= api_config.rate_limit:
-            logger.log_error(
-                APIRateLimitError(retry_after=60),
-                {"client_ip": client_ip}
-            )
-            raise DetailedApiException(
+    """Apply per-client token-bucket rate limiting and add RateLimit-* headers"""
+    client_ip = _client_key(request)
+    with timing.stage("rate_limit"):
+        decision = rate_limiter.hit(client_ip, request.url.path)
+
+    if decision is None:
+        return await call_next(request)
+
+    if not decision.allowed:
+        logger.log_error(
+            APIRateLimitError(retry_after=decision.retry_after),
+            {"client_ip": client_ip, "path": request.url.path}
+        )
+        return _error_response(
+            DetailedApiException(
                 error_code=ErrorCode.RATE_LIMIT_EXCEEDED,
                 message="Too many requests",
-                correlation_id=getattr(request.state, "correlation_id", None),
-                retry_after=60,
-                suggestion="Please wait a minute before trying again"
-            )
+                retry_after=decision.retry_after,
+                suggestion=f"Please wait {decision.retry_after} seconds before trying again"
+            ),
+            headers=decision.headers()
+        )
 
-        # Increment request count
-        request_counts[minute_window][client_ip] += 1
+    response = await call_next(request)
+    response.headers.update(decision.headers())
+    return response
 
-        # Process the request
-        response = await call_next(request)
-        return response
+
+# Added after the rate limiter so they wrap it: rate-limited requests are
+# timed, counted and logged with their ids too. Metrics are outermost
+app.add_middleware(RequestContextMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
+
+
+def _error_response(exc: DetailedApiException, headers: dict = None) -> JSONResponse:
+    """Render a DetailedApiException as a JSON error response"""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content=exc.to_response().model_dump(),
+        headers=headers
+    )
 
 
 # Change to handle the exception class
 @app.exception_handler(DetailedApiException)
 async def detailed_api_error_handler(request: Request, exc: DetailedApiException):
     """Handle DetailedApiException exceptions"""
-    response_model = exc.to_response()
-    return JSONResponse(
-        status_code=429 if exc.error_code == ErrorCode.RATE_LIMIT_EXCEEDED else 500,
-        content=response_model.dict()
+    headers = {"Retry-After": str(exc.retry_after)} if exc.retry_after else None
+    return _error_response(exc, headers)
+
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    """OpenAI is failing and the circuit breaker is open"""
+    return await detailed_api_error_handler(request, _circuit_open_exception(exc))
+
+
+def _token_limit_exception(error: TokenLimitError) -> DetailedApiException:
+    return DetailedApiException(
+        error_code=ErrorCode.TOKEN_LIMIT_EXCEEDED,
+        message=str(error),
+        suggestion="Try reducing input text length"
+    )
+
+
+def _circuit_open_exception(error: CircuitOpenError) -> DetailedApiException:
+    return DetailedApiException(
+        error_code=ErrorCode.SERVICE_UNAVAILABLE,
+        message=str(error),
+        retry_after=error.retry_after,
+        suggestion=f"Please try again in {error.retry_after} seconds"
+    )
+
+
+def _result_metadata(result: dict, start_time: float, **extra) -> dict:
+    """Response metadata shared by every tailoring endpoint"""
+    return {
+        "processing_time": time.time() - start_time,
+        "timestamp": datetime.utcnow().isoformat(),
+        **extra,
+        "model": result.get("model") or ProductionSettings.MODEL_NAME,
+        "routing": result.get("routing"),
+        "tokens_used": result["usage"]["total_tokens"],
+        "cost_usd": result["usage"]["cost_usd"],
+        "input_tokens": result["usage"]["input_tokens"],
+        "output_tokens": result["usage"]["output_tokens"],
+        "cache": result.get("cache", "disabled"),
+        "token_budget": result.get("token_budget"),
+        "compaction": result.get("compaction"),
+        "retries": result.get("retries", 0),
+        "coalesced": result.get("coalesced"),
+        "near_duplicate": result.get("near_duplicate"),
+        "ats_score": result.get("ats_score"),
+        # Batch items carry their own; otherwise the request's
+        "timings": result.get("timings") or timing.timings()
+    }
+
+
+async def _save_output(content: str) -> str:
+    """Write a tailored resume to the output folder and return its path"""
+    with timing.stage("save"):
+        return str(await output_store.save(content))
+
+
+ALLOWED_UPLOAD_EXTENSIONS = {'.pdf', '.docx', '.txt'}
+
+
+def _check_upload_type(file: UploadFile, label: str):
+    """Reject uploads whose extension we cannot extract text from"""
+    ext = Path(file.filename).suffix.lower()
+    if ext not in ALLOWED_UPLOAD_EXTENSIONS:
+        raise DetailedApiException(
+            error_code=ErrorCode.VALIDATION_ERROR,
+            message=f"{label} file type {ext} not supported. Use PDF, DOCX, or TXT.",
+            suggestion="Upload a file with .pdf, .docx, or .txt extension"
+        )
+
+
+def _check_extracted_text(text: str, message: str, min_length: int, suggestion: str):
+    """Reject extracted text that is too short to be useful"""
+    if len(text.strip()) < min_length:
+        raise DetailedApiException(
+            error_code=ErrorCode.VALIDATION_ERROR,
+            message=f"{message}. Must be at least {min_length} characters.",
+            suggestion=suggestion
+        )
+
+
+async def _extract_upload(file: UploadFile) -> ExtractedDocument:
+    """Extract an upload's text, enforcing the per-file size cap"""
+    try:
+        return await extract_document(file.file, file.filename,
+                                      max_bytes=api_config.max_upload_size)
+    except UploadTooLargeError as e:
+        raise DetailedApiException(
+            error_code=ErrorCode.PAYLOAD_TOO_LARGE,
+            message=str(e),
+            suggestion=f"Upload files of at most {e.max_bytes} bytes"
+        )
+
+
+async def _read_resume_upload(Resume: UploadFile) -> ExtractedDocument:
+    logger.logger.info(f"Processing resume file: {Resume.filename}")
+    resume = await _extract_upload(Resume)
+    _check_extracted_text(resume.text, "Resume text too short", 100,
+                          "Upload a complete resume file")
+    return resume
+
+
+async def _read_job_upload(JD: UploadFile) -> ExtractedDocument:
+    logger.logger.info(f"Processing job file: {JD.filename}")
+    job = await _extract_upload(JD)
+    _check_extracted_text(job.text, "Job description too short", 50,
+                          "Upload a complete job description")
+    return job
+
+
+async def _read_uploads(Resume: UploadFile,
+                        JD: UploadFile) -> Tuple[ExtractedDocument, ExtractedDocument]:
+    """Validate uploaded resume and job description files and extract their text"""
+    # Validate file types
+    _check_upload_type(Resume, "Resume")
+    _check_upload_type(JD, "Job description")
+
+    # Extract text from both files concurrently
+    resume, job = await asyncio.gather(
+        _read_resume_upload(Resume),
+        _read_job_upload(JD)
+    )
+    return resume, job
+
+
+def _upload_stats(resume: ExtractedDocument, job: ExtractedDocument) -> dict:
+    """Size and extraction cost of each upload, for response metadata"""
+    return {"resume": resume.stats(), "job": job.stats()}
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_tailoring(events: AsyncIterator[dict], start_time: float,
+                            save: bool, **extra) -> AsyncIterator[str]:
+    """
+    Relay service stream events as SSE.
+
+    'token' events carry content deltas; the final 'done' event carries the
+    same metadata as the non-streaming endpoints. Failures after the stream
+    has started are reported as an 'error' event since the status line has
+    already been sent.
+    """
+    try:
+        async for event in events:
+            if event["type"] == "token":
+                yield _sse("token", {"content": event["content"]})
+                continue
+
+            done = {"metadata": _result_metadata(event, start_time, **extra)}
+            if save:
+                done["saved_to"] = await _save_output(event["content"])
+            yield _sse("done", done)
+
+    except Exception as e:
+        logger.log_error(e, {"stream": True, **extra})
+        if isinstance(e, TokenLimitError):
+            error = _token_limit_exception(e)
+        elif isinstance(e, CircuitOpenError):
+            error = _circuit_open_exception(e)
+        else:
+            error = DetailedApiException(
+                error_code=ErrorCode.API_ERROR,
+                message=str(e),
+                suggestion="Check API key or try again later"
+            )
+        yield _sse("error", error.to_response().model_dump(mode="json"))
+
+
+def _sse_response(stream: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop reverse proxies from buffering the stream
+            "X-Accel-Buffering": "no"
+        }
     )
 
 
@@ -193,11 +506,12 @@ async def detailed_api_error_handler(request: Request, exc: DetailedApiException
 )
 async def tailor_endpoint(
     request: TailorRequest,
-    service: ResumeServiceInterface = Depends(get_resume_service)
+    service: ResumeServiceInterface = Depends(get_resume_service),
+    use_cache: bool = Depends(allows_cached_response)
 ):
     """Enhanced tailor endpoint with full validation and error handling"""
-    logger.set_request_context()  # Generate new request ID
     start_time = time.time()
+    timing.mark("request")
 
     try:
         # Log the incoming request
@@ -207,50 +521,28 @@ async def tailor_endpoint(
         result = await service.tailor_resume(
             resume_text=request.resume_text,
             job_description=request.job_description,
-            tone=request.tone
+            tone=request.tone,
+            use_cache=use_cache,
+            optimize_for=request.optimize_for
         )
 
-        # Log performance
-        end_time = time.time()
-        processing_time = end_time - start_time
-
         # Create response with usage information
         response = TailorResponse(
             tailored_resume=result["content"],
-            metadata={
-                "processing_time": processing_time,
-                "timestamp": datetime.utcnow().isoformat(),
-                "model": os.getenv('MODEL_NAME', 'gpt-4'),
-                "tokens_used": result["usage"]["total_tokens"],
-                "cost_usd": result["usage"]["cost_usd"],
-                "input_tokens": result["usage"]["input_tokens"],
-                "output_tokens": result["usage"]["output_tokens"]
-            }
+            metadata=_result_metadata(result, start_time)
         )
 
         if request.save_output:
-            # Create timestamp for unique filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-            # Ensure output directory exists
-            output_dir = Path(__file__).parent.parent.parent / \
-                "data" / "output"
-            output_dir.mkdir(parents=True, exist_ok=True)
-
-            # Save file
-            output_path = output_dir / f"tailored_resume_{timestamp}.txt"
-            output_path.write_text(result["content"])
-
             # Add file path to response
-            response.saved_to = str(output_path)
+            response.saved_to = await _save_output(result["content"])
 
         return response
 
-    except OpenAIError as e:
+    # The SDK is imported by then; the clause is only evaluated on an error
+    except openai_error_type() as e:
         raise DetailedApiException(
             error_code=ErrorCode.API_ERROR,
             message=str(e),
-            correlation_id=request.correlation_id,
             suggestion="Check API key or try again later"
         )
 
@@ -259,29 +551,53 @@ async def tailor_endpoint(
         raise DetailedApiException(
             error_code=ErrorCode.RATE_LIMIT_EXCEEDED,
             message="Rate limit exceeded",
-            correlation_id=request.correlation_id,
             retry_after=e.retry_after,
             suggestion="Please wait before making more requests"
         )
 
-    except Exception as e:
-        logger.log_error(e, {"request": request.dict()})
-        raise
-
     except IOError as e:
+        logger.log_error(e, request.model_dump())
         raise DetailedApiException(
             error_code=ErrorCode.FILE_SYSTEM_ERROR,
-            message="Failed to save output file",
-            correlation_id=request.correlation_id
+            message="Failed to save output file"
         )
 
     except TokenLimitError as e:
         logger.log_error(e, request.model_dump())
-        raise DetailedApiException(
-            error_code=ErrorCode.TOKEN_LIMIT_EXCEEDED,
-            message="Input text too long",
-            suggestion="Try reducing input text length"
-        )
+        raise _token_limit_exception(e)
+
+    except Exception as e:
+        logger.log_error(e, request.model_dump())
+        raise
+
+
+@app.post(
+    "/score",
+    response_model=ScoreResponse,
+    responses={
+        400: {"model": ValidationError},
+        429: {"model": DetailedApiError}
+    },
+    summary="Score a Resume Against a Job Description",
+    description="""
+    Keyword and skill coverage of a resume against a job description, the
+    keywords it is missing and a 0-100 match score. Computed locally with
+    TF-IDF; no OpenAI call is made, so nothing is spent.
+    """
+)
+async def score_endpoint(request: ScoreRequest):
+    """Score how well a resume matches a job description"""
+    start_time = time.time()
+    with timing.stage("score"):
+        score = await asyncio.to_thread(keyword_scorer.score, request.resume_text,
+                                        request.job_description)
+    return ScoreResponse(
+        **score.to_dict(),
+        metadata={
+            "processing_time": time.time() - start_time,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    )
 
 
 @app.post(
@@ -333,12 +649,18 @@ async def tailor_upload_endpoint(
         title="Tone",
         examples=["professional", "casual", "academic"]
     ),
+    OptimizeFor: OptimizeForEnum = Form(
+        default=OptimizeForEnum.BALANCED,
+        description="What to favour when choosing the model",
+        title="Optimize For"
+    ),
     Save: bool = Form(
         default=True,
         description="Save the tailored resume to output folder",
         title="Save Output"
     ),
-    service: ResumeServiceInterface = Depends(get_resume_service)
+    service: ResumeServiceInterface = Depends(get_resume_service),
+    use_cache: bool = Depends(allows_cached_response)
 ):
     """
     Upload files to tailor resume.
@@ -347,93 +669,37 @@ async def tailor_upload_endpoint(
     - Resume: Your resume in PDF, DOCX, or TXT format
     - JD: Job description in PDF, DOCX, or TXT format
     - Tone: professional, casual, or academic
+    - OptimizeFor: balanced, quality, latency, or cost
     - Save: Whether to save the result
     """
     start_time = time.time()
+    timing.mark("request")
 
     try:
-        # Validate file types
-        allowed_extensions = {'.pdf', '.docx', '.txt'}
-        resume_ext = Path(Resume.filename).suffix.lower()
-        job_ext = Path(JD.filename).suffix.lower()
-
-        if resume_ext not in allowed_extensions:
-            raise DetailedApiException(
-                error_code=ErrorCode.VALIDATION_ERROR,
-                message=f"Resume file type {resume_ext} not supported. Use PDF, DOCX, or TXT.",
-                suggestion="Upload a file with .pdf, .docx, or .txt extension"
-            )
-
-        if job_ext not in allowed_extensions:
-            raise DetailedApiException(
-                error_code=ErrorCode.VALIDATION_ERROR,
-                message=f"Job description file type {job_ext} not supported. Use PDF, DOCX, or TXT.",
-                suggestion="Upload a file with .pdf, .docx, or .txt extension"
-            )
-
-        # Extract text from files
-        logger.logger.info(f"Processing resume file: {Resume.filename}")
-        resume_text = await extract_text_from_file(Resume.file, Resume.filename)
-
-        logger.logger.info(f"Processing job file: {JD.filename}")
-        job_text = await extract_text_from_file(JD.file, JD.filename)
-
-        # Validate extracted text
-        if len(resume_text.strip()) < 100:
-            raise DetailedApiException(
-                error_code=ErrorCode.VALIDATION_ERROR,
-                message="Resume text too short. Must be at least 100 characters.",
-                suggestion="Upload a complete resume file"
-            )
-
-        if len(job_text.strip()) < 50:
-            raise DetailedApiException(
-                error_code=ErrorCode.VALIDATION_ERROR,
-                message="Job description too short. Must be at least 50 characters.",
-                suggestion="Upload a complete job description"
-            )
+        resume, job = await _read_uploads(Resume, JD)
 
         # Process the request
         result = await service.tailor_resume(
-            resume_text=resume_text,
-            job_description=job_text,
-            tone=Tone
+            resume_text=resume.text,
+            job_description=job.text,
+            tone=Tone,
+            use_cache=use_cache,
+            optimize_for=OptimizeFor
         )
 
-        # Log performance
-        end_time = time.time()
-        processing_time = end_time - start_time
-
         response = TailorResponse(
             tailored_resume=result["content"],
-            metadata={
-                "processing_time": processing_time,
-                "timestamp": datetime.utcnow().isoformat(),
-                "resume_file": Resume.filename,
-                "job_file": JD.filename,
-                "model": os.getenv('MODEL_NAME', 'gpt-4'),
-                "tokens_used": result["usage"]["total_tokens"],
-                "cost_usd": result["usage"]["cost_usd"],
-                "input_tokens": result["usage"]["input_tokens"],
-                "output_tokens": result["usage"]["output_tokens"]
-            }
+            metadata=_result_metadata(
+                result, start_time,
+                resume_file=Resume.filename,
+                job_file=JD.filename,
+                uploads=_upload_stats(resume, job)
+            )
         )
 
         if Save:
-            # Create timestamp for unique filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-            # Ensure output directory exists
-            output_dir = Path(__file__).parent.parent.parent / \
-                "data" / "output"
-            output_dir.mkdir(parents=True, exist_ok=True)
-
-            # Save file
-            output_path = output_dir / f"tailored_resume_{timestamp}.txt"
-            output_path.write_text(result["content"])
-
             # Add file path to response
-            response.saved_to = str(output_path)
+            response.saved_to = await _save_output(result["content"])
 
         return response
 
@@ -448,6 +714,12 @@ async def tailor_upload_endpoint(
         # Re-raise our custom exceptions
         raise
 
+    except TokenLimitError as e:
+        raise _token_limit_exception(e)
+
+    except CircuitOpenError as e:
+        raise _circuit_open_exception(e)
+
     except Exception as e:
         # Safely get filenames if they exist
         context = {}
@@ -463,3 +735,444 @@ async def tailor_upload_endpoint(
             message=f"Error processing files: {str(e)}",
             suggestion="Check file format and content"
         )
+
+
+@app.post(
+    "/tailor/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"text/event-stream": {}}},
+        400: {"model": ValidationError},
+        429: {"model": DetailedApiError}
+    },
+    summary="Stream a Tailored Resume",
+    description="""
+    Same input as `/tailor`, answered as server-sent events.
+
+    **Events:**
+    - `token`: `{"content": "..."}` for each generated chunk
+    - `done`: `{"metadata": {...}, "saved_to": "..."}` with the usual usage and cost metadata
+    - `error`: an error body if generation fails mid-stream
+    """
+)
+async def tailor_stream_endpoint(
+    request: TailorRequest,
+    service: ResumeServiceInterface = Depends(get_resume_service),
+    use_cache: bool = Depends(allows_cached_response)
+):
+    """Stream the tailored resume as it is generated"""
+    start_time = time.time()
+    timing.mark("request")
+    logger.log_request(request.model_dump())
+
+    events = service.stream_tailor_resume(
+        resume_text=request.resume_text,
+        job_description=request.job_description,
+        tone=request.tone,
+        use_cache=use_cache,
+        optimize_for=request.optimize_for
+    )
+    return _sse_response(
+        _stream_tailoring(events, start_time, request.save_output))
+
+
+@app.post(
+    "/tailor-upload/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"text/event-stream": {}}},
+        400: {"model": ValidationError},
+        429: {"model": DetailedApiError}
+    },
+    summary="Upload Files and Stream a Tailored Resume",
+    description="""
+    Same input as `/tailor-upload`, answered as server-sent events
+    (`token`, `done` and `error` events as in `/tailor/stream`).
+    """
+)
+async def tailor_upload_stream_endpoint(
+    Resume: UploadFile = File(..., description="Upload the Resume file",
+                              title="Resume File"),
+    JD: UploadFile = File(..., description="Upload the Job Description file",
+                          title="Job Description File"),
+    Tone: str = Form(default="professional",
+                     description="Tone for the tailored resume", title="Tone"),
+    OptimizeFor: OptimizeForEnum = Form(
+        default=OptimizeForEnum.BALANCED,
+        description="What to favour when choosing the model", title="Optimize For"),
+    Save: bool = Form(default=True,
+                      description="Save the tailored resume to output folder",
+                      title="Save Output"),
+    service: ResumeServiceInterface = Depends(get_resume_service),
+    use_cache: bool = Depends(allows_cached_response)
+):
+    """Upload files and stream the tailored resume as it is generated"""
+    start_time = time.time()
+    timing.mark("request")
+
+    try:
+        resume, job = await _read_uploads(Resume, JD)
+    except ValueError as e:
+        raise DetailedApiException(
+            error_code=ErrorCode.VALIDATION_ERROR,
+            message=str(e),
+            suggestion="Check file format and try again"
+        )
+
+    events = service.stream_tailor_resume(
+        resume_text=resume.text,
+        job_description=job.text,
+        tone=Tone,
+        use_cache=use_cache,
+        optimize_for=OptimizeFor
+    )
+    return _sse_response(_stream_tailoring(
+        events, start_time, Save,
+        resume_file=Resume.filename,
+        job_file=JD.filename,
+        uploads=_upload_stats(resume, job)
+    ))
+
+
+def _item_error(index: int, error: Exception) -> ErrorDetail:
+    """Describe why one batch item failed"""
+    logger.log_error(error, {"batch_item": index})
+    if isinstance(error, DetailedApiException):
+        return ErrorDetail(code=error.error_code, message=error.message)
+    if isinstance(error, TokenLimitError):
+        return ErrorDetail(code=ErrorCode.TOKEN_LIMIT_EXCEEDED, message=str(error))
+    if isinstance(error, CircuitOpenError):
+        return ErrorDetail(code=ErrorCode.SERVICE_UNAVAILABLE, message=str(error))
+    if isinstance(error, ValueError):
+        return ErrorDetail(code=ErrorCode.VALIDATION_ERROR, message=str(error))
+    return ErrorDetail(code=ErrorCode.API_ERROR, message=str(error))
+
+
+async def _run_batch(
+    service: ResumeServiceInterface,
+    resume_text: str,
+    job_descriptions: List[Tuple[int, str]],
+    tone: str,
+    use_cache: bool,
+    save: bool,
+    start_time: float,
+    item_metadata: Callable[[int], dict] = lambda index: {},
+    optimize_for: str = "balanced"
+) -> AsyncIterator[BatchItemResult]:
+    """Tailor (index, job description) pairs and yield results as they complete"""
+    texts = [text for _, text in job_descriptions]
+    async for position, outcome in service.tailor_batch(
+        resume_text=resume_text,
+        job_descriptions=texts,
+        tone=tone,
+        use_cache=use_cache,
+        concurrency=ProductionSettings.BATCH_CONCURRENCY,
+        optimize_for=optimize_for
+    ):
+        index = job_descriptions[position][0]
+        if isinstance(outcome, Exception):
+            yield BatchItemResult(index=index, status=StatusEnum.ERROR,
+                                  error=_item_error(index, outcome))
+            continue
+
+        item = BatchItemResult(
+            index=index,
+            status=StatusEnum.SUCCESS,
+            tailored_resume=outcome["content"],
+            metadata=_result_metadata(
+                outcome, start_time, **item_metadata(index))
+        )
+        if save:
+            item.saved_to = await _save_output(outcome["content"])
+        yield item
+
+
+def _batch_summary(items: List[BatchItemResult], start_time: float) -> dict:
+    """Totals across a finished batch"""
+    succeeded = [item for item in items if item.status == StatusEnum.SUCCESS]
+    return {
+        "processing_time": time.time() - start_time,
+        "timestamp": datetime.utcnow().isoformat(),
+        "total": len(items),
+        "succeeded": len(succeeded),
+        "failed": len(items) - len(succeeded),
+        "tokens_used": sum(item.metadata["tokens_used"] for item in succeeded),
+        "cost_usd": round(sum(item.metadata["cost_usd"] for item in succeeded), 6)
+    }
+
+
+async def _batch_response(items: AsyncIterator[BatchItemResult], start_time: float,
+                          stream: bool):
+    """
+    Either collect a batch into a BatchTailorResponse or, with stream=True,
+    emit NDJSON: one BatchItemResult per line as each item completes and a
+    final {"summary": {...}} line.
+    """
+    if stream:
+        async def lines():
+            finished = []
+            async for item in items:
+                finished.append(item)
+                yield item.model_dump_json() + "\n"
+            yield json.dumps({"summary": _batch_summary(finished, start_time)}) + "\n"
+
+        return StreamingResponse(
+            lines(),
+            media_type="application/x-ndjson",
+            headers={
+                # GZipMiddleware leaves encoded responses alone; compressing
+                # would hold lines back until zlib's buffer fills
+                "Content-Encoding": "identity",
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no"
+            }
+        )
+
+    results = sorted([item async for item in items], key=lambda item: item.index)
+    summary = _batch_summary(results, start_time)
+    return BatchTailorResponse(
+        status=StatusEnum.SUCCESS if summary["succeeded"] else StatusEnum.ERROR,
+        results=results,
+        metadata=summary
+    )
+
+
+@app.post(
+    "/tailor/batch",
+    response_model=BatchTailorResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}},
+        400: {"model": ValidationError},
+        429: {"model": DetailedApiError}
+    },
+    summary="Tailor One Resume to Many Job Descriptions",
+    description="""
+    Tailors the resume against every job description concurrently.
+    Failures are reported per item and do not fail the batch.
+
+    With `stream=true` the response is NDJSON: one result per line as soon
+    as it completes, followed by a `{"summary": {...}}` line.
+    """
+)
+async def tailor_batch_endpoint(
+    request: BatchTailorRequest,
+    stream: bool = Query(
+        default=False, description="Stream results as NDJSON as they complete"),
+    service: ResumeServiceInterface = Depends(get_resume_service),
+    use_cache: bool = Depends(allows_cached_response)
+):
+    """Tailor one resume against a list of job descriptions"""
+    start_time = time.time()
+    timing.mark("request")
+
+    items = _run_batch(
+        service,
+        resume_text=request.resume_text,
+        job_descriptions=list(enumerate(request.job_descriptions)),
+        tone=request.tone,
+        use_cache=use_cache,
+        save=request.save_output,
+        start_time=start_time,
+        optimize_for=request.optimize_for
+    )
+    return await _batch_response(items, start_time, stream)
+
+
+@app.post(
+    "/tailor-upload/batch",
+    response_model=BatchTailorResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}},
+        400: {"model": ValidationError},
+        429: {"model": DetailedApiError}
+    },
+    summary="Upload One Resume and Many Job Description Files",
+    description="""
+    Upload a resume and several job description files (PDF, DOCX or TXT).
+    A job description file that can't be read fails only its own item.
+    Supports the same `stream=true` NDJSON mode as `/tailor/batch`.
+    """
+)
+async def tailor_upload_batch_endpoint(
+    Resume: UploadFile = File(..., description="Upload the Resume file",
+                              title="Resume File"),
+    JDs: List[UploadFile] = File(..., description="Upload the Job Description files",
+                                 title="Job Description Files"),
+    Tone: str = Form(default="professional",
+                     description="Tone for the tailored resumes", title="Tone"),
+    OptimizeFor: OptimizeForEnum = Form(
+        default=OptimizeForEnum.BALANCED,
+        description="What to favour when choosing the model", title="Optimize For"),
+    Save: bool = Form(default=False,
+                      description="Save each tailored resume to output folder",
+                      title="Save Output"),
+    stream: bool = Query(
+        default=False, description="Stream results as NDJSON as they complete"),
+    service: ResumeServiceInterface = Depends(get_resume_service),
+    use_cache: bool = Depends(allows_cached_response)
+):
+    """Upload a resume and several job descriptions to tailor against"""
+    start_time = time.time()
+    timing.mark("request")
+
+    if len(JDs) > MAX_BATCH_SIZE:
+        raise DetailedApiException(
+            error_code=ErrorCode.VALIDATION_ERROR,
+            message=f"Too many job descriptions: {len(JDs)}. At most {MAX_BATCH_SIZE} per batch.",
+            suggestion="Split the upload into several batches"
+        )
+
+    try:
+        _check_upload_type(Resume, "Resume")
+        resume_text = (await _read_resume_upload(Resume)).text
+    except ValueError as e:
+        raise DetailedApiException(
+            error_code=ErrorCode.VALIDATION_ERROR,
+            message=str(e),
+            suggestion="Check file format and try again"
+        )
+
+    async def read_job(JD: UploadFile) -> str:
+        _check_upload_type(JD, "Job description")
+        return (await _read_job_upload(JD)).text
+
+    # Extract every job description concurrently; failures stay per item
+    extracted = await asyncio.gather(
+        *(read_job(JD) for JD in JDs), return_exceptions=True)
+
+    job_descriptions = []
+    unreadable = []
+    for index, outcome in enumerate(extracted):
+        if isinstance(outcome, (DetailedApiException, ValueError)):
+            unreadable.append(BatchItemResult(
+                index=index, status=StatusEnum.ERROR,
+                error=_item_error(index, outcome),
+                metadata={"job_file": JDs[index].filename}
+            ))
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            job_descriptions.append((index, outcome))
+
+    async def items():
+        for item in unreadable:
+            yield item
+        async for item in _run_batch(
+            service,
+            resume_text=resume_text,
+            job_descriptions=job_descriptions,
+            tone=Tone,
+            use_cache=use_cache,
+            save=Save,
+            start_time=start_time,
+            item_metadata=lambda index: {
+                "resume_file": Resume.filename,
+                "job_file": JDs[index].filename
+            },
+            optimize_for=OptimizeFor
+        ):
+            yield item
+
+    return await _batch_response(items(), start_time, stream)
+
+
+async def _run_job(payload: dict) -> dict:
+    """Run one queued tailoring request; the return value is stored with the job"""
+    start_time = time.time()
+    timing.start_timer()
+    set_request_context(correlation_id=payload.get("correlation_id"))
+    result = await get_resume_service().tailor_resume(
+        resume_text=payload["resume_text"],
+        job_description=payload["job_description"],
+        tone=payload["tone"],
+        # Jobs queued before routing existed carry no hint
+        optimize_for=payload.get("optimize_for", "balanced")
+    )
+    response = TailorResponse(
+        tailored_resume=result["content"],
+        metadata=_result_metadata(result, start_time)
+    )
+    if payload["save_output"]:
+        response.saved_to = await _save_output(result["content"])
+    return response.model_dump(mode="json")
+
+
+# Durable queue shared by all workers through the SQLite file; each worker
+# process drains it with its own small pool
+job_queue = JobQueue(
+    JobStore(Path(ProductionSettings.JOBS_DB)),
+    handler=_run_job,
+    workers=ProductionSettings.JOB_WORKERS,
+    poll_interval=ProductionSettings.JOB_POLL_INTERVAL,
+    lease_seconds=ProductionSettings.JOB_LEASE_SECONDS,
+    max_attempts=ProductionSettings.JOB_MAX_ATTEMPTS,
+    retention=ProductionSettings.JOB_RETENTION,
+    callback_policy=CallbackPolicy(ProductionSettings.JOB_CALLBACK_ALLOWED_HOSTS)
+)
+
+
+def _job_response(job: dict) -> JobResponse:
+    return JobResponse(
+        job_id=job["id"],
+        status=job["status"],
+        attempts=job["attempts"],
+        created_at=datetime.utcfromtimestamp(job["created"]).isoformat(),
+        updated_at=datetime.utcfromtimestamp(job["updated"]).isoformat(),
+        result=job["result"],
+        error=job["error"]
+    )
+
+
+@app.post(
+    "/jobs",
+    response_model=JobResponse,
+    status_code=202,
+    responses={
+        400: {"model": ValidationError},
+        429: {"model": DetailedApiError}
+    },
+    summary="Queue a Tailoring Job",
+    description="""
+    Queues the same input as `/tailor` and returns a job id immediately.
+    Poll `GET /jobs/{job_id}` for the result, or pass `callback_url` to
+    receive `{"job_id", "status", "result", "error"}` as a POST when the
+    job finishes. Callbacks must be https URLs of public hosts.
+    """
+)
+async def create_job_endpoint(request: JobRequest):
+    """Queue a tailoring request for background processing"""
+    if request.callback_url:
+        try:
+            await job_queue.callback_policy.check(str(request.callback_url))
+        except CallbackRejected as e:
+            raise DetailedApiException(
+                error_code=ErrorCode.VALIDATION_ERROR,
+                message=str(e),
+                suggestion="Use an https URL on a public host"
+            )
+    payload = request.model_dump(mode="json", exclude={"callback_url"})
+    # The job's logs carry the id of the request that queued it
+    payload["correlation_id"] = get_correlation_id()
+    job_id = await job_queue.submit(
+        payload,
+        callback_url=str(request.callback_url) if request.callback_url else None
+    )
+    return _job_response(await job_queue.get(job_id))
+
+
+@app.get(
+    "/jobs/{job_id}",
+    response_model=JobResponse,
+    responses={404: {"model": DetailedApiError}},
+    summary="Get Tailoring Job Status"
+)
+async def get_job_endpoint(job_id: str):
+    """Report the status, and once finished the outcome, of a queued job"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise DetailedApiException(
+            error_code=ErrorCode.NOT_FOUND,
+            message=f"Job {job_id} not found",
+            suggestion="Check the job id; finished jobs are kept for a limited time"
+        )
+    return _job_response(job)
@@ -0,0 +1,88 @@
+from typing import TYPE_CHECKING, Optional
+
+import httpx
+
+from config.settings import Settings, get_settings
+from services import ResumeService
+from services.cache import ResultCache
+from services.coalesce import SingleFlight
+from services.near_duplicate import NearDuplicateIndex
+from services.scoring import KeywordScorer
+from utils.http_pool import InstrumentedTransport
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from resume_tailor import ResumeTailor
+
+
+class ServiceContainer:
+    """
+    Long-lived objects shared by every request in a worker process.
+
+    Built once (at start-up by the app lifespan, or on first use) so that
+    requests get a ready service instead of constructing a client, tailor
+    and service each time. The OpenAI client runs on one explicitly sized
+    connection pool whose statistics are reported by /health.
+    """
+
+    def __init__(self,
+                 settings: Settings,
+                 transport: InstrumentedTransport,
+                 http_client: httpx.AsyncClient,
+                 client: "AsyncOpenAI",
+                 tailor: "ResumeTailor",
+                 service: ResumeService):
+        self.settings = settings
+        self.transport = transport
+        self.http_client = http_client
+        self.client = client
+        self.tailor = tailor
+        self.service = service
+
+    @classmethod
+    def build(cls, cache: Optional[ResultCache] = None,
+              settings: Optional[Settings] = None,
+              scorer: Optional[KeywordScorer] = None) -> "ServiceContainer":
+        # The SDK is the slowest import in the app; it is loaded here, or
+        # earlier by the lifespan's warm-up, rather than when the app loads
+        from openai import AsyncOpenAI
+        from resume_tailor import ResumeTailor
+
+        settings = settings or get_settings()
+        timeout = httpx.Timeout(
+            settings.OPENAI_READ_TIMEOUT,
+            connect=settings.OPENAI_CONNECT_TIMEOUT,
+            pool=settings.OPENAI_POOL_TIMEOUT
+        )
+        transport = InstrumentedTransport(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY
+            ),
+            http2=settings.OPENAI_HTTP2
+        )
+        http_client = httpx.AsyncClient(transport=transport, timeout=timeout)
+        # The SDK applies its own timeout per request, so give it ours too;
+        # retries are left to the tailor's retry policy
+        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY,
+                             http_client=http_client, timeout=timeout,
+                             max_retries=0)
+        tailor = ResumeTailor(model=settings.MODEL_NAME, client=client)
+        service = ResumeService(
+            tailor=tailor, cache=cache,
+            flights=SingleFlight() if settings.COALESCE_ENABLED else None,
+            near_duplicates=NearDuplicateIndex(
+                threshold=settings.NEAR_DUPLICATE_THRESHOLD,
+                max_entries=settings.NEAR_DUPLICATE_MAX_ENTRIES
+            ) if settings.NEAR_DUPLICATE_ENABLED else None,
+            scorer=(scorer or KeywordScorer()) if settings.ATS_SCORE_ENABLED else None)
+        return cls(settings, transport, http_client, client, tailor, service)
+
+    def pool_stats(self) -> dict:
+        return self.transport.stats()
+
+    async def aclose(self):
+        """Close the OpenAI client's connection pool"""
+        await self.client.close()
+        await self.http_client.aclose()
@@ -1,17 +1,8 @@
 # api/exceptions.py
 from typing import Optional
 
-
-class TokenLimitError(Exception):
-    """Raised when the input text exceeds token limits"""
-
-    def __init__(self, message: str = "Input text exceeds token limit",
-                 token_count: Optional[int] = None,
-                 max_tokens: Optional[int] = None):
-        self.message = message
-        self.token_count = token_count
-        self.max_tokens = max_tokens
-        super().__init__(self.message)
+# Raised by the tailor's token budgeting; one class so handlers here catch it
+from utils.errors import TokenLimitError
 
 
 class APIRateLimitError(Exception):
@@ -1,22 +1,34 @@
 from .config import ApiConfig
-from .request import TailorRequest
-from .response import TailorResponse, HealthResponse
+from .request import TailorRequest, BatchTailorRequest, JobRequest, ScoreRequest
+from .response import (
+    TailorResponse, HealthResponse, BatchItemResult, BatchTailorResponse,
+    JobResponse, ScoreResponse
+)
 from .errors import (
     ApiError, ValidationError, DetailedApiError,
     ErrorCode, DetailedApiException
 )
-from .shared import StatusEnum, ToneEnum
+from .shared import JobStatusEnum, OptimizeForEnum, StatusEnum, ToneEnum
 
 __all__ = [
     "ApiConfig",
     "TailorRequest",
+    "BatchTailorRequest",
+    "JobRequest",
+    "ScoreRequest",
     "TailorResponse",
+    "BatchItemResult",
+    "BatchTailorResponse",
+    "JobResponse",
+    "ScoreResponse",
     "HealthResponse",
     "ApiError",
     "ValidationError",
     "DetailedApiError",
     "DetailedApiException",
     "ErrorCode",
+    "JobStatusEnum",
+    "OptimizeForEnum",
     "StatusEnum",
     "ToneEnum"
 ]
@@ -1,15 +1,36 @@
 from pydantic import BaseModel, Field
+from typing import Dict, Optional
 
 
 class ApiConfig(BaseModel):
     """API configuration settings"""
     max_request_size: int = Field(
         default=1024 * 1024,  # 1MB
-        description="Maximum request size in bytes"
+        description="Maximum size in bytes of a request body that is not a file upload"
+    )
+    max_upload_size: int = Field(
+        default=5 * 1024 * 1024,  # 5MB
+        description="Maximum size of one uploaded file in bytes"
+    )
+    max_body_size: int = Field(
+        default=16 * 1024 * 1024,  # 16MB
+        description="Maximum request body in bytes, all uploads included"
+    )
+    gzip_minimum_size: int = Field(
+        default=1024,
+        description="Smallest response body in bytes that is gzip-compressed"
     )
     rate_limit: int = Field(
         default=60,
-        description="Requests per minute"
+        description="Requests per rate limit period"
+    )
+    rate_limit_period: int = Field(
+        default=60,
+        description="Rate limit period in seconds"
+    )
+    rate_limit_routes: Dict[str, Optional[int]] = Field(
+        default_factory=lambda: {"/ping": None, "/health": None, "/metrics": None},
+        description="Per-route requests per period; None exempts the route"
     )
     timeout: int = Field(
         default=30,
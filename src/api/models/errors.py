@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from .shared import StatusEnum
 from enum import Enum
+from utils.logger import get_correlation_id
 
 
 class ErrorDetail(BaseModel):
@@ -40,6 +41,19 @@ class ErrorCode(str, Enum):
     FILE_SYSTEM_ERROR = "FILE_SYSTEM_ERROR"
     UNAUTHORIZED = "UNAUTHORIZED"
     SERVICE_UNAVAILABLE = "SERVICE_UNAVAILABLE"
+    NOT_FOUND = "NOT_FOUND"
+    PAYLOAD_TOO_LARGE = "PAYLOAD_TOO_LARGE"
+
+
+# HTTP status for each error code; anything not listed is a 500
+ERROR_STATUS_CODES = {
+    ErrorCode.VALIDATION_ERROR: 400,
+    ErrorCode.RATE_LIMIT_EXCEEDED: 429,
+    ErrorCode.TOKEN_LIMIT_EXCEEDED: 413,
+    ErrorCode.NOT_FOUND: 404,
+    ErrorCode.PAYLOAD_TOO_LARGE: 413,
+    ErrorCode.SERVICE_UNAVAILABLE: 503,
+}
 
 
 # Create an actual exception class
@@ -56,11 +70,17 @@ class DetailedApiException(Exception):
     ):
         self.error_code = error_code
         self.message = message
-        self.correlation_id = correlation_id
+        # Defaults to the id of the request being handled
+        self.correlation_id = correlation_id or get_correlation_id()
         self.retry_after = retry_after
         self.suggestion = suggestion
         super().__init__(message)
 
+    @property
+    def status_code(self) -> int:
+        """HTTP status this error is reported with"""
+        return ERROR_STATUS_CODES.get(self.error_code, 500)
+
     def to_response(self) -> 'DetailedApiError':
         """Convert exception to response model"""
         return DetailedApiError(
@@ -1,8 +1,27 @@
-from pydantic import BaseModel, Field, field_validator
-from .shared import ToneEnum
+from pydantic import BaseModel, Field, HttpUrl, field_validator
+from typing import List, Optional
+from .shared import OptimizeForEnum, ToneEnum
 import re
 
 
+# Most job descriptions a single batch request may carry
+MAX_BATCH_SIZE = 50
+
+
+def _clean_text(v: str) -> str:
+    """Strip control characters and require a minimum word count"""
+    # Remove control characters, keeping the line breaks and tabs that
+    # give a resume its structure
+    v = re.sub(r'\r\n?', '\n', v)
+    v = re.sub(r'[\x00-\x08\x0B-\x1F\x7F]', '', v)
+
+    # Check for minimum word count
+    if len(v.split()) < 10:
+        raise ValueError("Text must contain at least 10 words")
+
+    return v
+
+
 class TailorRequest(BaseModel):
     """
     Request model for resume tailoring with validation
@@ -26,6 +45,11 @@ class TailorRequest(BaseModel):
         description="The tone to use in the tailored resume"
     )
 
+    optimize_for: OptimizeForEnum = Field(
+        default=OptimizeForEnum.BALANCED,
+        description="What to favour when choosing the model: balanced, quality, latency or cost"
+    )
+
     save_output: bool = Field(
         default=True,
         description="Whether to save the output to a file"
@@ -34,14 +58,7 @@ class TailorRequest(BaseModel):
     @field_validator('resume_text', 'job_description')
     def validate_text_content(cls, v):
         """Validate text doesn't contain harmful content"""
-        # Remove any control characters
-        v = re.sub(r'[\x00-\x1F\x7F]', '', v)
-
-        # Check for minimum word count
-        if len(v.split()) < 10:
-            raise ValueError("Text must contain at least 10 words")
-
-        return v
+        return _clean_text(v)
 
     model_config = {
         "json_schema_extra": {
@@ -53,3 +70,101 @@ class TailorRequest(BaseModel):
             }
         }
     }
+
+
+class BatchTailorRequest(BaseModel):
+    """
+    Request model for tailoring one resume against many job descriptions
+    """
+    resume_text: str = Field(
+        ...,
+        min_length=100,
+        max_length=5000,
+        description="The resume text to be tailored"
+    )
+
+    job_descriptions: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_SIZE,
+        description="Job descriptions to tailor against, one result each"
+    )
+
+    tone: ToneEnum = Field(
+        default=ToneEnum.PROFESSIONAL,
+        description="The tone to use in the tailored resumes"
+    )
+
+    optimize_for: OptimizeForEnum = Field(
+        default=OptimizeForEnum.BALANCED,
+        description="What to favour when choosing the model: balanced, quality, latency or cost"
+    )
+
+    save_output: bool = Field(
+        default=False,
+        description="Whether to save each output to a file"
+    )
+
+    @field_validator('resume_text')
+    def validate_resume_text(cls, v):
+        """Validate text doesn't contain harmful content"""
+        return _clean_text(v)
+
+    @field_validator('job_descriptions')
+    def validate_job_descriptions(cls, v):
+        """Apply the single-request job description rules to every item"""
+        cleaned = []
+        for index, text in enumerate(v):
+            if not 50 <= len(text) <= 2000:
+                raise ValueError(
+                    f"Job description {index} must be between 50 and 2000 characters")
+            cleaned.append(_clean_text(text))
+        return cleaned
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "resume_text": "Enter your resume content here, ensuring it has at least 10 words to pass validation.",
+                "job_descriptions": [
+                    "Enter the first job description here, ensuring it has at least 10 words to pass validation.",
+                    "Enter the second job description here, ensuring it has at least 10 words to pass validation."
+                ],
+                "tone": "professional",
+                "save_output": False
+            }
+        }
+    }
+
+
+class JobRequest(TailorRequest):
+    """
+    Request model for queueing a tailoring job
+    """
+    callback_url: Optional[HttpUrl] = Field(
+        default=None,
+        description="URL to POST the job outcome to when it finishes"
+    )
+
+
+class ScoreRequest(BaseModel):
+    """
+    Request model for scoring a resume against a job description
+    """
+    resume_text: str = Field(
+        ...,
+        min_length=100,
+        max_length=5000,
+        description="The resume text to score"
+    )
+
+    job_description: str = Field(
+        ...,
+        min_length=50,
+        max_length=2000,
+        description="The job description to score against"
+    )
+
+    @field_validator('resume_text', 'job_description')
+    def validate_text_content(cls, v):
+        """Validate text doesn't contain harmful content"""
+        return _clean_text(v)
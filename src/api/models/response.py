@@ -1,7 +1,8 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime, timezone
-from .shared import StatusEnum
+from .errors import ErrorDetail
+from .shared import JobStatusEnum, StatusEnum
 
 
 class TailorResponse(BaseModel):
@@ -28,6 +29,114 @@ class TailorResponse(BaseModel):
     )
 
 
+class ScoreResponse(BaseModel):
+    """Response model for the score endpoint"""
+    status: StatusEnum = Field(
+        default=StatusEnum.SUCCESS,
+        description="The status of the request"
+    )
+    score: float = Field(
+        ...,
+        description="Match score from 0 to 100"
+    )
+    keyword_coverage: float = Field(
+        ...,
+        description="Weighted share of the job description's keywords the resume contains"
+    )
+    skill_coverage: float = Field(
+        ...,
+        description="Share of the job description's skills the resume names"
+    )
+    similarity: float = Field(
+        ...,
+        description="Cosine similarity of the TF-IDF vectors"
+    )
+    matched_keywords: List[str] = Field(default_factory=list)
+    missing_keywords: List[str] = Field(default_factory=list)
+    matched_skills: List[str] = Field(default_factory=list)
+    missing_skills: List[str] = Field(default_factory=list)
+    metadata: dict = Field(
+        default_factory=dict,
+        description="Metadata about the request"
+    )
+
+
+class BatchItemResult(BaseModel):
+    """Outcome of one job description in a batch"""
+    index: int = Field(
+        ...,
+        description="Position of the job description in the request"
+    )
+    status: StatusEnum = Field(
+        ...,
+        description="Whether this item succeeded"
+    )
+    tailored_resume: Optional[str] = Field(
+        None,
+        description="The tailored resume text"
+    )
+    saved_to: Optional[str] = Field(
+        None,
+        description="Path where the result was saved"
+    )
+    metadata: Optional[dict] = Field(
+        None,
+        description="Metadata about this item"
+    )
+    error: Optional[ErrorDetail] = Field(
+        None,
+        description="Why this item failed"
+    )
+
+
+class BatchTailorResponse(BaseModel):
+    """Response model for the batch tailor endpoints"""
+    status: StatusEnum = Field(
+        default=StatusEnum.SUCCESS,
+        description="The status of the request"
+    )
+    results: List[BatchItemResult] = Field(
+        ...,
+        description="Per-job-description results in request order"
+    )
+    metadata: dict = Field(
+        default_factory=dict,
+        description="Totals across the batch"
+    )
+
+
+class JobResponse(BaseModel):
+    """Status of a queued tailoring job"""
+    job_id: str = Field(
+        ...,
+        description="Identifier to poll with GET /jobs/{job_id}"
+    )
+    status: JobStatusEnum = Field(
+        ...,
+        description="Where the job is in its lifecycle"
+    )
+    attempts: int = Field(
+        0,
+        description="How many times a worker has picked the job up"
+    )
+    created_at: str = Field(
+        ...,
+        description="When the job was queued"
+    )
+    updated_at: str = Field(
+        ...,
+        description="When the job last changed"
+    )
+    result: Optional[TailorResponse] = Field(
+        None,
+        description="The tailoring result once the job has succeeded"
+    )
+    error: Optional[ErrorDetail] = Field(
+        None,
+        description="Why the job failed"
+    )
+
+
 class HealthResponse(BaseModel):
     """Health check response model"""
     status: str
@@ -40,3 +149,7 @@ class HealthResponse(BaseModel):
             "file_system": "ok"
         }
     )
+    openai_pool: Optional[dict] = Field(
+        default=None,
+        description="Upstream connection pool state and wait times"
+    )
@@ -10,6 +10,14 @@ class ToneEnum(str, Enum):
     ACADEMIC = "academic"
 
 
+class OptimizeForEnum(str, Enum):
+    """Routing hints: what to favour when choosing the model"""
+    BALANCED = "balanced"
+    QUALITY = "quality"
+    LATENCY = "latency"
+    COST = "cost"
+
+
 class StatusEnum(str, Enum):
     """API status values"""
     SUCCESS = "success"
@@ -17,6 +25,14 @@ class StatusEnum(str, Enum):
     PROCESSING = "processing"
 
 
+class JobStatusEnum(str, Enum):
+    """Lifecycle states of a queued tailoring job"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
 class ApiMetadata:
     """Metadata for API responses"""
     processing_time: float
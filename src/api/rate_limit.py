@@ -0,0 +1,166 @@
+"""
+Sharded token-bucket rate limiting for the API.
+
+Each client gets one bucket per rate-limit scope. Buckets live in a fixed
+number of shards keyed by hash of the client key, so a lookup touches a
+single small dict. All bucket updates happen synchronously on the event
+loop without any ``await``, which makes them atomic without a lock, and
+nothing is held while the downstream handler runs.
+"""
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """Bucket capacity and the period over which an empty bucket refills"""
+    limit: int
+    period: float = 60.0
+
+    @property
+    def rate(self) -> float:
+        """Tokens added per second"""
+        return self.limit / self.period
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    """Outcome of a single rate limit check"""
+    allowed: bool
+    rule: RateLimitRule
+    remaining: int
+    reset: int
+    retry_after: int = 0
+
+    def headers(self) -> Dict[str, str]:
+        """Standard ``RateLimit-*`` headers (plus ``Retry-After`` on rejection)"""
+        headers = {
+            "RateLimit-Limit": str(self.rule.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset),
+            "RateLimit-Policy": f"{self.rule.limit};w={int(self.rule.period)}",
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "rule")
+
+    def __init__(self, rule: RateLimitRule, now: float):
+        self.tokens = float(rule.limit)
+        self.updated = now
+        self.rule = rule
+
+
+class RateLimiter:
+    """Per-client token buckets with per-route rules and idle expiry"""
+
+    def __init__(self,
+                 default_rule: RateLimitRule,
+                 route_rules: Optional[Dict[str, Optional[RateLimitRule]]] = None,
+                 shards: int = 16,
+                 sweep_interval: float = 60.0):
+        """
+        Args:
+            default_rule: Rule applied to routes without an explicit entry
+            route_rules: Path -> rule overrides; a ``None`` rule exempts the path
+            shards: Number of bucket shards
+            sweep_interval: Seconds for the sweeper to visit every shard once
+        """
+        self.default_rule = default_rule
+        self.route_rules = dict(route_rules or {})
+        self._shards = [dict() for _ in range(max(1, shards))]
+        self._sweep_interval = sweep_interval
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def rule_for(self, path: str) -> Tuple[Optional[RateLimitRule], str]:
+        """Return the rule for a path and the scope its buckets are keyed by"""
+        if path in self.route_rules:
+            return self.route_rules[path], path
+        return self.default_rule, "*"
+
+    def hit(self, client_key: str, path: str) -> Optional[RateLimitDecision]:
+        """
+        Consume one token for ``client_key`` on ``path``.
+
+        Returns None when the path is exempt from rate limiting.
+        """
+        rule, scope = self.rule_for(path)
+        if rule is None:
+            return None
+
+        self._ensure_sweeper()
+
+        now = time.monotonic()
+        key = (client_key, scope)
+        shard = self._shards[hash(key) % len(self._shards)]
+        bucket = shard.get(key)
+        if bucket is None:
+            bucket = shard[key] = _Bucket(rule, now)
+        else:
+            bucket.tokens = min(
+                rule.limit, bucket.tokens + (now - bucket.updated) * rule.rate)
+            bucket.updated = now
+
+        allowed = bucket.tokens >= 1
+        if allowed:
+            bucket.tokens -= 1
+
+        missing = rule.limit - bucket.tokens
+        return RateLimitDecision(
+            allowed=allowed,
+            rule=rule,
+            remaining=int(bucket.tokens),
+            reset=math.ceil(missing / rule.rate),
+            retry_after=0 if allowed else math.ceil(
+                (1 - bucket.tokens) / rule.rate)
+        )
+
+    def bucket_count(self) -> int:
+        """Number of live buckets across all shards"""
+        return sum(len(shard) for shard in self._shards)
+
+    def sweep_shard(self, index: int, now: Optional[float] = None) -> int:
+        """Drop buckets in one shard that have refilled completely"""
+        now = time.monotonic() if now is None else now
+        shard = self._shards[index % len(self._shards)]
+        expired = [
+            key for key, bucket in shard.items()
+            if bucket.tokens + (now - bucket.updated) * bucket.rule.rate
+            >= bucket.rule.limit
+        ]
+        for key in expired:
+            del shard[key]
+        return len(expired)
+
+    def _ensure_sweeper(self):
+        loop = asyncio.get_running_loop()
+        if (self._sweeper is None or self._sweeper.done()
+                or self._sweeper.get_loop() is not loop):
+            self._sweeper = loop.create_task(self._sweep_loop())
+
+    async def _sweep_loop(self):
+        """Visit one shard per tick so no single pass walks the whole table"""
+        delay = self._sweep_interval / len(self._shards)
+        index = 0
+        while True:
+            await asyncio.sleep(delay)
+            self.sweep_shard(index)
+            index = (index + 1) % len(self._shards)
+
+    async def close(self):
+        """Stop the background sweeper"""
+        sweeper, self._sweeper = self._sweeper, None
+        if sweeper is None or sweeper.get_loop().is_closed():
+            return
+        sweeper.cancel()
+        if sweeper.get_loop() is asyncio.get_running_loop():
+            try:
+                await sweeper
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,48 @@
+import re
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.logger import set_request_context
+
+# Caller-supplied ids are echoed into logs and headers, so only accept
+# something that looks like an id
+_VALID_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+class RequestContextMiddleware:
+    """
+    Give every request a request id and a correlation id.
+
+    The correlation id is taken from an incoming ``X-Correlation-ID`` (or
+    ``X-Request-ID``) header so a call can be followed across services;
+    otherwise it is the new request id. Both are set in the logging
+    contextvars, on ``request.state``, and on the response headers.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        incoming = (headers.get(b"x-correlation-id")
+                    or headers.get(b"x-request-id") or b"").decode("latin-1")
+        request_id, correlation_id = set_request_context(
+            correlation_id=incoming if _VALID_ID.match(incoming) else None)
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+        state["correlation_id"] = correlation_id
+
+        async def send_with_ids(message: Message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [
+                    *message.get("headers", []),
+                    (b"x-request-id", request_id.encode("latin-1")),
+                    (b"x-correlation-id", correlation_id.encode("latin-1"))
+                ]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_ids)
@@ -0,0 +1,138 @@
+from typing import Callable, Optional
+
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+
+class _PartSizeCounter:
+    """Feeds a multipart body through a streaming parser, sizing each part"""
+
+    def __init__(self, boundary: bytes, max_part_bytes: int):
+        self.max_part_bytes = max_part_bytes
+        self.part_bytes = 0
+        self.too_large = False
+        self.parser: Optional[MultipartParser] = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._begin,
+            "on_part_data": self._data
+        })
+
+    def _begin(self):
+        self.part_bytes = 0
+
+    def _data(self, data: bytes, start: int, end: int):
+        self.part_bytes += end - start
+        if self.part_bytes > self.max_part_bytes:
+            self.too_large = True
+
+    def feed(self, chunk: bytes) -> bool:
+        """Count chunk; True once a part is over the cap"""
+        if self.parser is not None and chunk:
+            try:
+                self.parser.write(chunk)
+            except Exception:
+                # Malformed bodies are the form parser's to report
+                self.parser = None
+        return self.too_large
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Reject oversized request bodies with a 413.
+
+    Multipart bodies are capped at ``max_body_bytes`` in all and at
+    ``max_part_bytes`` per part (one uploaded file), counted by a streaming
+    multipart parser as the body arrives, so an oversized file is refused
+    before Starlette buffers it. Every other body is capped at
+    ``max_request_bytes``.
+
+    A declared Content-Length over the limit is refused before any of the
+    body is read. Bodies without one (chunked uploads) are counted as they
+    stream in; the moment a limit is passed the 413 is sent and the app
+    sees the client disconnect. Written as plain ASGI because
+    BaseHTTPMiddleware cannot intercept the body stream.
+
+    The limits are callables, read per request, so they follow the live
+    ApiConfig.
+    """
+
+    def __init__(self, app: ASGIApp,
+                 max_request_bytes: Callable[[], int],
+                 max_body_bytes: Callable[[], int],
+                 max_part_bytes: Callable[[], int],
+                 too_large: Callable[[str], Response]):
+        self.app = app
+        self.max_request_bytes = max_request_bytes
+        self.max_body_bytes = max_body_bytes
+        self.max_part_bytes = max_part_bytes
+        self.too_large = too_large
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_type, options = parse_options_header(headers.get(b"content-type", b""))
+        counter = None
+        if content_type == b"multipart/form-data":
+            max_bytes = self.max_body_bytes()
+            if options.get(b"boundary"):
+                counter = _PartSizeCounter(options[b"boundary"], self.max_part_bytes())
+        else:
+            max_bytes = self.max_request_bytes()
+
+        declared = headers.get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > max_bytes:
+            await self.too_large(f"Request body is larger than {max_bytes} bytes")(
+                scope, receive, send)
+            return
+
+        received = 0
+        rejected = False
+        answered = False
+        response_started = False
+
+        async def reject(message: str):
+            nonlocal rejected, answered
+            rejected = True
+            if not response_started:
+                answered = True
+                await self.too_large(message)(scope, receive, send)
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                received += len(body)
+                if received > max_bytes:
+                    await reject(f"Request body is larger than {max_bytes} bytes")
+                    return {"type": "http.disconnect"}
+                if counter is not None and counter.feed(body):
+                    await reject(f"An uploaded file is larger than the "
+                                 f"{counter.max_part_bytes} byte upload limit")
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message: Message):
+            nonlocal response_started
+            if answered:
+                # The 413 has already been sent
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            # The app failing on the disconnect it was handed is expected
+            if not answered:
+                raise
@@ -0,0 +1,47 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.metrics import IN_FLIGHT, REQUEST_LATENCY, REQUESTS
+
+
+class RequestMetricsMiddleware:
+    """
+    Count requests and time them per route.
+
+    Latency runs until the last body chunk is sent, so streamed responses
+    are timed in full rather than up to their headers. Requests are
+    labelled with the route's path template (``/jobs/{job_id}``), never the
+    raw path, to keep label cardinality bounded. Written as plain ASGI for
+    the same reason as RequestSizeLimitMiddleware: BaseHTTPMiddleware
+    returns before a streamed body has been sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def timed_send(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            IN_FLIGHT.dec()
+            # The router records the matched route in the scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            REQUEST_LATENCY.observe(time.perf_counter() - started,
+                                    route=route, method=method)
+            REQUESTS.inc(route=route, method=method, status=str(status))
@@ -0,0 +1,33 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.timing import start_timer
+
+
+class ServerTimingMiddleware:
+    """
+    Time each request's stages and report them in a Server-Timing header.
+
+    Starts a StageTimer that code further down records into through
+    ``utils.timing.stage``. The header is written when the response starts,
+    so a streamed response reports only the stages finished before its
+    first byte; its final event carries the full breakdown in metadata.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timer = start_timer()
+
+        async def timed_send(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timer.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, timed_send)
@@ -1,6 +1,7 @@
 """
 Configuration package initialization
 """
+from .settings import Settings, configure_tokenizer, get_settings
 from .production import ProductionSettings
 
-__all__ = ["ProductionSettings"]
+__all__ = ["ProductionSettings", "Settings", "configure_tokenizer", "get_settings"]
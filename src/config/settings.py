@@ -0,0 +1,267 @@
+"""
+Application settings, read from the environment once per process
+"""
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Mapping, Optional, Tuple
+
+ROOT_DIR = Path(__file__).parent.parent.parent
+DATA_DIR = ROOT_DIR / "data"
+
+
+def _bool(env: Mapping[str, str], name: str, default: str) -> bool:
+    return env.get(name, default).lower() == "true"
+
+
+def _list(env: Mapping[str, str], name: str) -> Tuple[str, ...]:
+    return tuple(item.strip() for item in env.get(name, "").split(",") if item.strip())
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Immutable snapshot of every setting the app reads.
+
+    Built from the environment by ``from_env``; use ``get_settings()`` for
+    the process-wide snapshot rather than reading ``os.environ`` directly.
+    """
+
+    # Required environment variables (GPT_SECRET_KEY is the legacy name)
+    OPENAI_API_KEY: str
+
+    # Optional with defaults
+    MODEL_NAME: str
+    MAX_TOKENS: int
+    # Token budgeting: smallest completion worth requesting, and whether an
+    # over-long input is rejected or trimmed to fit ("reject" / "trim")
+    MIN_OUTPUT_TOKENS: int
+    TOKEN_OVERFLOW: str
+    # Prompt compaction: normalize and de-duplicate input, then drop the
+    # resume bullets least relevant to the JD until the prompt fits
+    # PROMPT_TOKEN_BUDGET (0 never drops bullets)
+    COMPACTION_ENABLED: bool
+    PROMPT_TOKEN_BUDGET: int
+    TOKENIZER_DIR: str
+    TEMPERATURE: float
+    LOG_LEVEL: str
+    # Logging: "text" or "json" lines, written by a background thread.
+    # Request payload logs are sampled: LOG_PAYLOAD_SAMPLE_RATE of them, at
+    # most LOG_PAYLOAD_MAX_PER_SECOND per worker (0: no cap)
+    LOG_DIR: str
+    LOG_FORMAT: str
+    LOG_PAYLOAD_SAMPLE_RATE: float
+    LOG_PAYLOAD_MAX_PER_SECOND: float
+
+    # Upstream connection pool, shared by every request in a worker; size
+    # it to the concurrency a worker can generate (batches, job workers)
+    OPENAI_MAX_CONNECTIONS: int
+    OPENAI_MAX_KEEPALIVE: int
+    OPENAI_KEEPALIVE_EXPIRY: float
+    OPENAI_HTTP2: bool
+    OPENAI_CONNECT_TIMEOUT: float
+    OPENAI_READ_TIMEOUT: float
+    OPENAI_POOL_TIMEOUT: float
+
+    # Retries of retryable OpenAI errors; a server-requested wait longer
+    # than OPENAI_RETRY_MAX_DELAY fails the request instead
+    OPENAI_MAX_RETRIES: int
+    OPENAI_RETRY_MAX_DELAY: float
+    # Circuit breaker: open after this many upstream failures in a row,
+    # probe again after CIRCUIT_RESET_TIMEOUT seconds
+    CIRCUIT_FAILURE_THRESHOLD: int
+    CIRCUIT_RESET_TIMEOUT: float
+
+    # Model routing: MODEL_NAME is the primary model and ROUTER_MODELS adds
+    # candidates (all priced in resume_tailor.tailor.PRICING). FALLBACK_MODEL
+    # takes over when the chosen model times out or its circuit is open
+    # (empty: no fallback). Prompts up to ROUTER_SHORT_PROMPT_TOKENS go to
+    # the cheapest candidate; longer ones to the best candidate whose p95
+    # latency meets ROUTER_P95_TARGET_MS (0: no target). A non-zero
+    # ROUTER_BUDGET_USD caps spend per ROUTER_BUDGET_PERIOD seconds per worker
+    ROUTER_MODELS: Tuple[str, ...]
+    FALLBACK_MODEL: str
+    ROUTER_SHORT_PROMPT_TOKENS: int
+    ROUTER_P95_TARGET_MS: float
+    ROUTER_BUDGET_USD: float
+    ROUTER_BUDGET_PERIOD: float
+
+    # Metrics: each worker writes a snapshot to METRICS_DIR every
+    # METRICS_FLUSH_INTERVAL seconds and /metrics merges them all (empty:
+    # this worker's metrics only). Clear the directory before starting the
+    # workers
+    METRICS_DIR: str
+    METRICS_FLUSH_INTERVAL: float
+
+    # Result cache (memory LRU per worker, SQLite file shared by all workers)
+    RESULT_CACHE_ENABLED: bool
+    RESULT_CACHE_TTL: int
+    RESULT_CACHE_MEMORY_ENTRIES: int
+    RESULT_CACHE_MAX_BYTES: int
+    CACHE_DIR: str
+    # Concurrent identical requests in a worker share one OpenAI call
+    COALESCE_ENABLED: bool
+    # Reuse the cached result of a nearly identical job description for the
+    # same resume (MinHash estimate of Jaccard similarity, per worker)
+    NEAR_DUPLICATE_ENABLED: bool
+    NEAR_DUPLICATE_THRESHOLD: float
+    NEAR_DUPLICATE_MAX_ENTRIES: int
+    # Score each tailoring's keyword coverage before and after, locally
+    ATS_SCORE_ENABLED: bool
+
+    # Default rate limit per client (ApiConfig.rate_limit_routes overrides
+    # it per route)
+    RATE_LIMIT_REQUESTS: int
+    RATE_LIMIT_PERIOD: int
+
+    # Batch tailoring
+    BATCH_CONCURRENCY: int
+
+    # Job queue (SQLite-backed, drained by async workers in every process)
+    JOB_WORKERS: int
+    JOB_POLL_INTERVAL: float
+    JOB_LEASE_SECONDS: int
+    JOB_MAX_ATTEMPTS: int
+    JOB_RETENTION: int
+    JOBS_DB: str
+    # Hosts job callbacks may be sent to (empty: any public https host)
+    JOB_CALLBACK_ALLOWED_HOSTS: Tuple[str, ...]
+
+    # Saved resumes (0 disables the file count / age limit)
+    OUTPUT_DIR: str
+    OUTPUT_COMPRESS: bool
+    OUTPUT_MAX_FILES: int
+    OUTPUT_MAX_AGE: int
+
+    # Document extraction (0 workers parses in a thread instead of a process)
+    EXTRACTION_WORKERS: int
+    EXTRACTION_TIMEOUT: float
+    EXTRACTION_MAX_PAGES: int
+    # PDF pages per worker task, and the text length after which extraction
+    # stops reading further pages (0 reads every page)
+    EXTRACTION_PAGES_PER_TASK: int
+    EXTRACTION_MAX_CHARS: int
+    EXTRACTION_CACHE_ENABLED: bool
+    EXTRACTION_CACHE_MAX_BYTES: int
+
+    # Render-specific
+    PORT: int
+    RENDER: bool
+    ENV: str
+
+    # Security
+    ALLOWED_HOSTS: Tuple[str, ...]
+
+    @classmethod
+    def from_env(cls, env: Optional[Mapping[str, str]] = None) -> "Settings":
+        """Parse settings from env (default os.environ)"""
+        env = os.environ if env is None else env
+        return cls(
+            OPENAI_API_KEY=env.get("OPENAI_API_KEY") or env.get("GPT_SECRET_KEY", ""),
+            MODEL_NAME=env.get("MODEL_NAME", "gpt-4"),
+            MAX_TOKENS=int(env.get("MAX_TOKENS", "2000")),
+            MIN_OUTPUT_TOKENS=int(env.get("MIN_OUTPUT_TOKENS", "512")),
+            TOKEN_OVERFLOW=env.get("TOKEN_OVERFLOW", "reject").lower(),
+            COMPACTION_ENABLED=_bool(env, "COMPACTION_ENABLED", "true"),
+            PROMPT_TOKEN_BUDGET=int(env.get("PROMPT_TOKEN_BUDGET", "3000")),
+            TOKENIZER_DIR=env.get("TIKTOKEN_CACHE_DIR", str(DATA_DIR / "tokenizer")),
+            TEMPERATURE=float(env.get("TEMPERATURE", "0.7")),
+            LOG_LEVEL=env.get("LOG_LEVEL", "INFO"),
+            LOG_DIR=env.get("LOG_DIR", str(ROOT_DIR / "logs")),
+            LOG_FORMAT=env.get("LOG_FORMAT", "text").lower(),
+            LOG_PAYLOAD_SAMPLE_RATE=float(env.get("LOG_PAYLOAD_SAMPLE_RATE", "1.0")),
+            LOG_PAYLOAD_MAX_PER_SECOND=float(env.get("LOG_PAYLOAD_MAX_PER_SECOND", "10")),
+            OPENAI_MAX_CONNECTIONS=int(env.get("OPENAI_MAX_CONNECTIONS", "20")),
+            OPENAI_MAX_KEEPALIVE=int(env.get("OPENAI_MAX_KEEPALIVE", "10")),
+            OPENAI_KEEPALIVE_EXPIRY=float(env.get("OPENAI_KEEPALIVE_EXPIRY", "30")),
+            OPENAI_HTTP2=_bool(env, "OPENAI_HTTP2", "true"),
+            OPENAI_CONNECT_TIMEOUT=float(env.get("OPENAI_CONNECT_TIMEOUT", "5")),
+            OPENAI_READ_TIMEOUT=float(env.get("OPENAI_READ_TIMEOUT", "120")),
+            OPENAI_POOL_TIMEOUT=float(env.get("OPENAI_POOL_TIMEOUT", "10")),
+            OPENAI_MAX_RETRIES=int(env.get("OPENAI_MAX_RETRIES", "3")),
+            OPENAI_RETRY_MAX_DELAY=float(env.get("OPENAI_RETRY_MAX_DELAY", "20")),
+            CIRCUIT_FAILURE_THRESHOLD=int(env.get("CIRCUIT_FAILURE_THRESHOLD", "5")),
+            CIRCUIT_RESET_TIMEOUT=float(env.get("CIRCUIT_RESET_TIMEOUT", "30")),
+            ROUTER_MODELS=_list(env, "ROUTER_MODELS"),
+            FALLBACK_MODEL=env.get("FALLBACK_MODEL", "gpt-4o-mini"),
+            ROUTER_SHORT_PROMPT_TOKENS=int(env.get("ROUTER_SHORT_PROMPT_TOKENS", "1500")),
+            ROUTER_P95_TARGET_MS=float(env.get("ROUTER_P95_TARGET_MS", "0")),
+            ROUTER_BUDGET_USD=float(env.get("ROUTER_BUDGET_USD", "0")),
+            ROUTER_BUDGET_PERIOD=float(env.get("ROUTER_BUDGET_PERIOD", "3600")),
+            METRICS_DIR=env.get("METRICS_DIR", str(DATA_DIR / "metrics")),
+            METRICS_FLUSH_INTERVAL=float(env.get("METRICS_FLUSH_INTERVAL", "5")),
+            RESULT_CACHE_ENABLED=_bool(env, "RESULT_CACHE_ENABLED", "true"),
+            RESULT_CACHE_TTL=int(env.get("RESULT_CACHE_TTL", "86400")),
+            RESULT_CACHE_MEMORY_ENTRIES=int(env.get("RESULT_CACHE_MEMORY_ENTRIES", "256")),
+            RESULT_CACHE_MAX_BYTES=int(env.get("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            CACHE_DIR=env.get("CACHE_DIR", str(DATA_DIR / "cache")),
+            COALESCE_ENABLED=_bool(env, "COALESCE_ENABLED", "true"),
+            NEAR_DUPLICATE_ENABLED=_bool(env, "NEAR_DUPLICATE_ENABLED", "true"),
+            NEAR_DUPLICATE_THRESHOLD=float(env.get("NEAR_DUPLICATE_THRESHOLD", "0.9")),
+            NEAR_DUPLICATE_MAX_ENTRIES=int(env.get("NEAR_DUPLICATE_MAX_ENTRIES", "5000")),
+            ATS_SCORE_ENABLED=_bool(env, "ATS_SCORE_ENABLED", "true"),
+            RATE_LIMIT_REQUESTS=int(env.get("RATE_LIMIT_REQUESTS", "60")),
+            RATE_LIMIT_PERIOD=int(env.get("RATE_LIMIT_PERIOD", "60")),
+            BATCH_CONCURRENCY=int(env.get("BATCH_CONCURRENCY", "5")),
+            JOB_WORKERS=int(env.get("JOB_WORKERS", "2")),
+            JOB_POLL_INTERVAL=float(env.get("JOB_POLL_INTERVAL", "2.0")),
+            JOB_LEASE_SECONDS=int(env.get("JOB_LEASE_SECONDS", "300")),
+            JOB_MAX_ATTEMPTS=int(env.get("JOB_MAX_ATTEMPTS", "3")),
+            JOB_RETENTION=int(env.get("JOB_RETENTION", str(7 * 24 * 3600))),
+            JOB_CALLBACK_ALLOWED_HOSTS=_list(env, "JOB_CALLBACK_ALLOWED_HOSTS"),
+            JOBS_DB=env.get("JOBS_DB", str(DATA_DIR / "jobs" / "jobs.sqlite3")),
+            OUTPUT_DIR=env.get("OUTPUT_DIR", str(DATA_DIR / "output")),
+            OUTPUT_COMPRESS=_bool(env, "OUTPUT_COMPRESS", "false"),
+            OUTPUT_MAX_FILES=int(env.get("OUTPUT_MAX_FILES", "1000")),
+            OUTPUT_MAX_AGE=int(env.get("OUTPUT_MAX_AGE", str(30 * 24 * 3600))),
+            EXTRACTION_WORKERS=int(env.get("EXTRACTION_WORKERS", "2")),
+            EXTRACTION_TIMEOUT=float(env.get("EXTRACTION_TIMEOUT", "30")),
+            EXTRACTION_MAX_PAGES=int(env.get("EXTRACTION_MAX_PAGES", "50")),
+            EXTRACTION_PAGES_PER_TASK=int(env.get("EXTRACTION_PAGES_PER_TASK", "8")),
+            EXTRACTION_MAX_CHARS=int(env.get("EXTRACTION_MAX_CHARS", "100000")),
+            EXTRACTION_CACHE_ENABLED=_bool(env, "EXTRACTION_CACHE_ENABLED", "true"),
+            EXTRACTION_CACHE_MAX_BYTES=int(
+                env.get("EXTRACTION_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            PORT=int(env.get("PORT", "8000")),
+            RENDER=_bool(env, "RENDER", ""),
+            ENV=env.get("ENV", ""),
+            ALLOWED_HOSTS=_list(env, "ALLOWED_HOSTS"),
+        )
+
+    def validate(self) -> bool:
+        """Validate required settings"""
+        if not self.OPENAI_API_KEY:
+            raise ValueError("OPENAI_API_KEY environment variable is required")
+
+        if not self.OPENAI_API_KEY.startswith("sk-"):
+            raise ValueError("Invalid OpenAI API key format")
+
+        return True
+
+    def is_production(self) -> bool:
+        """Check if running in production environment"""
+        return self.RENDER or self.ENV == "production"
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """
+    The process-wide settings snapshot, read on first call.
+
+    Picks up .env (local development) first; real environment variables
+    still take precedence.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv(ROOT_DIR / ".env")
+    return Settings.from_env()
+
+
+def configure_tokenizer(settings: Settings):
+    """
+    Point tiktoken at the configured BPE files. tiktoken reads its cache
+    location only from the environment, so entry points call this once at
+    start-up, before any tokens are counted; library code never does.
+    """
+    os.environ["TIKTOKEN_CACHE_DIR"] = settings.TOKENIZER_DIR
@@ -3,6 +3,7 @@ import click
 from pathlib import Path
 from resume_tailor import ResumeTailor
 from services import ResumeService  # Use the same service
+from config import configure_tokenizer, get_settings
 import os
 
 
@@ -14,6 +15,7 @@ import os
               default='professional')
 async def main(resume, job, tone):
     """Resume tailoring tool."""
+    configure_tokenizer(get_settings())
     # Use the same service layer as API
     service = ResumeService()
 
@@ -1,3 +1,9 @@
-from .tailor import ResumeTailor
-
 __all__ = ['ResumeTailor']
+
+
+def __getattr__(name):
+    # Importing the tailor loads the OpenAI SDK; only pay for it when used
+    if name == 'ResumeTailor':
+        from .tailor import ResumeTailor
+        return ResumeTailor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
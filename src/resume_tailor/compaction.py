@@ -0,0 +1,157 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+# Lines starting with one of these are bullets, whatever their length
+BULLET_MARKERS = ("-", "*", "•", "·", "▪", "‣", "–", "—")
+
+# Shorter non-bullet lines are headings, titles, dates or contact details
+# and are always kept
+MIN_DROPPABLE_WORDS = 8
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our that
+the their this to was we were will with you your
+""".split())
+
+_SPACES = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+_TERM = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+
+@dataclass
+class Compaction:
+    """Compacted prompt inputs and what compaction removed"""
+    resume_text: str
+    job_description: str
+    lines_deduplicated: int = 0
+    lines_dropped: int = 0
+    tokens_saved: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "tokens_saved": self.tokens_saved,
+            "lines_deduplicated": self.lines_deduplicated,
+            "lines_dropped": self.lines_dropped
+        }
+
+
+def normalize(text: str) -> str:
+    """NFC-normalize, collapse runs of spaces and blank lines, strip each line"""
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    lines = [_SPACES.sub(" ", line).strip() for line in text.split("\n")]
+    out = []
+    for line in lines:
+        if line or (out and out[-1]):
+            out.append(line)
+    return "\n".join(out).strip()
+
+
+def dedupe_lines(lines: List[str]) -> List[str]:
+    """Drop repeats of a non-empty line, ignoring case and spacing"""
+    seen = set()
+    out = []
+    for line in lines:
+        key = " ".join(line.lower().split())
+        if key:
+            if key in seen:
+                continue
+            seen.add(key)
+        out.append(line)
+    return out
+
+
+def terms(text: str) -> List[str]:
+    """Lower-cased search terms; keeps tokens like c++, c# and node.js"""
+    return [t for t in _TERM.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25:
+    """Okapi BM25 over a small in-memory corpus"""
+
+    def __init__(self, documents: List[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.frequencies = [Counter(doc) for doc in documents]
+        self.lengths = [len(doc) for doc in documents]
+        self.average_length = sum(self.lengths) / len(documents) if documents else 0.0
+        containing: Dict[str, int] = Counter(
+            term for doc in documents for term in set(doc))
+        n = len(documents)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+                    for term, df in containing.items()}
+
+    def score(self, index: int, query: List[str]) -> float:
+        frequencies = self.frequencies[index]
+        norm = self.k1 * (1 - self.b + self.b * self.lengths[index]
+                          / (self.average_length or 1))
+        total = 0.0
+        for term in set(query):
+            tf = frequencies.get(term)
+            if tf:
+                total += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+        return total
+
+
+def is_droppable(line: str) -> bool:
+    """Bullets and long lines can go; headings and short facts stay"""
+    return line.startswith(BULLET_MARKERS) or len(line.split()) >= MIN_DROPPABLE_WORDS
+
+
+def compact(resume_text: str, job_description: str,
+            count: Callable[[str], int],
+            resume_budget: Optional[int] = None) -> Compaction:
+    """
+    Shrink the resume and job description before they go into a prompt.
+
+    Both are normalized and de-duplicated line by line. If the resume still
+    needs more than ``resume_budget`` tokens, its bullets are ranked against
+    the job description with BM25 and the least relevant are dropped until
+    it fits or no droppable lines remain. Headings and other short lines are
+    never dropped, and the kept lines stay in their original order.
+
+    Args:
+        count: Token counter for the target model
+        resume_budget: Tokens the resume may use (None: no dropping)
+    """
+    job_lines = normalize(job_description).split("\n")
+    resume_lines = normalize(resume_text).split("\n")
+    deduped_job = dedupe_lines(job_lines)
+    deduped_resume = dedupe_lines(resume_lines)
+    result = Compaction(
+        resume_text="\n".join(deduped_resume),
+        job_description="\n".join(deduped_job),
+        lines_deduplicated=(len(job_lines) - len(deduped_job)
+                            + len(resume_lines) - len(deduped_resume))
+    )
+    if resume_budget is None:
+        return result
+
+    excess = count(result.resume_text) - max(resume_budget, 0)
+    if excess <= 0:
+        return result
+
+    candidates = [i for i, line in enumerate(deduped_resume) if is_droppable(line)]
+    if not candidates:
+        return result
+    ranker = BM25([terms(deduped_resume[i]) for i in candidates])
+    query = terms(result.job_description)
+    # Least relevant first; among equals, later (usually older) lines first
+    ranked = sorted(range(len(candidates)),
+                    key=lambda c: (ranker.score(c, query), -c))
+
+    dropped = set()
+    for c in ranked:
+        if excess <= 0:
+            break
+        index = candidates[c]
+        dropped.add(index)
+        # Each line also costs roughly one token for its newline
+        excess -= count(deduped_resume[index]) + 1
+
+    result.resume_text = "\n".join(
+        line for i, line in enumerate(deduped_resume) if i not in dropped)
+    result.lines_dropped = len(dropped)
+    return result
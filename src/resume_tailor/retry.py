@@ -0,0 +1,226 @@
+import asyncio
+import random
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, Tuple, TypeVar
+
+from utils.timing import stage
+
+T = TypeVar("T")
+
+# Statuses worth another attempt: timeouts, conflicts, rate limits, server errors
+RETRYABLE_STATUSES = {408, 409, 429}
+
+# Rate-limit headers, most precise first
+_RESET_HEADERS = ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling OpenAI while the circuit breaker is open"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = max(1, int(retry_after + 0.999))
+        super().__init__(
+            f"OpenAI is failing; not sending requests for {self.retry_after}s")
+
+
+def openai_error_type() -> type:
+    """openai.OpenAIError; the SDK is imported on first use, not at start-up"""
+    import openai
+
+    return openai.OpenAIError
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an OpenAI error could succeed if the same request is sent again"""
+    import openai
+
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.RateLimitError):
+        # Out of credit is a 429 too, but waiting won't fix it
+        return getattr(error, "code", None) != "insufficient_quota"
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUSES or error.status_code >= 500
+    return False
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse durations like '20ms', '1.5s' or '6m0s'"""
+    parts = _DURATION.findall(value)
+    if not parts or "".join(n + u for n, u in parts) != value.strip():
+        return None
+    return sum(float(n) * _UNIT_SECONDS[u] for n, u in parts)
+
+
+def server_retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait, if it said"""
+    import openai
+
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    if "retry-after" in headers:
+        value = headers["retry-after"]
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    if isinstance(error, openai.RateLimitError):
+        resets = [_parse_duration(headers[name])
+                  for name in _RESET_HEADERS if name in headers]
+        resets = [reset for reset in resets if reset is not None]
+        if resets:
+            return max(resets)
+    return None
+
+
+class RetryPolicy:
+    """
+    Retries retryable OpenAI errors with full-jitter exponential backoff.
+
+    A wait the server asks for (Retry-After, retry-after-ms or the rate
+    limit reset headers) is used instead of the backoff. If that wait is
+    longer than ``max_delay`` the error is raised at once rather than
+    holding the request. Without ``retry_timeouts``, a timeout is raised
+    at once too, for callers with somewhere faster to go.
+    """
+
+    def __init__(self, max_retries: int = 3, initial_delay: float = 0.5,
+                 max_delay: float = 20.0, retry_timeouts: bool = True):
+        self.max_retries = max_retries
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.retry_timeouts = retry_timeouts
+
+    def without_timeouts(self) -> "RetryPolicy":
+        """This policy, except that timeouts are not retried"""
+        return RetryPolicy(self.max_retries, self.initial_delay, self.max_delay,
+                           retry_timeouts=False)
+
+    def delay(self, retry: int, error: Exception) -> Optional[float]:
+        """Seconds to wait before retry number ``retry`` (1-based), or None to give up"""
+        import openai
+
+        if retry > self.max_retries or not is_retryable(error):
+            return None
+        if not self.retry_timeouts and isinstance(error, openai.APITimeoutError):
+            return None
+        hinted = server_retry_after(error)
+        if hinted is not None:
+            return hinted if hinted <= self.max_delay else None
+        backoff = min(self.max_delay, self.initial_delay * (2 ** (retry - 1)))
+        return random.uniform(0, backoff)
+
+
+class CircuitBreaker:
+    """
+    Stops calling OpenAI after ``failure_threshold`` upstream failures in a row.
+
+    While open, calls fail immediately with CircuitOpenError. After
+    ``reset_timeout`` seconds one probe call is let through (half-open): its
+    success closes the circuit, its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go out now"""
+        if self.state == self.CLOSED:
+            return
+        remaining = self.opened_at + self.reset_timeout - time.monotonic()
+        if self.state == self.OPEN and remaining <= 0:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        raise CircuitOpenError(max(remaining, 1.0))
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def release(self):
+        """The call ended without telling us anything; allow another probe"""
+        self._probing = False
+
+    def record_failure(self):
+        self._probing = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+async def call_with_retries(func: Callable[..., Awaitable[T]],
+                            policy: RetryPolicy,
+                            breaker: Optional[CircuitBreaker] = None,
+                            **kwargs) -> Tuple[T, int]:
+    """
+    Await func(**kwargs) under the retry policy and circuit breaker.
+
+    Only retryable errors count against the breaker; a 400 or an auth
+    failure says nothing about OpenAI's health. Time spent waiting between
+    attempts is recorded as the "retry_wait" stage.
+
+    Returns:
+        The result and the number of retries it took
+
+    Raises:
+        CircuitOpenError: If the breaker is open
+    """
+    retries = 0
+    while True:
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = await func(**kwargs)
+        except Exception as e:
+            if breaker is not None:
+                import openai
+
+                if is_retryable(e):
+                    breaker.record_failure()
+                elif isinstance(e, openai.APIStatusError):
+                    # OpenAI answered, so it is up; the request was the problem
+                    breaker.record_success()
+                else:
+                    breaker.release()
+            wait = policy.delay(retries + 1, e)
+            if wait is None:
+                raise
+            retries += 1
+            with stage("retry_wait"):
+                await asyncio.sleep(wait)
+            continue
+        except BaseException:
+            if breaker is not None:
+                breaker.release()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        return result, retries
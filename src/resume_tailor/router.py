@@ -0,0 +1,223 @@
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .tokens import context_window, lookup_model
+
+# Relative output quality per model family (higher is better), matched by
+# longest prefix
+QUALITY = {
+    "gpt-4": 3,
+    "gpt-4-32k": 3,
+    "gpt-4-turbo": 3,
+    "gpt-4o": 3,
+    "gpt-4o-mini": 2,
+    "gpt-3.5-turbo": 1,
+}
+DEFAULT_QUALITY = 1
+
+# Per-request routing hints
+OPTIMIZE_FOR = ("balanced", "quality", "latency", "cost")
+
+# Below this share of the spend budget left, balanced routing picks the
+# cheapest model
+LOW_BUDGET_RATIO = 0.2
+
+
+class LatencyWindow:
+    """The most recent call durations for one model"""
+
+    def __init__(self, size: int = 200):
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[math.ceil(len(ordered) * 0.95) - 1]
+
+
+class SpendBudget:
+    """OpenAI spend allowed per rolling period, tracked per worker"""
+
+    def __init__(self, limit_usd: float, period: float = 3600.0):
+        self.limit_usd = limit_usd
+        self.period = period
+        self._spent: Deque[Tuple[float, float]] = deque()
+
+    def spend(self, cost_usd: float):
+        self._spent.append((time.monotonic(), cost_usd))
+
+    def remaining(self) -> float:
+        cutoff = time.monotonic() - self.period
+        while self._spent and self._spent[0][0] < cutoff:
+            self._spent.popleft()
+        return max(0.0, self.limit_usd - sum(cost for _, cost in self._spent))
+
+
+@dataclass
+class Route:
+    """Model chosen for one request, reported in response metadata"""
+    model: str
+    fallback: Optional[str]
+    optimize_for: str
+    reason: str
+    estimated_cost_usd: float
+    p95_ms: Optional[float] = None
+    fallback_used: bool = False
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class ModelRouter:
+    """
+    Chooses the model for each request among the priced candidates.
+
+    Candidates that cannot fit the prompt in their context window, or whose
+    estimated cost exceeds the spend budget left, are skipped. Among the
+    rest, the hint decides: "quality" takes the best model, "latency" the
+    lowest observed p95, "cost" the cheapest. "balanced" sends short
+    prompts to the cheapest model and longer ones to the best model that
+    meets the p95 target, and turns to cost once the budget runs low.
+    Models without latency samples yet count as fast, so they get tried.
+    Streamed requests are routed on time to first token, kept in windows
+    of its own, since their full duration is generation time.
+
+    The first candidate is the primary model, used when nothing fits.
+    """
+
+    def __init__(self,
+                 models: List[str],
+                 price: Callable[[str, int, int], float],
+                 fallback: Optional[str] = None,
+                 short_prompt_tokens: int = 1500,
+                 latency_target: float = 0.0,
+                 budget: Optional[SpendBudget] = None,
+                 window: int = 200):
+        """
+        Args:
+            models: Candidate models, primary first
+            price: Cost in USD of (model, input_tokens, output_tokens)
+            fallback: Model to retry on when the chosen one times out or
+                its circuit is open
+            latency_target: p95 seconds a model must meet in balanced
+                routing (0: no target)
+        """
+        self.models = list(dict.fromkeys(models))
+        self.price = price
+        self.fallback = fallback or None
+        self.short_prompt_tokens = short_prompt_tokens
+        self.latency_target = latency_target
+        self.budget = budget
+        self._latency: Dict[str, LatencyWindow] = {}
+        self._first_token: Dict[str, LatencyWindow] = {}
+        self._window = window
+
+    def record(self, model: str, seconds: float, first_token: bool = False):
+        """Record how long a call to model took, or a stream took to start"""
+        windows = self._first_token if first_token else self._latency
+        if model not in windows:
+            windows[model] = LatencyWindow(self._window)
+        windows[model].record(seconds)
+
+    def record_cost(self, cost_usd: float):
+        if self.budget is not None:
+            self.budget.spend(cost_usd)
+
+    def p95(self, model: str, first_token: bool = False) -> Optional[float]:
+        window = (self._first_token if first_token else self._latency).get(model)
+        return window.p95() if window else None
+
+    def route(self, prompt_tokens: int, output_tokens: int,
+              min_output_tokens: int = 0,
+              optimize_for: Optional[str] = None,
+              streaming: bool = False) -> Route:
+        """
+        Pick a model for a prompt of prompt_tokens expected to produce
+        about output_tokens. With streaming, latency means time to first
+        token.
+
+        Raises:
+            ValueError: If optimize_for is not a known hint
+        """
+        hint = str(getattr(optimize_for, "value", optimize_for) or "balanced").lower()
+        if hint not in OPTIMIZE_FOR:
+            raise ValueError(
+                f"Unknown optimize_for '{hint}'. Use one of: {', '.join(OPTIMIZE_FOR)}")
+
+        cost = {model: self.price(model, prompt_tokens, output_tokens)
+                for model in self.models}
+        fits = [model for model in self.models
+                if prompt_tokens + min_output_tokens <= context_window(model)]
+        if not fits:
+            return self._route(self.models[0], [], hint, "no_model_fits", cost, streaming)
+
+        mode, reason = hint, hint
+        if self.budget is not None:
+            remaining = self.budget.remaining()
+            affordable = [model for model in fits if cost[model] <= remaining]
+            if not affordable:
+                cheapest = min(fits, key=lambda model: cost[model])
+                return self._route(cheapest, fits, hint, "budget_exhausted", cost,
+                                   streaming)
+            fits = affordable
+            if hint == "balanced" and remaining < self.budget.limit_usd * LOW_BUDGET_RATIO:
+                mode, reason = "cost", "budget_low"
+
+        if mode == "balanced":
+            if prompt_tokens <= self.short_prompt_tokens:
+                mode, reason = "cost", "short_prompt"
+            else:
+                mode, reason = "quality", "long_prompt"
+                if self.latency_target:
+                    fast = [model for model in fits
+                            if (self.p95(model, streaming) or 0.0) <= self.latency_target]
+                    if fast and len(fast) < len(fits):
+                        fits, reason = fast, "latency_target"
+
+        ranked = sorted(fits, key=lambda model: self._rank(model, mode, cost[model], streaming))
+        return self._route(ranked[0], ranked, hint, reason, cost, streaming)
+
+    def _rank(self, model: str, mode: str, cost: float, streaming: bool) -> tuple:
+        quality = lookup_model(QUALITY, model) or DEFAULT_QUALITY
+        p95 = self.p95(model, streaming) or 0.0
+        if mode == "quality":
+            return (-quality, p95, cost)
+        if mode == "latency":
+            return (p95, -quality, cost)
+        return (cost, -quality, p95)
+
+    def _route(self, model: str, ranked: List[str], hint: str, reason: str,
+               cost: Dict[str, float], streaming: bool = False) -> Route:
+        fallback = self.fallback
+        if fallback == model:
+            # Next best candidate instead
+            fallback = next((other for other in ranked if other != model), None)
+        p95 = self.p95(model, streaming)
+        return Route(
+            model=model,
+            fallback=fallback,
+            optimize_for=hint,
+            reason=reason,
+            estimated_cost_usd=cost.get(model, 0.0),
+            p95_ms=round(p95 * 1000, 1) if p95 is not None else None
+        )
+
+    def stats(self) -> dict:
+        """Observed p95 latency per model and the spend budget left"""
+        return {
+            "models": {model: {"p95_ms": round(window.p95() * 1000, 1),
+                               "samples": len(window.samples)}
+                       for model, window in self._latency.items()},
+            "first_token": {model: {"p95_ms": round(window.p95() * 1000, 1),
+                                    "samples": len(window.samples)}
+                            for model, window in self._first_token.items()},
+            "budget_remaining_usd": (round(self.budget.remaining(), 6)
+                                     if self.budget is not None else None)
+        }
@@ -1,10 +1,17 @@
-import asyncio
+import openai
 from openai import AsyncOpenAI
-from utils import get_openai_client, CustomLogger
-import random
-
-# Initialize OpenAI async client
-client = AsyncOpenAI(api_key=get_openai_client().api_key)
+from typing import Dict, Optional, Tuple
+from config.production import ProductionSettings
+from utils import CustomLogger, TokenLimitError
+from utils.metrics import LLM_COST, LLM_LATENCY, LLM_TOKENS
+from utils.timing import stage
+from .compaction import Compaction, compact
+from .retry import CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_retries
+from .router import ModelRouter, Route, SpendBudget
+from .tokens import (OUTPUT_TO_RESUME_RATIO, TRIM_SLACK, TokenBudget, TokenCounter,
+                     get_token_counter, lookup_model, plan_completion)
+import math
+import time
 
 # Initialize logger
 logger = CustomLogger(__name__)
@@ -14,6 +21,7 @@ PRICING = {
     "gpt-4": {"input": 0.03, "output": 0.06},  # per 1K tokens
     "gpt-4-turbo": {"input": 0.01, "output": 0.03},
     "gpt-4o": {"input": 0.0025, "output": 0.01},
+    "gpt-4o-mini": {"input": 0.00015, "output": 0.0006},
     "gpt-3.5-turbo": {"input": 0.0005, "output": 0.0015},
     "gpt-4-32k": {"input": 0.06, "output": 0.12},
 }
@@ -21,12 +29,9 @@ PRICING = {
 
 def calculate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
     """Calculate the cost of an API call based on token usage."""
-    # Find pricing for the model (handle model variants)
-    pricing = None
-    for model_prefix, prices in PRICING.items():
-        if model.startswith(model_prefix):
-            pricing = prices
-            break
+    # Find pricing for the model (handle model variants); the longest
+    # prefix wins, so gpt-4-turbo is not priced as gpt-4
+    pricing = lookup_model(PRICING, model)
 
     if not pricing:
         # Default to gpt-4 pricing if model not found
@@ -40,13 +45,56 @@ def calculate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
 
 
 class ResumeTailor:
-    def __init__(self, model, tone='professional'):
-        """Initialize with model name."""
+    def __init__(self, model, tone='professional',
+                 client: Optional[AsyncOpenAI] = None,
+                 max_output_tokens: Optional[int] = None,
+                 min_output_tokens: Optional[int] = None,
+                 overflow: Optional[str] = None,
+                 compaction: Optional[bool] = None,
+                 prompt_token_budget: Optional[int] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 router: Optional[ModelRouter] = None):
+        """
+        Initialize with model name, token budget, compaction, retry and
+        routing settings (default from settings). Pass a shared client to
+        reuse its connection pool; otherwise the tailor creates its own.
+        Retries are ours, so the client should be built with max_retries=0.
+
+        ``model`` is the primary model; the router may pick another
+        candidate per request. ``breaker`` guards the primary model, and
+        every other model gets its own.
+        """
         self.model = model
-        self.client = client
+        self.client = client or AsyncOpenAI(
+            api_key=ProductionSettings.OPENAI_API_KEY, max_retries=0)
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_retries=ProductionSettings.OPENAI_MAX_RETRIES,
+            max_delay=ProductionSettings.OPENAI_RETRY_MAX_DELAY
+        )
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        if breaker is not None:
+            self.breakers[model] = breaker
+        self.router = router or ModelRouter(
+            [model, *ProductionSettings.ROUTER_MODELS],
+            price=calculate_cost,
+            fallback=ProductionSettings.FALLBACK_MODEL,
+            short_prompt_tokens=ProductionSettings.ROUTER_SHORT_PROMPT_TOKENS,
+            latency_target=ProductionSettings.ROUTER_P95_TARGET_MS / 1000,
+            budget=SpendBudget(ProductionSettings.ROUTER_BUDGET_USD,
+                               ProductionSettings.ROUTER_BUDGET_PERIOD)
+            if ProductionSettings.ROUTER_BUDGET_USD else None
+        )
+        self.max_output_tokens = max_output_tokens or ProductionSettings.MAX_TOKENS
+        self.min_output_tokens = min_output_tokens or ProductionSettings.MIN_OUTPUT_TOKENS
+        self.overflow = overflow or ProductionSettings.TOKEN_OVERFLOW
+        self.compaction = (ProductionSettings.COMPACTION_ENABLED
+                           if compaction is None else compaction)
+        self.prompt_token_budget = (ProductionSettings.PROMPT_TOKEN_BUDGET
+                                    if prompt_token_budget is None else prompt_token_budget)
 
-    async def tailor_resume(self, resume_text: str, job_description: str, tone: str = 'professional'):
-        """Core business logic for resume tailoring"""
+    def _build_messages(self, resume_text: str, job_description: str, tone: str) -> list:
+        """Chat messages for a tailoring request"""
         prompt = f'''
         Tailor the following resume to better fit the job description.
         Use a {tone} tone in the output.
@@ -54,65 +102,289 @@ class ResumeTailor:
         Resume: {resume_text}
         Job Description: {job_description}
         '''
+        return [
+            {"role": "system",
+                "content": "You are a professional resume tailoring assistant."},
+            {"role": "user", "content": prompt}
+        ]
 
-        try:
-            response = await self._retry_on_rate_limit(
-                self.client.chat.completions.create,
-                model=self.model,
-                messages=[
-                    {"role": "system",
-                        "content": "You are a professional resume tailoring assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.2
+    def _compact(self, counter: TokenCounter, resume_text: str,
+                 job_description: str, tone: str) -> Compaction:
+        """Compact the inputs, dropping bullets to fit prompt_token_budget"""
+        compaction = compact(resume_text, job_description, counter.count)
+        if self.prompt_token_budget:
+            # Whatever the rest of the prompt leaves is the resume's share
+            fixed = counter.count_messages(
+                self._build_messages("", compaction.job_description, tone))
+            compaction = compact(resume_text, job_description, counter.count,
+                                 resume_budget=self.prompt_token_budget - fixed)
+        return compaction
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        """The circuit breaker guarding calls to model"""
+        if model not in self.breakers:
+            self.breakers[model] = CircuitBreaker(
+                failure_threshold=ProductionSettings.CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=ProductionSettings.CIRCUIT_RESET_TIMEOUT
             )
+        return self.breakers[model]
+
+    def _route(self, resume_text: str, job_description: str, tone: str,
+               optimize_for: Optional[str], streaming: bool = False) -> Route:
+        """Choose the model for a request from its uncompacted size"""
+        with stage("routing"):
+            counter = get_token_counter(self.model)
+            prompt_tokens = counter.count_messages(
+                self._build_messages(resume_text, job_description, tone))
+            expected_output = max(
+                self.min_output_tokens,
+                min(self.max_output_tokens,
+                    math.ceil(counter.count(resume_text) * OUTPUT_TO_RESUME_RATIO)))
+            return self.router.route(prompt_tokens, expected_output,
+                                     self.min_output_tokens, optimize_for, streaming)
+
+    def _prepare(self, resume_text: str, job_description: str,
+                 tone: str, model: Optional[str] = None
+                 ) -> Tuple[list, TokenBudget, Optional[Compaction]]:
+        """
+        Build the messages and budget them against the model's context
+        window (model defaults to the primary) before anything is sent.
+
+        Raises:
+            TokenLimitError: If the input does not fit (after trimming, when
+                overflow is "trim")
+        """
+        model = model or self.model
+        counter = get_token_counter(model)
+        messages = self._build_messages(resume_text, job_description, tone)
+        prompt_tokens = counter.count_messages(messages)
+
+        compaction = None
+        if self.compaction:
+            compaction = self._compact(counter, resume_text, job_description, tone)
+            resume_text = compaction.resume_text
+            job_description = compaction.job_description
+            messages = self._build_messages(resume_text, job_description, tone)
+            compacted_tokens = counter.count_messages(messages)
+            compaction.tokens_saved = prompt_tokens - compacted_tokens
+            prompt_tokens = compacted_tokens
+
+        try:
+            return messages, plan_completion(
+                counter, prompt_tokens, counter.count(resume_text),
+                self.max_output_tokens, self.min_output_tokens), compaction
+        except TokenLimitError as e:
+            if self.overflow != "trim":
+                raise
+            excess = prompt_tokens - e.max_tokens + TRIM_SLACK
+
+        resume_text, job_description = self._trim(
+            counter, resume_text, job_description, excess)
+        messages = self._build_messages(resume_text, job_description, tone)
+        budget = plan_completion(
+            counter, counter.count_messages(messages), counter.count(resume_text),
+            self.max_output_tokens, self.min_output_tokens)
+        budget.trimmed = True
+        logger.logger.info(
+            f"Trimmed input by {excess} tokens to fit {model}")
+        return messages, budget, compaction
+
+    @staticmethod
+    def _trim(counter: TokenCounter, resume_text: str, job_description: str,
+              excess: int) -> Tuple[str, str]:
+        """Cut excess tokens, from the job description first (keeping at least a quarter of it)"""
+        job_tokens = counter.count(job_description)
+        cut = min(excess, job_tokens - job_tokens // 4)
+        job_description = counter.truncate(job_description, job_tokens - cut)
+        excess -= cut
+        if excess > 0:
+            resume_text = counter.truncate(
+                resume_text, counter.count(resume_text) - excess)
+        return resume_text, job_description
+
+    def _usage(self, model: str, input_tokens: int, output_tokens: int,
+               total_tokens: int, estimated: bool = False) -> dict:
+        """
+        Price a completion, charge it to the spend budget and log its usage.
+        Estimated usage is a local token count, used when the API reported none.
+        """
+        # Calculate cost
+        cost = calculate_cost(model, input_tokens, output_tokens)
+        self.router.record_cost(cost)
+        LLM_TOKENS.inc(input_tokens, model=model, direction="input")
+        LLM_TOKENS.inc(output_tokens, model=model, direction="output")
+        LLM_COST.inc(cost, model=model)
+
+        # Log the usage and cost
+        logger.logger.info(
+            f"OpenAI API Call - Model: {model}, "
+            f"Input Tokens: {input_tokens}, "
+            f"Output Tokens: {output_tokens}, "
+            f"Total Tokens: {total_tokens}, "
+            f"Cost: ${cost:.6f}"
+            + (" (estimated)" if estimated else "")
+        )
+
+        usage = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": total_tokens,
+            "cost_usd": cost
+        }
+        if estimated:
+            usage["estimated"] = True
+        return usage
+
+    def _record_latency(self, model: str, started: float, outcome: str):
+        elapsed = time.monotonic() - started
+        LLM_LATENCY.observe(elapsed, model=model, outcome=outcome)
+        # A stream's full duration is generation time, not responsiveness;
+        # streams feed the router their time to first token instead
+        if outcome not in ("error", "streamed"):
+            self.router.record(model, elapsed)
+
+    async def _complete(self, route: Route, resume_text: str, job_description: str,
+                        tone: str, **params):
+        """
+        Send the completion to the routed model, switching to the fallback
+        model once if it times out or its circuit is open. While a fallback
+        remains, a timeout is not retried on the same model first.
+
+        Returns:
+            (response, model, budget, compaction, retries, started)
+        """
+        model = route.model
+        while True:
+            with stage("prompt"):
+                messages, budget, compaction = self._prepare(
+                    resume_text, job_description, tone, model)
+            started = time.monotonic()
+            try:
+                with stage("openai"):
+                    response, retries = await call_with_retries(
+                        self.client.chat.completions.create,
+                        self.retry_policy
+                        if route.fallback is None or model == route.fallback
+                        else self.retry_policy.without_timeouts(),
+                        self.breaker(model),
+                        model=model,
+                        messages=messages,
+                        temperature=0.2,
+                        max_tokens=budget.max_tokens,
+                        **params
+                    )
+            except (openai.APITimeoutError, CircuitOpenError) as e:
+                if isinstance(e, openai.APITimeoutError):
+                    self._record_latency(model, started, "timeout")
+                if route.fallback is None or model == route.fallback:
+                    raise
+                logger.logger.warning(
+                    f"{model} unavailable ({type(e).__name__}); "
+                    f"falling back to {route.fallback}")
+                model = route.fallback
+                route.fallback_used = True
+                continue
+            except Exception:
+                self._record_latency(model, started, "error")
+                raise
+            return response, model, budget, compaction, retries, started
+
+    async def tailor_resume(self, resume_text: str, job_description: str,
+                            tone: str = 'professional',
+                            optimize_for: Optional[str] = None):
+        """Core business logic for resume tailoring"""
+        route = self._route(resume_text, job_description, tone, optimize_for)
+        try:
+            response, model, budget, compaction, retries, started = await self._complete(
+                route, resume_text, job_description, tone)
+            self._record_latency(model, started, "success")
 
             # Extract token usage
             usage = response.usage
-            input_tokens = usage.prompt_tokens
-            output_tokens = usage.completion_tokens
-            total_tokens = usage.total_tokens
-
-            # Calculate cost
-            cost = calculate_cost(self.model, input_tokens, output_tokens)
-
-            # Log the usage and cost
-            logger.logger.info(
-                f"OpenAI API Call - Model: {self.model}, "
-                f"Input Tokens: {input_tokens}, "
-                f"Output Tokens: {output_tokens}, "
-                f"Total Tokens: {total_tokens}, "
-                f"Cost: ${cost:.6f}"
-            )
 
             # Return both the content and usage info
             result = response.choices[0].message.content.strip()
             return {
                 "content": result,
-                "usage": {
-                    "input_tokens": input_tokens,
-                    "output_tokens": output_tokens,
-                    "total_tokens": total_tokens,
-                    "cost_usd": cost
-                }
+                "model": model,
+                "usage": self._usage(model,
+                                     usage.prompt_tokens,
+                                     usage.completion_tokens,
+                                     usage.total_tokens),
+                "token_budget": budget.to_dict(usage.prompt_tokens),
+                "compaction": compaction.to_dict() if compaction else None,
+                "routing": route.to_dict(),
+                "retries": retries
             }
 
         except Exception as e:
-            logger.log_error(e, {"model": self.model})
-            print(f"API call failed: {type(e).__name__}: {str(e)}")
+            logger.log_error(e, {"model": route.model})
             raise
 
-    async def _retry_on_rate_limit(self, func, *args, max_retries=6, initial_delay=1.0, max_delay=60.0, **kwargs):
-        """Async retry wrapper with exponential backoff."""
-        for attempt in range(1, max_retries + 1):
-            try:
-                return await func(*args, **kwargs)
-            except Exception as e:
-                if attempt == max_retries:
-                    raise
+    async def stream_tailor_resume(self, resume_text: str, job_description: str,
+                                   tone: str = 'professional',
+                                   optimize_for: Optional[str] = None):
+        """
+        Stream a tailored resume as it is generated.
 
-                backoff = min(max_delay, initial_delay * (2 ** (attempt - 1)))
-                sleep_for = random.uniform(0, backoff)
-                print(
-                    f"Rate limit detected. Retry {attempt}/{max_retries} after {sleep_for:.2f}s...")
-                await asyncio.sleep(sleep_for)
+        Yields {"type": "token", "content": str} for each content delta and
+        finishes with {"type": "done", "content": str, "usage": dict}.
+        Falling back to another model is only possible before the first token.
+        """
+        route = self._route(resume_text, job_description, tone, optimize_for,
+                            streaming=True)
+        try:
+            stream, model, budget, compaction, retries, started = await self._complete(
+                route, resume_text, job_description, tone,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+
+            parts = []
+            usage = None
+            # Closing the stream releases the upstream connection if the
+            # client goes away mid-response. The stage includes the time
+            # spent passing each token on
+            with stage("openai_stream"):
+                async with stream:
+                    async for chunk in stream:
+                        if chunk.usage is not None:
+                            usage = chunk.usage
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            if not parts:
+                                self.router.record(model, time.monotonic() - started,
+                                                   first_token=True)
+                            parts.append(delta)
+                            yield {"type": "token", "content": delta}
+            self._record_latency(model, started, "streamed")
+
+            content = "".join(parts).strip()
+            if usage is not None:
+                usage_dict = self._usage(model, usage.prompt_tokens,
+                                         usage.completion_tokens, usage.total_tokens)
+            else:
+                # The usage chunk is missing if the stream was cut short;
+                # count the tokens locally rather than record no spend
+                logger.logger.warning(
+                    f"Stream from {model} ended without usage; estimating tokens locally")
+                output_tokens = get_token_counter(model).count("".join(parts))
+                usage_dict = self._usage(
+                    model, budget.predicted_input_tokens, output_tokens,
+                    budget.predicted_input_tokens + output_tokens, estimated=True)
+            yield {
+                "type": "done",
+                "content": content,
+                "model": model,
+                "usage": usage_dict,
+                "token_budget": budget.to_dict(usage.prompt_tokens if usage else None),
+                "compaction": compaction.to_dict() if compaction else None,
+                "routing": route.to_dict(),
+                "retries": retries
+            }
+
+        except Exception as e:
+            logger.log_error(e, {"model": route.model, "stream": True})
+            raise
@@ -0,0 +1,162 @@
+import math
+import os
+from dataclasses import dataclass, asdict
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional
+
+from config.production import ProductionSettings
+from utils.errors import TokenLimitError
+
+try:
+    import tiktoken
+except ImportError:  # counts fall back to a character estimate
+    tiktoken = None
+
+# Context window per model family, matched by longest prefix
+CONTEXT_WINDOWS = {
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Chat format overhead: tokens framing each message, and priming the reply
+TOKENS_PER_MESSAGE = 3
+REPLY_PRIMING_TOKENS = 3
+
+# Without the BPE files, assume a pessimistic 3 characters per token
+# (English prose averages about 4) and keep a wider safety margin
+ESTIMATED_CHARS_PER_TOKEN = 3
+EXACT_MARGIN = 16
+ESTIMATE_MARGIN_RATIO = 0.05
+
+# Extra tokens cut when trimming, since text re-tokenizes slightly
+# differently around the cut
+TRIM_SLACK = 16
+
+# A tailored resume runs a little longer than the resume it came from
+OUTPUT_TO_RESUME_RATIO = 1.5
+
+
+def lookup_model(table: dict, model: str):
+    """Value for the longest key in table that model starts with, or None"""
+    matches = [prefix for prefix in table if model.startswith(prefix)]
+    return table[max(matches, key=len)] if matches else None
+
+
+def context_window(model: str) -> int:
+    return lookup_model(CONTEXT_WINDOWS, model) or DEFAULT_CONTEXT_WINDOW
+
+
+class TokenCounter:
+    """
+    Counts tokens the way the model will, without calling the API.
+
+    Uses tiktoken when its BPE files are available locally (the Docker
+    image bakes them into TIKTOKEN_CACHE_DIR at build time) and otherwise
+    a conservative character estimate. It never downloads at request time.
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self.encoding = _load_encoding(model)
+
+    @property
+    def exact(self) -> bool:
+        return self.encoding is not None
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / ESTIMATED_CHARS_PER_TOKEN)
+
+    def count_messages(self, messages: List[dict]) -> int:
+        """Prompt tokens for a chat completion request"""
+        total = REPLY_PRIMING_TOKENS
+        for message in messages:
+            total += TOKENS_PER_MESSAGE
+            total += self.count(message["role"]) + self.count(message["content"])
+        return total
+
+    def truncate(self, text: str, tokens: int) -> str:
+        """The longest prefix of text that fits in tokens"""
+        if tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            ids = self.encoding.encode(text, disallowed_special=())
+            return text if len(ids) <= tokens else self.encoding.decode(ids[:tokens])
+        return text[:tokens * ESTIMATED_CHARS_PER_TOKEN]
+
+    def margin(self, window: int) -> int:
+        """Tokens held back for counting error"""
+        return EXACT_MARGIN if self.exact else int(window * ESTIMATE_MARGIN_RATIO)
+
+
+def _load_encoding(model: str):
+    if tiktoken is None:
+        return None
+    cache_dir = Path(ProductionSettings.TOKENIZER_DIR)
+    # tiktoken looks only at TIKTOKEN_CACHE_DIR, which the entry point sets
+    # from the settings (config.configure_tokenizer); anywhere else, or an empty
+    # cache, would make it fetch the files over the network
+    if os.environ.get("TIKTOKEN_CACHE_DIR") != str(cache_dir):
+        return None
+    if not cache_dir.is_dir() or not any(cache_dir.iterdir()):
+        return None
+    try:
+        name = tiktoken.encoding_name_for_model(model)
+    except KeyError:
+        name = "cl100k_base"
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(model: str) -> TokenCounter:
+    """Shared counter per model; loading an encoding takes a moment"""
+    return TokenCounter(model)
+
+
+@dataclass
+class TokenBudget:
+    """Token plan for one completion, reported in response metadata"""
+    predicted_input_tokens: int
+    max_tokens: int
+    context_window: int
+    exact: bool
+    trimmed: bool = False
+
+    def to_dict(self, actual_input_tokens: Optional[int] = None) -> dict:
+        return {**asdict(self), "actual_input_tokens": actual_input_tokens}
+
+
+def plan_completion(counter: TokenCounter, prompt_tokens: int, resume_tokens: int,
+                    max_output_tokens: int, min_output_tokens: int) -> TokenBudget:
+    """
+    Choose max_tokens for a prompt: room for a resume somewhat longer than
+    the input, capped by max_output_tokens and by what the context window
+    has left.
+
+    Raises:
+        TokenLimitError: If the window cannot fit min_output_tokens
+    """
+    window = context_window(counter.model)
+    available = window - prompt_tokens - counter.margin(window)
+    if available < min_output_tokens:
+        raise TokenLimitError(
+            f"Input is too long for {counter.model}",
+            token_count=prompt_tokens,
+            max_tokens=window - counter.margin(window) - min_output_tokens
+        )
+    wanted = max(min_output_tokens, math.ceil(resume_tokens * OUTPUT_TO_RESUME_RATIO))
+    return TokenBudget(
+        predicted_input_tokens=prompt_tokens,
+        max_tokens=min(wanted, max_output_tokens, available),
+        context_window=window,
+        exact=counter.exact
+    )
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, List, Tuple, Union
 
 
 class ResumeServiceInterface(ABC):
@@ -7,7 +8,34 @@ class ResumeServiceInterface(ABC):
         self,
         resume_text: str,
         job_description: str,
-        tone: str = "professional"
-    ) -> str:
+        tone: str = "professional",
+        use_cache: bool = True,
+        optimize_for: str = "balanced"
+    ) -> dict:
         """Abstract method for resume tailoring"""
         pass
+
+    @abstractmethod
+    def stream_tailor_resume(
+        self,
+        resume_text: str,
+        job_description: str,
+        tone: str = "professional",
+        use_cache: bool = True,
+        optimize_for: str = "balanced"
+    ) -> AsyncIterator[dict]:
+        """Abstract method for streaming resume tailoring"""
+        pass
+
+    @abstractmethod
+    def tailor_batch(
+        self,
+        resume_text: str,
+        job_descriptions: List[str],
+        tone: str = "professional",
+        use_cache: bool = True,
+        concurrency: int = 5,
+        optimize_for: str = "balanced"
+    ) -> AsyncIterator[Tuple[int, Union[dict, Exception]]]:
+        """Abstract method for tailoring one resume against many job descriptions"""
+        pass
@@ -0,0 +1,115 @@
+import asyncio
+import copy
+import hashlib
+import json
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+from utils import CustomLogger
+from utils.disk_cache import DiskCache
+from utils.metrics import CACHE_LOOKUPS
+
+logger = CustomLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    """Canonical form of input text so cosmetic differences share a cache key"""
+    text = unicodedata.normalize("NFC", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def make_cache_key(resume_text: str, job_description: str, tone: str, model: str,
+                   *extra: str) -> str:
+    """SHA-256 over the normalized (resume, job description, tone, model, *extra) tuple"""
+    digest = hashlib.sha256()
+    for part in (_normalize(resume_text), _normalize(job_description),
+                 str(getattr(tone, "value", tone)).lower(), model,
+                 *(str(getattr(part, "value", part)).lower() for part in extra)):
+        encoded = part.encode("utf-8")
+        # Length-prefix each field so boundaries can't be shifted between them
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class MemoryLRU:
+    """In-process LRU map with a per-entry time to live"""
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value):
+        if self.max_entries <= 0:
+            return
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ResultCache:
+    """
+    Two-tier cache for tailoring results.
+
+    Lookups hit the per-worker memory LRU first and fall back to a
+    ``DiskCache`` that every worker process shares. Disk failures are
+    logged and treated as misses so the cache can never fail a request.
+    """
+
+    def __init__(self, memory: MemoryLRU, disk: Optional[DiskCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[dict]:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            try:
+                raw = await asyncio.to_thread(self.disk.get, key)
+            except sqlite3.Error as e:
+                logger.log_error(e, {"cache": "disk", "operation": "get"})
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self.memory.set(key, value)
+
+        if value is None:
+            self.misses += 1
+            CACHE_LOOKUPS.inc(cache="result", result="miss")
+            return None
+        self.hits += 1
+        CACHE_LOOKUPS.inc(cache="result", result="hit")
+        return copy.deepcopy(value)
+
+    async def set(self, key: str, value: dict):
+        self.memory.set(key, copy.deepcopy(value))
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(
+                    self.disk.set, key, json.dumps(value).encode("utf-8"))
+            except sqlite3.Error as e:
+                logger.log_error(e, {"cache": "disk", "operation": "set"})
@@ -0,0 +1,68 @@
+import asyncio
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, Dict, Generic, Tuple, TypeVar
+
+from utils.metrics import COALESCED_REQUESTS
+
+T = TypeVar("T")
+
+
+@dataclass
+class Coalesced:
+    """How a request's result was obtained, for response metadata"""
+    shared: bool
+    callers: int
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class _Flight(Generic[T]):
+    def __init__(self, task: "asyncio.Task[T]"):
+        self.task = task
+        self.waiters = 0
+        self.callers = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; concurrent callers with the
+    same key await that call and share its result (or its error).
+
+    Cancellation is reference-counted: a caller that goes away stops
+    waiting, and the call itself is cancelled only once every caller has
+    gone. A key is free again as soon as its call finishes, so this
+    coalesces only what is in flight and caches nothing.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def run(self, key: str,
+                  func: Callable[[], Awaitable[T]]) -> Tuple[T, Coalesced]:
+        """Await func() for key, or the call already running for it"""
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(func()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        flight.waiters += 1
+        flight.callers += 1
+        COALESCED_REQUESTS.inc(role="follower" if shared else "leader")
+        try:
+            # shield: one caller being cancelled must not cancel the call
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self._forget(key, flight)
+        return result, Coalesced(shared, flight.callers)
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -0,0 +1,377 @@
+import asyncio
+import ipaddress
+import json
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+import httpx
+
+from utils import CustomLogger
+
+logger = CustomLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobStore:
+    """
+    Durable job table in SQLite, shared by every worker process.
+
+    A job is claimed by moving it to ``running`` with a lease. If the worker
+    holding it dies, the lease runs out and another worker reclaims the job,
+    so queued and in-flight work survives restarts.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                str(self.path), timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT,"
+                " callback_url TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " created REAL NOT NULL,"
+                " updated REAL NOT NULL,"
+                " lease_expires REAL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, payload: dict, callback_url: Optional[str] = None) -> str:
+        """Add a job and return its id"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connection().execute(
+            "INSERT INTO jobs (id, status, payload, callback_url, created, updated)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, QUEUED, json.dumps(payload), callback_url, now, now)
+        )
+        return job_id
+
+    def claim(self, lease_seconds: float) -> Optional[dict]:
+        """Atomically take the oldest queued (or abandoned) job"""
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ?"
+                " OR (status = ? AND lease_expires < ?)"
+                " ORDER BY created LIMIT 1",
+                (QUEUED, RUNNING, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1,"
+                " lease_expires = ?, updated = ? WHERE id = ?",
+                (RUNNING, now + lease_seconds, now, row["id"])
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"])
+
+    def renew(self, job_id: str, lease_seconds: float):
+        """Extend the lease on a running job"""
+        now = time.time()
+        self._connection().execute(
+            "UPDATE jobs SET lease_expires = ?, updated = ?"
+            " WHERE id = ? AND status = ?",
+            (now + lease_seconds, now, job_id, RUNNING)
+        )
+
+    def finish(self, job_id: str, status: str,
+               result: Optional[dict] = None, error: Optional[dict] = None):
+        """Record the outcome of a job"""
+        self._connection().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?,"
+            " lease_expires = NULL, updated = ? WHERE id = ?",
+            (status,
+             json.dumps(result) if result is not None else None,
+             json.dumps(error) if error is not None else None,
+             time.time(), job_id)
+        )
+
+    def release(self, job_id: str):
+        """Put a running job back on the queue without counting the attempt"""
+        self._connection().execute(
+            "UPDATE jobs SET status = ?, attempts = MAX(attempts - 1, 0),"
+            " lease_expires = NULL, updated = ? WHERE id = ? AND status = ?",
+            (QUEUED, time.time(), job_id, RUNNING)
+        )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Return a job as a dict, or None if unknown"""
+        row = self._connection().execute(
+            "SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for field in ("payload", "result", "error"):
+            if job[field] is not None:
+                job[field] = json.loads(job[field])
+        return job
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs last updated more than older_than seconds ago"""
+        return self._connection().execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated < ?",
+            (SUCCEEDED, FAILED, time.time() - older_than)
+        ).rowcount
+
+
+class CallbackRejected(ValueError):
+    """Raised for a callback URL jobs may not POST to"""
+
+
+class CallbackPolicy:
+    """
+    Which URLs a job may POST its outcome to.
+
+    A callback must use https, and every address its host resolves to must
+    be public. Private, loopback, link-local, reserved and multicast
+    addresses are refused, so a callback cannot reach the service's own
+    network or a cloud metadata endpoint. If allowed_hosts is set, the host
+    must also be one of them; an entry starting with "." allows its
+    subdomains too. Checked when a job is submitted and again before each
+    delivery, because DNS can change in between; a delivery then connects
+    to an address the check vetted instead of resolving the host again.
+    """
+
+    def __init__(self, allowed_hosts: Sequence[str] = ()):
+        self.allowed_hosts = tuple(host.lower() for host in allowed_hosts)
+
+    def _host_allowed(self, host: str) -> bool:
+        if not self.allowed_hosts:
+            return True
+        return any(host == allowed or (allowed.startswith(".") and host.endswith(allowed))
+                   for allowed in self.allowed_hosts)
+
+    async def check(self, url: str) -> List[str]:
+        """
+        The public addresses url's host resolves to.
+
+        Raises:
+            CallbackRejected: If jobs may not POST to url
+        """
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        if parts.scheme != "https" or not host:
+            raise CallbackRejected("callback_url must be an https URL")
+        if not self._host_allowed(host):
+            raise CallbackRejected(f"callback_url host {host} is not allowed")
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                host, parts.port or 443, type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            raise CallbackRejected(f"callback_url host {host} does not resolve")
+        addresses = []
+        for info in infos:
+            address = ipaddress.ip_address(info[4][0].split("%")[0])
+            mapped = getattr(address, "ipv4_mapped", None)
+            if not (mapped or address).is_global or (mapped or address).is_multicast:
+                raise CallbackRejected(
+                    f"callback_url host {host} resolves to a non-public address")
+            if str(address) not in addresses:
+                addresses.append(str(address))
+        return addresses
+
+
+def _pin(url: str, address: str) -> Tuple[str, dict, dict]:
+    """
+    url rewritten to connect to address, with the Host header and the TLS
+    server name (SNI, also used to verify the certificate) of its own host
+    """
+    parts = urlsplit(url)
+    userinfo, _, host = parts.netloc.rpartition("@")
+    netloc = f"[{address}]" if ":" in address else address
+    if parts.port is not None:
+        netloc = f"{netloc}:{parts.port}"
+    if userinfo:
+        netloc = f"{userinfo}@{netloc}"
+    return (urlunsplit(parts._replace(netloc=netloc)), {"Host": host},
+            {"sni_hostname": parts.hostname})
+
+
+class JobQueue:
+    """
+    Bounded pool of async workers draining a JobStore.
+
+    Each worker claims one job at a time and runs it through ``handler``,
+    which returns the JSON-serializable result to store. Workers wake
+    immediately for jobs submitted in this process and poll for jobs
+    submitted through other workers.
+    """
+
+    def __init__(self,
+                 store: JobStore,
+                 handler: Callable[[dict], Awaitable[dict]],
+                 workers: int = 2,
+                 poll_interval: float = 2.0,
+                 lease_seconds: float = 300.0,
+                 max_attempts: int = 3,
+                 retention: float = 7 * 24 * 3600,
+                 callback_policy: Optional[CallbackPolicy] = None):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self.callback_policy = callback_policy or CallbackPolicy()
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_purge = 0.0
+
+    async def start(self):
+        """Start the worker pool (no-op if already running on this loop)"""
+        loop = asyncio.get_running_loop()
+        if self._tasks and self._tasks[0].get_loop() is loop:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [loop.create_task(self._work(n))
+                       for n in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the workers; jobs they were running go back on the queue"""
+        loop = asyncio.get_running_loop()
+        tasks = [task for task in self._tasks if task.get_loop() is loop]
+        self._tasks = []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def submit(self, payload: dict, callback_url: Optional[str] = None) -> str:
+        """Enqueue a job and return its id"""
+        await self.start()
+        job_id = await asyncio.to_thread(self.store.enqueue, payload, callback_url)
+        self._wakeup.set()
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def _work(self, worker: int):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.store.claim, self.lease_seconds)
+            except sqlite3.Error as e:
+                logger.log_error(e, {"job_worker": worker})
+                await asyncio.sleep(self.poll_interval)
+                continue
+            if job is None:
+                await self._maybe_purge()
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: dict):
+        job_id = job["id"]
+        if job["attempts"] > self.max_attempts:
+            await self._finish(job, FAILED, error={
+                "code": "API_ERROR",
+                "message": f"Job abandoned after {self.max_attempts} attempts"
+            })
+            return
+
+        heartbeat = asyncio.get_running_loop().create_task(self._heartbeat(job_id))
+        try:
+            result = await self.handler(job["payload"])
+        except asyncio.CancelledError:
+            await asyncio.shield(asyncio.to_thread(self.store.release, job_id))
+            raise
+        except Exception as e:
+            logger.log_error(e, {"job_id": job_id})
+            await self._finish(job, FAILED, error={
+                "code": getattr(getattr(e, "error_code", None), "value", "API_ERROR"),
+                "message": str(e)
+            })
+        else:
+            await self._finish(job, SUCCEEDED, result=result)
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str):
+        """Keep the lease alive while a long upstream call runs"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await asyncio.to_thread(self.store.renew, job_id, self.lease_seconds)
+
+    async def _finish(self, job: dict, status: str,
+                      result: Optional[dict] = None, error: Optional[dict] = None):
+        await asyncio.to_thread(self.store.finish, job["id"], status, result, error)
+        if job.get("callback_url"):
+            await self._notify(job["callback_url"], {
+                "job_id": job["id"],
+                "status": status,
+                "result": result,
+                "error": error
+            })
+
+    async def _notify(self, url: str, body: dict, attempts: int = 3):
+        """POST the outcome to the job's webhook, retrying a few times"""
+        # Redirects are not followed: they would bypass the policy
+        async with httpx.AsyncClient(timeout=10.0, follow_redirects=False) as client:
+            for attempt in range(1, attempts + 1):
+                try:
+                    addresses = await self.callback_policy.check(url)
+                except CallbackRejected as e:
+                    logger.logger.warning(
+                        f"Webhook for job {body['job_id']} not sent: {e}")
+                    return
+                # Connect to the vetted address, so the host cannot be
+                # rebound to a private one between the check and the POST
+                pinned, headers, extensions = _pin(url, addresses[0])
+                try:
+                    response = await client.post(pinned, json=body, headers=headers,
+                                                 extensions=extensions)
+                    if response.status_code < 500:
+                        return
+                    problem = f"HTTP {response.status_code}"
+                except httpx.HTTPError as e:
+                    problem = f"{type(e).__name__}: {e}"
+                if attempt < attempts:
+                    await asyncio.sleep(2 ** attempt)
+        logger.logger.warning(
+            f"Webhook {url} failed for job {body['job_id']}: {problem}")
+
+    async def _maybe_purge(self):
+        """Drop old finished jobs at most once an hour per process"""
+        now = time.monotonic()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        await asyncio.to_thread(self.store.purge, self.retention)
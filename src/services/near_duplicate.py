@@ -0,0 +1,205 @@
+import difflib
+import hashlib
+import random
+import re
+import zlib
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from .cache import _normalize
+from .scoring import SKILLS, _TOKEN
+
+# Mersenne prime modulus for the MinHash permutations
+_PRIME = (1 << 61) - 1
+_WORD = re.compile(r"\w+")
+# Punctuation trimmed from words before comparing job descriptions
+_EDGE_PUNCTUATION = ".,;:!?()[]\"'"
+
+
+@dataclass
+class Match:
+    """The indexed job description most similar to a query"""
+    cache_key: str
+    job_description: str
+    similarity: float
+
+
+class _Entry:
+    __slots__ = ("scope", "cache_key", "signature", "job_description", "band_keys")
+
+    def __init__(self, scope: str, cache_key: str, signature: array,
+                 job_description: bytes, band_keys: List[int]):
+        self.scope = scope
+        self.cache_key = cache_key
+        self.signature = signature
+        self.job_description = job_description
+        self.band_keys = band_keys
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index of job descriptions whose results are cached.
+
+    Each job description becomes a MinHash signature over its word
+    3-shingles. The signature is split into bands, and descriptions
+    sharing any band are candidates. Candidates are ranked by the share of
+    equal signature slots, which estimates Jaccard similarity. Entries
+    are scoped (by resume, tone, model and routing hint), so only results
+    for the same resume are ever matched.
+
+    A match at or above ``threshold`` may reuse the matched result. The
+    index is built incrementally as results are cached, and bounded to
+    ``max_entries`` with the oldest dropped first. An entry keeps its
+    signature as a packed array and its job description zlib-compressed.
+    Not thread-safe; use it from the event loop.
+    """
+
+    def __init__(self, threshold: float = 0.9, max_entries: int = 5000, num_perm: int = 64,
+                 bands: int = 16, shingle_size: int = 3, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+                       for _ in range(num_perm)]
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._buckets: Dict[int, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _shingles(self, text: str) -> Set[str]:
+        words = _WORD.findall(_normalize(text).lower())
+        if len(words) <= self.shingle_size:
+            return {" ".join(words)} if words else set()
+        return {" ".join(words[i:i + self.shingle_size])
+                for i in range(len(words) - self.shingle_size + 1)}
+
+    def signature(self, text: str) -> array:
+        """MinHash signature of text; CPU-bound, so run long texts in a thread"""
+        hashes = [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(),
+                                 "big") for shingle in self._shingles(text)]
+        if not hashes:
+            return array("Q", [_PRIME] * len(self._perms))
+        return array("Q", [min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms])
+
+    def _band_keys(self, scope: str, signature: array) -> List[int]:
+        return [hash((scope, band, tuple(signature[band * self.rows:(band + 1) * self.rows])))
+                for band in range(self.bands)]
+
+    @staticmethod
+    def similarity(first: array, second: array) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(a == b for a, b in zip(first, second)) / len(first)
+
+    def add(self, scope: str, cache_key: str, job_description: str, signature: array):
+        """Index a job description whose result is cached under cache_key"""
+        if self.max_entries <= 0:
+            return
+        if cache_key in self._entries:
+            self._entries.move_to_end(cache_key)
+            return
+        band_keys = self._band_keys(scope, signature)
+        self._entries[cache_key] = _Entry(
+            scope, cache_key, signature,
+            zlib.compress(job_description.encode("utf-8")), band_keys)
+        for key in band_keys:
+            self._buckets.setdefault(key, set()).add(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, cache_key: str):
+        entry = self._entries.pop(cache_key)
+        for key in entry.band_keys:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(cache_key)
+                if not bucket:
+                    del self._buckets[key]
+
+    def query(self, scope: str, signature: array) -> Optional[Match]:
+        """The most similar indexed job description in scope, if any shares a band"""
+        candidates: Set[str] = set()
+        for key in self._band_keys(scope, signature):
+            candidates |= self._buckets.get(key, set())
+
+        best: Optional[Tuple[float, _Entry]] = None
+        for cache_key in candidates:
+            entry = self._entries[cache_key]
+            if entry.scope != scope:
+                continue
+            similarity = self.similarity(signature, entry.signature)
+            if best is None or similarity > best[0]:
+                best = (similarity, entry)
+        if best is None:
+            return None
+        similarity, entry = best
+        return Match(entry.cache_key, zlib.decompress(entry.job_description).decode("utf-8"),
+                     round(similarity, 4))
+
+    def discard(self, cache_key: str):
+        """Drop an entry whose cached result is gone"""
+        if cache_key in self._entries:
+            self._remove(cache_key)
+
+
+def _phrase(words: List[str]) -> str:
+    return " ".join(words).strip(_EDGE_PUNCTUATION)
+
+
+def _names_skill(words: List[str]) -> bool:
+    """Whether words include a skill term (a word or a two-word phrase)"""
+    tokens = _TOKEN.findall(" ".join(words).lower())
+    return any(token in SKILLS for token in tokens) or any(
+        f"{a} {b}" in SKILLS for a, b in zip(tokens, tokens[1:]))
+
+
+def _occurs(phrase: str, text: str) -> bool:
+    return re.search(rf"(?<!\w){re.escape(phrase)}(?!\w)", text, re.IGNORECASE) is not None
+
+
+def adapt(content: str, old_job_description: str, new_job_description: str,
+          resume_text: str = "",
+          max_phrase_words: int = 4) -> Optional[Tuple[str, List[Tuple[str, str]]]]:
+    """
+    Carry a result over from one job description to a near-identical one.
+
+    Short capitalized phrases that the new description has in place of the
+    old one (a company name or a location) are substituted in content.
+    Returns the adapted content and the (old, new) substitutions that
+    changed it, or None when the result must not be reused: the
+    descriptions differ in a skill, or a differing phrase occurs in
+    resume_text (it is the candidate's own history, not the posting's).
+    """
+    old_words, new_words = old_job_description.split(), new_job_description.split()
+    matcher = difflib.SequenceMatcher(a=old_words, b=new_words, autojunk=False)
+    substitutions = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        if _names_skill(old_words[i1:i2]) or _names_skill(new_words[j1:j2]):
+            return None
+        if tag != "replace" or i2 - i1 > max_phrase_words or j2 - j1 > max_phrase_words:
+            continue
+        before, after = _phrase(old_words[i1:i2]), _phrase(new_words[j1:j2])
+        if not before or not after or before == after:
+            continue
+        if not (before[0].isupper() and after[0].isupper()):
+            continue
+        if _occurs(before, resume_text) or _occurs(after, resume_text):
+            return None
+        substitutions.append((before, after))
+
+    applied = []
+    for before, after in substitutions:
+        content, count = re.subn(rf"(?<!\w){re.escape(before)}(?!\w)",
+                                 lambda _, after=after: after, content)
+        if count:
+            applied.append((before, after))
+    return content, applied
@@ -1,40 +1,314 @@
 from .base import ResumeServiceInterface
-from resume_tailor import ResumeTailor
-from typing import Optional
-import os
+from .cache import ResultCache, make_cache_key
+from .coalesce import SingleFlight
+from .near_duplicate import NearDuplicateIndex, adapt
+from .scoring import KeywordScorer
+from config.production import ProductionSettings
+from utils.metrics import CACHE_LOOKUPS
+from utils.timing import current_timer, stage, start_timer
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional, Tuple, Union
+import asyncio
+import time
+
+if TYPE_CHECKING:
+    from resume_tailor import ResumeTailor
+
+
+def _served_by_fallback(result: dict) -> bool:
+    """
+    Whether the fallback model answered. Cache keys name the primary model,
+    so such a result is not cached as if it had answered.
+    """
+    return bool((result.get("routing") or {}).get("fallback_used"))
+
+
+def _no_usage() -> dict:
+    """Usage of a request that made no API call of its own"""
+    return {
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "total_tokens": 0,
+        "cost_usd": 0.0
+    }
 
 
 class ResumeService(ResumeServiceInterface):
-    def __init__(self, tailor: Optional[ResumeTailor] = None):
+    def __init__(self, tailor: Optional["ResumeTailor"] = None,
+                 cache: Optional[ResultCache] = None,
+                 flights: Optional[SingleFlight] = None,
+                 near_duplicates: Optional[NearDuplicateIndex] = None,
+                 scorer: Optional[KeywordScorer] = None):
         """
         Initialize service with optional ResumeTailor instance
         Allows dependency injection for testing and flexibility
+
+        When a ResultCache is given, identical requests are answered from it
+        instead of calling OpenAI again. When a SingleFlight is given,
+        identical requests arriving while one is in flight share its call.
+        When a NearDuplicateIndex is given too, a job description nearly
+        identical to one already answered for the same resume reuses that
+        cached result. When a KeywordScorer is given, each result is scored
+        against the job description before and after tailoring.
         """
         self._tailor = tailor
+        self.cache = cache
+        self.flights = flights
+        self.near_duplicates = near_duplicates if cache is not None else None
+        self.scorer = scorer
 
     @property
-    def tailor(self) -> ResumeTailor:
+    def tailor(self) -> "ResumeTailor":
         """Lazy initialization of ResumeTailor if not injected"""
         if self._tailor is None:
-            from utils.env_loader import load_environment
+            from resume_tailor import ResumeTailor
 
-            load_environment()
-            model = os.getenv('MODEL_NAME', 'gpt-3.5-turbo')
-            self._tailor = ResumeTailor(model=model)
+            self._tailor = ResumeTailor(model=ProductionSettings.MODEL_NAME)
         return self._tailor
 
     async def tailor_resume(
         self,
         resume_text: str,
         job_description: str,
-        tone: str = "professional"
+        tone: str = "professional",
+        use_cache: bool = True,
+        optimize_for: str = "balanced"
     ) -> dict:
         """
         Implementation of resume tailoring service
-        Returns dict with 'content' and 'usage' keys
+        Returns dict with 'content' and 'usage' keys, plus 'cache'
+        ("hit", "miss" or "bypass") when caching is enabled.
+        use_cache=False skips the lookup but still stores the fresh result.
+        optimize_for is the routing hint ("balanced", "quality", "latency"
+        or "cost"); results are cached per hint.
+        With coalescing on, 'coalesced' reports whether the OpenAI call was
+        shared with concurrent identical requests; only the request that
+        made the call reports its usage.
+        With near-duplicate detection on, 'near_duplicate' reports the
+        similarity to the closest job description seen for this resume and
+        whether its result was reused ('cache' is then "near_hit").
+        With a scorer, 'ats_score' holds the keyword match scores of the
+        resume 'before' and 'after' tailoring.
+        """
+        result = await self._tailor_resume(resume_text, job_description, tone,
+                                           use_cache, optimize_for)
+        if self.scorer is None:
+            return result
+        return {**result, "ats_score": await self._ats_score(
+            resume_text, result["content"], job_description)}
+
+    async def _ats_score(self, resume_text: str, content: str, job_description: str) -> dict:
+        with stage("score"):
+            return await asyncio.to_thread(self.scorer.compare, resume_text, content,
+                                           job_description)
+
+    async def _tailor_resume(
+        self,
+        resume_text: str,
+        job_description: str,
+        tone: str,
+        use_cache: bool,
+        optimize_for: str
+    ) -> dict:
+        """tailor_resume without the scores"""
+        key = make_cache_key(resume_text, job_description,
+                             tone, self.tailor.model, optimize_for)
+        if self.cache is not None and use_cache:
+            with stage("cache"):
+                cached = await self.cache.get(key)
+            if cached is not None:
+                # No API call was made, so nothing was spent on this request
+                cached["usage"] = _no_usage()
+                cached["cache"] = "hit"
+                return cached
+
+        near_duplicate = None
+        if self.near_duplicates is not None:
+            # Everything in the cache key except the job description
+            scope = make_cache_key(resume_text, "", tone, self.tailor.model, optimize_for)
+            with stage("near_duplicate"):
+                signature = await asyncio.to_thread(
+                    self.near_duplicates.signature, job_description)
+                if use_cache:
+                    reused, near_duplicate = await self._reuse_near_duplicate(
+                        scope, signature, resume_text, job_description)
+                    if reused is not None:
+                        await self.cache.set(key, reused)
+                        self.near_duplicates.add(scope, key, job_description, signature)
+                        return {**reused, "usage": _no_usage(), "cache": "near_hit",
+                                "near_duplicate": near_duplicate}
+
+        async def call() -> dict:
+            result = await self.tailor.tailor_resume(
+                resume_text=resume_text,
+                job_description=job_description,
+                tone=tone,
+                optimize_for=optimize_for
+            )
+            if self.cache is not None and not _served_by_fallback(result):
+                with stage("cache"):
+                    await self.cache.set(key, result)
+                if self.near_duplicates is not None:
+                    self.near_duplicates.add(scope, key, job_description, signature)
+            return result
+
+        if self.flights is None:
+            result = await call()
+        else:
+            started = time.perf_counter()
+            result, coalesced = await self.flights.run(key, call)
+            result = {**result, "coalesced": coalesced.to_dict()}
+            if coalesced.shared:
+                result["usage"] = _no_usage()
+                # The OpenAI stages were timed by the request that made the call
+                timer = current_timer()
+                if timer is not None:
+                    timer.add("coalesced", time.perf_counter() - started)
+
+        if self.cache is None:
+            return result
+        if near_duplicate is not None:
+            result = {**result, "near_duplicate": near_duplicate}
+        return {**result, "cache": "miss" if use_cache else "bypass"}
+
+    async def _reuse_near_duplicate(
+        self, scope: str, signature, resume_text: str, job_description: str
+    ) -> Tuple[Optional[dict], dict]:
+        """
+        The cached result of the closest indexed job description, adapted to
+        this one, if it is similar enough and safe to adapt; and the metadata
+        of the decision.
+        """
+        index = self.near_duplicates
+        match = index.query(scope, signature)
+        decision = {"similarity": match.similarity if match else None,
+                    "threshold": index.threshold, "reused": False, "refused": False,
+                    "replacements": []}
+        if match is None or match.similarity < index.threshold:
+            CACHE_LOOKUPS.inc(cache="near_duplicate", result="miss")
+            return None, decision
+
+        cached = await self.cache.get(match.cache_key)
+        if cached is None:
+            # Expired or evicted from the cache; stop matching it
+            index.discard(match.cache_key)
+            CACHE_LOOKUPS.inc(cache="near_duplicate", result="miss")
+            return None, decision
+
+        adapted = adapt(cached["content"], match.job_description, job_description,
+                        resume_text)
+        if adapted is None:
+            # The postings differ in a skill or in something the resume names
+            decision["refused"] = True
+            CACHE_LOOKUPS.inc(cache="near_duplicate", result="miss")
+            return None, decision
+
+        content, replacements = adapted
+        CACHE_LOOKUPS.inc(cache="near_duplicate", result="hit")
+        decision.update(reused=True, replacements=[list(pair) for pair in replacements])
+        return {**cached, "content": content}, decision
+
+    async def stream_tailor_resume(
+        self,
+        resume_text: str,
+        job_description: str,
+        tone: str = "professional",
+        use_cache: bool = True,
+        optimize_for: str = "balanced"
+    ) -> AsyncIterator[dict]:
+        """
+        Streaming variant of tailor_resume.
+        Yields 'token' events followed by one 'done' event carrying the full
+        content and usage. A cache hit is replayed as a single token event.
+        With a scorer, the 'done' event carries 'ats_score' as well.
         """
-        return await self.tailor.tailor_resume(
+        async for event in self._stream_tailor_resume(resume_text, job_description, tone,
+                                                      use_cache, optimize_for):
+            if event["type"] == "done" and self.scorer is not None:
+                event["ats_score"] = await self._ats_score(
+                    resume_text, event["content"], job_description)
+            yield event
+
+    async def _stream_tailor_resume(
+        self,
+        resume_text: str,
+        job_description: str,
+        tone: str,
+        use_cache: bool,
+        optimize_for: str
+    ) -> AsyncIterator[dict]:
+        """stream_tailor_resume without the scores"""
+        key = None
+        if self.cache is not None:
+            key = make_cache_key(resume_text, job_description,
+                                 tone, self.tailor.model, optimize_for)
+            with stage("cache"):
+                cached = await self.cache.get(key) if use_cache else None
+            if cached is not None:
+                yield {"type": "token", "content": cached["content"]}
+                yield {
+                    "type": "done",
+                    "content": cached["content"],
+                    "model": cached.get("model"),
+                    "usage": _no_usage(),
+                    "cache": "hit"
+                }
+                return
+
+        async for event in self.tailor.stream_tailor_resume(
             resume_text=resume_text,
             job_description=job_description,
-            tone=tone
-        )
+            tone=tone,
+            optimize_for=optimize_for
+        ):
+            if event["type"] == "done" and key is not None:
+                if not _served_by_fallback(event):
+                    await self.cache.set(key, {"content": event["content"],
+                                               "model": event.get("model"),
+                                               "usage": event["usage"]})
+                event["cache"] = "miss" if use_cache else "bypass"
+            yield event
+
+    async def tailor_batch(
+        self,
+        resume_text: str,
+        job_descriptions: List[str],
+        tone: str = "professional",
+        use_cache: bool = True,
+        concurrency: int = 5,
+        optimize_for: str = "balanced"
+    ) -> AsyncIterator[Tuple[int, Union[dict, Exception]]]:
+        """
+        Tailor one resume against many job descriptions concurrently.
+        Yields (index, result) pairs in completion order, at most
+        `concurrency` upstream calls at a time. A failed item yields its
+        exception instead of a result and does not affect the others.
+        Each result carries its own stage 'timings'.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(index: int, job_description: str):
+            # Each item runs in its own task, so it can time its own stages
+            timer = start_timer()
+            async with semaphore:
+                timer.mark("queued")
+                try:
+                    result = await self.tailor_resume(
+                        resume_text=resume_text,
+                        job_description=job_description,
+                        tone=tone,
+                        use_cache=use_cache,
+                        optimize_for=optimize_for
+                    )
+                except Exception as e:
+                    return index, e
+                return index, {**result, "timings": timer.to_dict()}
+
+        tasks = [asyncio.ensure_future(run(index, job_description))
+                 for index, job_description in enumerate(job_descriptions)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Stop outstanding calls if the consumer goes away early
+            for task in tasks:
+                task.cancel()
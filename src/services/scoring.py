@@ -0,0 +1,179 @@
+import re
+import unicodedata
+from dataclasses import dataclass, asdict, field
+from typing import Dict, FrozenSet, List
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[./-][a-z0-9+#]+)*")
+# Sentence and line boundaries; each segment is one TF-IDF "document"
+_SEGMENT = re.compile(r"\n+|(?<=[.!?;])\s+")
+# Punctuation inside a sentence that ends a phrase, so no bigram spans it
+_CLAUSE = re.compile(r"[,:;()\[\]|]|\s-\s")
+
+# Function words plus the filler every job posting uses; they break n-grams
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can
+could do does during each either etc for from had has have having he her here his
+how i if in including into is it its just may more most must my no nor not of on
+once only or other our out over own per plus same she should so some such than
+that the their them then there these they this those through to too under until
+up us very via was we were what when where which while who whom why will with
+within would you your yours
+ability able across apply candidate candidates day daily degree environment
+company end excellent experience experienced familiarity good great hiring ideal
+join knowledge looking new nice position preferred proven related required
+requirements responsibilities role seeking skills strong team teams understanding
+use using well work working year years
+""".split())
+
+# Terms counted as skills for skill coverage; single words and bigrams
+SKILLS = frozenset("""
+python java javascript typescript go golang rust ruby php scala kotlin swift c++ c#
+sql nosql bash r matlab html css react angular vue node node.js next.js django flask
+fastapi spring rails express graphql rest grpc kafka rabbitmq spark hadoop airflow
+dbt pandas numpy pytorch tensorflow scikit-learn postgresql mysql sqlite mongodb
+redis elasticsearch cassandra dynamodb snowflake bigquery aws azure gcp docker
+kubernetes terraform ansible jenkins linux git ci/cd microservices serverless
+observability prometheus grafana tableau excel figma agile scrum jira
+""".split()) | frozenset((
+    "machine learning", "deep learning", "data science", "data engineering",
+    "data analysis", "computer vision", "distributed systems", "system design",
+    "natural language", "unit testing", "test automation", "project management",
+    "product management", "cloud infrastructure", "continuous integration",
+))
+
+
+@dataclass
+class Score:
+    """How well a resume covers a job description's keywords and skills"""
+    score: float
+    keyword_coverage: float
+    skill_coverage: float
+    similarity: float
+    matched_keywords: List[str] = field(default_factory=list)
+    missing_keywords: List[str] = field(default_factory=list)
+    matched_skills: List[str] = field(default_factory=list)
+    missing_skills: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def summary(self) -> dict:
+        """The headline numbers and missing keywords, for tailoring metadata"""
+        return {
+            "score": self.score,
+            "keyword_coverage": self.keyword_coverage,
+            "skill_coverage": self.skill_coverage,
+            "missing_keywords": self.missing_keywords
+        }
+
+
+class KeywordScorer:
+    """
+    Local ATS-style match score of a resume against a job description.
+
+    Both texts are tokenized and split into segments (lines and sentences).
+    Unigrams and bigrams that do not span a stopword become terms. The
+    job description's segments form a small corpus for inverse document
+    frequency, so terms repeated throughout a posting count for less than
+    specific ones. The segment-term counts are kept as sparse (row,
+    column) index arrays and reduced with NumPy.
+
+    The job description's top_k terms by TF-IDF weight are its keywords:
+    every word, plus the phrases that are skills or recur in the posting.
+    The score (0-100) combines the weighted share of keywords the resume
+    contains, the share of the posting's skills it names, and the cosine
+    similarity of the two TF-IDF vectors. No network calls are made.
+    """
+
+    def __init__(self, top_k: int = 25, stopwords: FrozenSet[str] = STOPWORDS,
+                 skills: FrozenSet[str] = SKILLS):
+        self.top_k = top_k
+        self.stopwords = stopwords
+        self.skills = skills
+
+    def _terms(self, segment: str) -> List[str]:
+        """Unigrams and bigrams of a segment, broken at stopwords and punctuation"""
+        terms = []
+        for clause in _CLAUSE.split(segment):
+            run = []
+            for token in _TOKEN.findall(clause) + [""]:
+                if not token or token in self.stopwords or token.isdigit():
+                    terms.extend(run)
+                    terms.extend(f"{a} {b}" for a, b in zip(run, run[1:]))
+                    run = []
+                else:
+                    run.append(token)
+        return terms
+
+    def _segments(self, text: str) -> List[List[str]]:
+        text = unicodedata.normalize("NFKC", text).lower()
+        return [terms for terms in map(self._terms, _SEGMENT.split(text)) if terms]
+
+    def score(self, resume_text: str, job_description: str) -> Score:
+        import numpy as np
+
+        vocabulary: Dict[str, int] = {}
+        rows, cols, docs = [], [], []
+        for doc, text in enumerate((job_description, resume_text)):
+            for segment in self._segments(text):
+                row = len(docs)
+                docs.append(doc)
+                for term in segment:
+                    rows.append(row)
+                    cols.append(vocabulary.setdefault(term, len(vocabulary)))
+        if not vocabulary or 0 not in docs:
+            return Score(0.0, 0.0, 0.0, 0.0)
+
+        size = len(vocabulary)
+        rows, cols, docs = np.asarray(rows), np.asarray(cols), np.asarray(docs)
+        # Document frequency over the job description's segments: distinct
+        # (segment, term) pairs per term
+        in_posting = docs[rows] == 0
+        pairs = np.unique(rows[in_posting] * size + cols[in_posting])
+        df = np.bincount(pairs % size, minlength=size)
+        idf = np.log((1 + (docs == 0).sum()) / (1 + df)) + 1
+
+        # Term counts per document (job description, resume), sublinear TF
+        counts = np.zeros((2, size))
+        np.add.at(counts, (docs[rows], cols), 1)
+        weights = np.where(counts > 0, 1 + np.log(np.maximum(counts, 1)), 0) * idf
+        job, resume = weights
+        norms = np.linalg.norm(weights, axis=1)
+        similarity = float(job @ resume / (norms[0] * norms[1])) if norms.all() else 0.0
+
+        terms = np.array(list(vocabulary), dtype=object)
+        in_job = np.flatnonzero(job)
+        is_skill = np.array([term in self.skills for term in terms[in_job]], dtype=bool)
+        is_phrase = np.array([" " in term for term in terms[in_job]], dtype=bool)
+        candidates = in_job[~is_phrase | is_skill | (counts[0, in_job] > 1)]
+        # Highest weight first, then alphabetical so ties are stable
+        ranked = candidates[np.lexsort((terms[candidates], -job[candidates]))]
+        keywords = ranked[:self.top_k]
+        present = resume[keywords] > 0
+        keyword_coverage = float(job[keywords][present].sum() / job[keywords].sum())
+
+        job_skills = in_job[is_skill]
+        skill_present = resume[job_skills] > 0
+        skill_coverage = float(skill_present.mean()) if len(job_skills) else 0.0
+
+        if len(job_skills):
+            score = 0.5 * keyword_coverage + 0.3 * skill_coverage + 0.2 * similarity
+        else:
+            score = 0.7 * keyword_coverage + 0.3 * similarity
+        return Score(
+            score=round(100 * score, 1),
+            keyword_coverage=round(keyword_coverage, 3),
+            skill_coverage=round(skill_coverage, 3),
+            similarity=round(similarity, 3),
+            matched_keywords=terms[keywords[present]].tolist(),
+            missing_keywords=terms[keywords[~present]].tolist(),
+            matched_skills=sorted(terms[job_skills[skill_present]].tolist()),
+            missing_skills=sorted(terms[job_skills[~skill_present]].tolist())
+        )
+
+    def compare(self, resume_text: str, tailored_text: str,
+                job_description: str) -> Dict[str, dict]:
+        """Scores of a resume before and after tailoring"""
+        before, after = (self.score(text, job_description)
+                         for text in (resume_text, tailored_text))
+        return {"before": before.summary(), "after": after.summary()}
@@ -1,15 +1,11 @@
-from .api_config import get_openai_client
 from .file_handler import read_file
-from .env_loader import load_environment
 from .env_monitor import EnvMonitor
 from .logger import CustomLogger
 from .errors import TokenLimitError
 
 # Define what gets imported with 'from utils import *'
 __all__ = [
-    'get_openai_client',
     'read_file',
-    'load_environment',
     'EnvMonitor',
     'CustomLogger',
     'TokenLimitError'
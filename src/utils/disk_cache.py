@@ -0,0 +1,122 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+class DiskCache:
+    """
+    Size-bounded key/value store on disk, shared between worker processes.
+
+    Backed by SQLite in WAL mode so several uvicorn workers can read and
+    write the same file. Entries are evicted least-recently-used first once
+    the stored bytes exceed ``max_bytes``, and expire after ``ttl`` seconds.
+    Calls block, so async callers should run them in a thread.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, ttl: Optional[float] = None):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 connections are not shareable"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the stored value, or None if missing or expired"""
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, created FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        value, created = row
+        now = time.time()
+        if self.ttl is not None and now - created > self.ttl:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            return None
+
+        conn.execute(
+            "UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return bytes(value)
+
+    def set(self, key: str, value: bytes):
+        """Store a value and evict old entries if over the size limit"""
+        if len(value) > self.max_bytes:
+            return
+
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, created, accessed)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (key, sqlite3.Binary(value), len(value), now, now)
+        )
+        self.evict()
+
+    def delete(self, key: str):
+        """Remove a single entry"""
+        self._connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def total_bytes(self) -> int:
+        """Bytes currently stored"""
+        row = self._connection().execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return row[0]
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        conn = self._connection()
+        removed = 0
+        if self.ttl is not None:
+            removed += conn.execute(
+                "DELETE FROM entries WHERE created < ?",
+                (time.time() - self.ttl,)
+            ).rowcount
+
+        excess = self.total_bytes() - self.max_bytes
+        while excess > 0:
+            rows = conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for key, size in rows:
+                victims.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+            removed += len(victims)
+        return removed
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
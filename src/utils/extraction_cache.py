@@ -0,0 +1,54 @@
+import asyncio
+import sqlite3
+from importlib.metadata import version
+from typing import Optional
+
+from .disk_cache import DiskCache
+from .metrics import CACHE_LOOKUPS
+
+# Bump when extraction output changes for the same input bytes. Parser
+# library versions are part of the key too, so upgrading PyPDF2 or
+# python-docx never serves text produced by the old parser. Versions come
+# from package metadata so the parsers themselves aren't imported here.
+EXTRACTOR_VERSION = f"1-pypdf2{version('PyPDF2')}-docx{version('python-docx')}"
+
+
+class ExtractionCache:
+    """
+    Extracted document text keyed by the SHA-256 of the uploaded bytes.
+
+    Stored in a DiskCache, so it is bounded by bytes with LRU eviction,
+    survives restarts and is shared by all worker processes. Disk errors
+    are treated as misses.
+    """
+
+    def __init__(self, disk: DiskCache, version: str = EXTRACTOR_VERSION):
+        self.disk = disk
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, sha256: str, file_extension: str,
+            max_pages: Optional[int] = None,
+            max_chars: Optional[int] = None) -> str:
+        """Cache key for a document given the hex SHA-256 of its bytes"""
+        return f"{self.version}:{file_extension}:{max_pages}:{max_chars}:{sha256}"
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            raw = await asyncio.to_thread(self.disk.get, key)
+        except sqlite3.Error:
+            raw = None
+        if raw is None:
+            self.misses += 1
+            CACHE_LOOKUPS.inc(cache="extraction", result="miss")
+            return None
+        self.hits += 1
+        CACHE_LOOKUPS.inc(cache="extraction", result="hit")
+        return raw.decode("utf-8")
+
+    async def set(self, key: str, text: str):
+        try:
+            await asyncio.to_thread(self.disk.set, key, text.encode("utf-8"))
+        except sqlite3.Error:
+            pass
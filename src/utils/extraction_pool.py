@@ -0,0 +1,149 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional, Set
+
+
+def _serve(conn):
+    """Worker loop: run each (fn, args) received and send back the outcome"""
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        fn, args = task
+        try:
+            outcome = (True, fn(*args))
+        except BaseException as e:
+            outcome = (False, e)
+        try:
+            conn.send(outcome)
+        except Exception as e:
+            # The result or exception would not pickle
+            conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self):
+        self.process.kill()
+
+    def close(self, timeout: Optional[float] = None):
+        self.process.join(timeout)
+        self.conn.close()
+
+
+class _Call:
+    """One task's claim on a worker, shared by the loop and the thread running it"""
+    __slots__ = ("worker", "abandoned")
+
+    def __init__(self):
+        self.worker: Optional[_Worker] = None
+        self.abandoned = False
+
+
+class ExtractionPool:
+    """
+    Worker processes for document parsing, each running one task at a time.
+
+    Unlike ProcessPoolExecutor, a running task can be abandoned: when the
+    coroutine awaiting ``run`` is cancelled (as ``asyncio.wait_for`` does
+    on timeout), the process running that task is killed and the next
+    task starts a replacement. A parser stuck on a hostile file therefore
+    never holds a worker, and tasks in the other workers carry on.
+
+    Each task is driven by a thread of a private pool of ``max_workers``
+    threads, which caps how many run at once and queues the rest. Tasks
+    are pickled by reference, so ``fn`` must be a module-level function.
+    """
+
+    def __init__(self, max_workers: int, mp_context=None):
+        self.max_workers = max_workers
+        # spawn: forking a process that already runs threads is unsafe
+        self._context = mp_context or multiprocessing.get_context("spawn")
+        self._threads = ThreadPoolExecutor(max_workers, thread_name_prefix="extraction")
+        self._lock = threading.Lock()
+        self._idle: List[_Worker] = []
+        self._busy: Set[_Worker] = set()
+        self._closed = False
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) in a worker process and return its result.
+
+        Raises:
+            BrokenProcessPool: If the worker died while running the task
+        """
+        call = _Call()
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._threads, self._call, call, fn, args)
+        except asyncio.CancelledError:
+            with self._lock:
+                call.abandoned = True
+                worker = call.worker
+            if worker is not None:
+                worker.kill()
+            raise
+
+    def _call(self, call: _Call, fn: Callable, args: tuple) -> Any:
+        with self._lock:
+            if call.abandoned or self._closed:
+                raise BrokenProcessPool("Extraction pool is shut down")
+            worker = self._idle.pop() if self._idle else None
+        if worker is None:
+            worker = _Worker(self._context)
+        with self._lock:
+            if call.abandoned or self._closed:
+                # Cancelled while the worker was starting
+                self._idle.append(worker)
+                raise BrokenProcessPool("Extraction task was abandoned")
+            self._busy.add(worker)
+            call.worker = worker
+        try:
+            worker.conn.send((fn, args))
+            ok, value = worker.conn.recv()
+        except (EOFError, OSError):
+            with self._lock:
+                self._busy.discard(worker)
+            worker.kill()
+            worker.close()
+            raise BrokenProcessPool("An extraction worker died while running a task")
+
+        with self._lock:
+            self._busy.discard(worker)
+            call.worker = None
+            closed = self._closed
+            if not closed:
+                self._idle.append(worker)
+        if closed:
+            worker.kill()
+            worker.close()
+        if ok:
+            return value
+        raise value
+
+    def shutdown(self):
+        """Stop idle workers and kill busy ones; running tasks fail"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            busy = list(self._busy)
+        for worker in busy:
+            worker.kill()
+        for worker in idle:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                worker.kill()
+            worker.close(timeout=5)
+        self._threads.shutdown(wait=False, cancel_futures=True)
@@ -1,9 +1,26 @@
 import aiofiles
+import asyncio
+import mmap
+import time
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from pathlib import Path
-from typing import BinaryIO
-import PyPDF2
-import docx
+from typing import BinaryIO, List, Optional, Tuple
 from io import BytesIO
+from config.production import ProductionSettings
+from .disk_cache import DiskCache
+from .extraction_cache import ExtractionCache
+from .extraction_pool import ExtractionPool
+from .metrics import EXTRACTION_LATENCY
+from .timing import stage
+from .pdf_extraction import extract_pdf, join_pages
+from .upload import SpooledUpload, peak_rss_kb, spool_upload
+
+SUPPORTED_EXTENSIONS = ('.txt', '.pdf', '.docx')
+
+# Created on first use so importing this module never forks
+_extraction_pool: Optional[ExtractionPool] = None
+_extraction_cache: Optional[ExtractionCache] = None
 
 
 async def read_file_async(file_path: Path) -> str:
@@ -17,26 +34,46 @@ def read_file(file_path: Path) -> str:
     return file_path.read_text()
 
 
-def extract_text_from_pdf(file: BinaryIO) -> str:
-    """Extract text from PDF file."""
+def _random_access(file: BinaryIO) -> BinaryIO:
+    """Parsers need seek(); only buffer streams that can't provide it"""
+    if isinstance(file, mmap.mmap):
+        return file
+    try:
+        if file.seekable():
+            return file
+    except AttributeError:
+        pass
     # Read the file content into BytesIO for compatibility
-    content = file.read()
-    file_like = BytesIO(content)
+    return BytesIO(file.read())
+
+
+def extract_text_from_pdf(file: BinaryIO, max_pages: Optional[int] = None,
+                          max_chars: Optional[int] = None) -> str:
+    """Extract text from PDF file, stopping after max_chars of text."""
+    # Parsers are imported on first use (in the extraction workers) so
+    # they don't slow down app start-up
+    import PyPDF2
 
-    pdf_reader = PyPDF2.PdfReader(file_like)
-    text = ""
+    pdf_reader = PyPDF2.PdfReader(_random_access(file))
+    if max_pages is not None and len(pdf_reader.pages) > max_pages:
+        raise ValueError(
+            f"PDF has {len(pdf_reader.pages)} pages; at most {max_pages} are supported")
+    texts = []
+    chars = 0
     for page in pdf_reader.pages:
-        text += page.extract_text() + "\n"
-    return text.strip()
+        texts.append(page.extract_text())
+        chars += len(texts[-1])
+        if max_chars and chars >= max_chars:
+            break
+    text = join_pages(texts)
+    return text[:max_chars] if max_chars else text
 
 
 def extract_text_from_docx(file: BinaryIO) -> str:
     """Extract text from DOCX file."""
-    # Read the file content into BytesIO for compatibility
-    content = file.read()
-    file_like = BytesIO(content)
+    import docx
 
-    doc = docx.Document(file_like)
+    doc = docx.Document(_random_access(file))
     text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
     return text.strip()
 
@@ -49,28 +86,200 @@ def extract_text_from_txt(file: BinaryIO) -> str:
     return content.strip()
 
 
-async def extract_text_from_file(file: BinaryIO, filename: str) -> str:
+@dataclass
+class ExtractedDocument:
+    """Text extracted from an upload, with what it cost to get it"""
+    text: str
+    filename: str
+    size_bytes: int
+    sha256: str
+    cached: bool
+    peak_rss_kb: Optional[int] = None
+    pages: Optional[int] = None
+    page_seconds: Optional[List[float]] = None
+    truncated: bool = False
+
+    def stats(self) -> dict:
+        """Summary for response metadata"""
+        stats = {
+            "filename": self.filename,
+            "size_bytes": self.size_bytes,
+            "cached": self.cached,
+            "peak_rss_kb": self.peak_rss_kb
+        }
+        if self.pages is not None:
+            stats["pages"] = self.pages
+            stats["truncated"] = self.truncated
+            stats["page_timings_ms"] = [
+                round(seconds * 1000, 1) for seconds in self.page_seconds]
+        return stats
+
+
+def _extract_path(path: str, file_extension: str) -> Tuple[str, Optional[int]]:
+    """
+    Extract text from a spooled DOCX or TXT upload; runs in an extraction
+    worker. Returns the text and the worker's peak RSS so memory use is
+    observable. PDFs go through pdf_extraction, a batch of pages at a time.
+    """
+    with open(path, 'rb') as f:
+        if file_extension == '.docx':
+            # zipfile needs seekable(), which mmap lacks; the file itself
+            # is just as copy-free
+            text = extract_text_from_docx(f)
+        else:
+            text = extract_text_from_txt(f)
+    return text, peak_rss_kb()
+
+
+def get_extraction_pool() -> Optional[ExtractionPool]:
+    """
+    Process pool that PDF/DOCX parsing runs in, sized by EXTRACTION_WORKERS.
+    Returns None when EXTRACTION_WORKERS is 0, meaning parse in a thread.
+    """
+    global _extraction_pool
+    if _extraction_pool is None and ProductionSettings.EXTRACTION_WORKERS > 0:
+        _extraction_pool = ExtractionPool(ProductionSettings.EXTRACTION_WORKERS)
+    return _extraction_pool
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """Shared cache of extracted text, or None if EXTRACTION_CACHE_ENABLED is off"""
+    global _extraction_cache
+    if _extraction_cache is None and ProductionSettings.EXTRACTION_CACHE_ENABLED:
+        _extraction_cache = ExtractionCache(DiskCache(
+            Path(ProductionSettings.CACHE_DIR) / "extractions.sqlite3",
+            max_bytes=ProductionSettings.EXTRACTION_CACHE_MAX_BYTES
+        ))
+    return _extraction_cache
+
+
+def shutdown_extraction_pool():
+    """Stop the extraction worker processes (at application shutdown)"""
+    global _extraction_pool
+    pool, _extraction_pool = _extraction_pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+async def extract_document(file: BinaryIO, filename: str,
+                           max_bytes: Optional[int] = None,
+                           timeout: Optional[float] = None,
+                           max_pages: Optional[int] = None,
+                           max_chars: Optional[int] = None) -> ExtractedDocument:
     """
     Extract text from uploaded file based on extension.
 
+    The upload is streamed to a temp file in chunks (never held in memory
+    whole) and the extraction worker reads it from there. Parsing runs in
+    the extraction process pool so a large document never blocks the event
+    loop; long PDFs are split across several workers. The text is cached
+    by content hash so a re-uploaded document is not parsed again.
+
     Args:
         file: Binary file object
         filename: Name of the file with extension
+        max_bytes: Reject uploads larger than this many bytes
+        timeout: Seconds to wait for extraction (default EXTRACTION_TIMEOUT)
+        max_pages: Largest PDF accepted (default EXTRACTION_MAX_PAGES)
+        max_chars: Stop reading PDF pages after this much text
+            (default EXTRACTION_MAX_CHARS; 0 reads every page)
 
     Returns:
-        Extracted text content
+        The extracted document
 
     Raises:
-        ValueError: If file type is not supported
+        UploadTooLargeError: If the upload is larger than max_bytes
+        ValueError: If file type is not supported, the file is empty, the
+            document is too long or extraction times out
     """
     file_extension = Path(filename).suffix.lower()
 
-    if file_extension == '.pdf':
-        return extract_text_from_pdf(file)
-    elif file_extension == '.docx':
-        return extract_text_from_docx(file)
-    elif file_extension == '.txt':
-        return extract_text_from_txt(file)
-    else:
+    if file_extension not in SUPPORTED_EXTENSIONS:
         raise ValueError(
             f"Unsupported file type: {file_extension}. Supported types: .txt, .pdf, .docx")
+
+    if timeout is None:
+        timeout = ProductionSettings.EXTRACTION_TIMEOUT
+    if max_pages is None:
+        max_pages = ProductionSettings.EXTRACTION_MAX_PAGES
+    if max_chars is None:
+        max_chars = ProductionSettings.EXTRACTION_MAX_CHARS
+
+    with stage("upload"):
+        spooled = await asyncio.to_thread(spool_upload, file, filename, max_bytes)
+    with spooled as upload:
+        if upload.size == 0:
+            raise ValueError(f"{filename} is empty")
+
+        # The same document is often uploaded again with a different JD
+        cache = get_extraction_cache()
+        if cache is not None:
+            cache_key = cache.key(upload.sha256, file_extension,
+                                  max_pages, max_chars)
+            with stage("extraction_cache"):
+                cached = await cache.get(cache_key)
+            if cached is not None:
+                return ExtractedDocument(cached, filename, upload.size,
+                                         upload.sha256, cached=True)
+
+        started = time.perf_counter()
+        with stage("extraction"):
+            document = await _extract_in_pool(
+                upload, file_extension, timeout, max_pages, max_chars)
+        EXTRACTION_LATENCY.observe(time.perf_counter() - started,
+                                   file_type=file_extension.lstrip("."))
+        if cache is not None:
+            await cache.set(cache_key, document.text)
+        return document
+
+
+async def extract_text_from_file(file: BinaryIO, filename: str,
+                                 timeout: Optional[float] = None,
+                                 max_pages: Optional[int] = None) -> str:
+    """Extract text from uploaded file based on extension (see extract_document)."""
+    document = await extract_document(file, filename, timeout=timeout,
+                                      max_pages=max_pages)
+    return document.text
+
+
+async def _extract_in_pool(upload: SpooledUpload, file_extension: str,
+                           timeout: float, max_pages: Optional[int],
+                           max_chars: Optional[int]) -> ExtractedDocument:
+    path = str(upload.path)
+    if file_extension == '.txt':
+        # Decoding is cheap enough for a thread
+        text, peak_rss = await asyncio.to_thread(_extract_path, path, file_extension)
+        return ExtractedDocument(text, upload.filename, upload.size, upload.sha256,
+                                 cached=False, peak_rss_kb=peak_rss)
+
+    pool = get_extraction_pool()
+
+    def submit(fn, *args):
+        if pool is None:
+            return asyncio.to_thread(fn, *args)
+        return pool.run(fn, *args)
+
+    try:
+        if file_extension == '.pdf':
+            pdf = await asyncio.wait_for(extract_pdf(
+                path, submit,
+                pages_per_task=ProductionSettings.EXTRACTION_PAGES_PER_TASK,
+                max_pages=max_pages,
+                max_chars=max_chars
+            ), timeout)
+            return ExtractedDocument(
+                pdf.text, upload.filename, upload.size, upload.sha256,
+                cached=False, peak_rss_kb=pdf.peak_rss_kb, pages=pdf.page_count,
+                page_seconds=pdf.page_seconds, truncated=pdf.truncated)
+
+        text, peak_rss = await asyncio.wait_for(
+            submit(_extract_path, path, file_extension), timeout)
+        return ExtractedDocument(text, upload.filename, upload.size, upload.sha256,
+                                 cached=False, peak_rss_kb=peak_rss)
+    except asyncio.TimeoutError:
+        # Cancelling the stuck task killed only the worker running it
+        raise ValueError(
+            f"Timed out after {timeout:.0f}s extracting text from {upload.filename}")
+    except BrokenProcessPool:
+        # The worker died (e.g. killed for memory); the pool replaces it
+        raise ValueError(f"Could not extract text from {upload.filename}")
@@ -0,0 +1,85 @@
+import importlib.util
+import time
+from typing import Optional
+
+import httpx
+
+# HTTP/2 needs the optional h2 package
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """
+    httpx transport that records how long requests wait for a connection.
+
+    Wait time runs from the request entering the pool until its headers
+    start going out, minus any time spent opening a new connection, so it
+    measures pool starvation rather than network latency. Timings come
+    from httpcore's trace hooks.
+    """
+
+    def __init__(self, limits: httpx.Limits, http2: bool = False, **kwargs):
+        super().__init__(limits=limits, http2=http2 and HTTP2_AVAILABLE, **kwargs)
+        self.limits = limits
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.requests = 0
+        self.waiting = 0
+        self.connects = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        entered = time.perf_counter()
+        connecting_since: Optional[float] = None
+        connect_time = 0.0
+        waiting = True
+        outer_trace = request.extensions.get("trace")
+        self.requests += 1
+        self.waiting += 1
+
+        def done_waiting():
+            nonlocal waiting
+            if waiting:
+                waiting = False
+                self.waiting -= 1
+
+        async def trace(event: str, info: dict):
+            nonlocal connecting_since, connect_time
+            if event == "connection.connect_tcp.started":
+                connecting_since = time.perf_counter()
+                self.connects += 1
+            elif event.endswith(("connect_tcp.complete", "start_tls.complete")):
+                if connecting_since is not None:
+                    connect_time = time.perf_counter() - connecting_since
+            elif event.endswith("send_request_headers.started") and waiting:
+                done_waiting()
+                wait = max(0.0, time.perf_counter() - entered - connect_time)
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            if outer_trace is not None:
+                await outer_trace(event, info)
+
+        request.extensions["trace"] = trace
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            done_waiting()
+
+    def stats(self) -> dict:
+        """Connection pool state and wait times since start-up"""
+        connections = list(getattr(self._pool, "connections", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "connections": len(connections),
+            "active": len(connections) - idle,
+            "idle": idle,
+            "waiting": self.waiting,
+            "requests": self.requests,
+            "connects": self.connects,
+            "wait_ms_avg": round(self.total_wait / self.requests * 1000, 2)
+            if self.requests else 0.0,
+            "wait_ms_max": round(self.max_wait * 1000, 2)
+        }
+
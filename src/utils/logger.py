@@ -1,42 +1,155 @@
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
-from pathlib import Path
-from datetime import datetime
+import queue
+import random
+import threading
+import time
 import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Optional, Tuple
 
+from config.production import ProductionSettings
 
-class CustomLogger:
-    """Custom logger with rotation capabilities"""
+# Every CustomLogger logs through a child of this logger, which owns the
+# one set of handlers
+ROOT_LOGGER = "resume_tailor"
 
-    def __init__(self,
-                 name: str = "resume_tailor",
-                 log_dir: str = None,
-                 max_bytes: int = 10_000_000,  # 10MB
-                 backup_count: int = 5):
+# Context values in error logs are cut to this many characters, so a failed
+# request does not copy a whole resume into the log
+MAX_CONTEXT_VALUE_CHARS = 200
 
-        # Create logs directory if not specified
-        if log_dir is None:
-            log_dir = Path(__file__).parent.parent.parent / 'logs'
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
 
-        log_dir = Path(log_dir)
-        log_dir.mkdir(exist_ok=True)
 
-        # Create logger
-        self.logger = logging.getLogger(name)
-        self.logger.setLevel(logging.DEBUG)
+def set_request_context(request_id: Optional[str] = None,
+                        correlation_id: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Set the ids logged with every record of the current request.
 
-        # Enhanced formatter with more details
-        file_formatter = logging.Formatter(
-            '%(asctime)s.%(msecs)03d - %(request_id)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        console_formatter = logging.Formatter(
-            '%(levelname)s: %(message)s'
-        )
+    Lives in contextvars, so concurrent requests (and the tasks they
+    spawn) each see their own. The correlation id defaults to the request
+    id when the caller did not send one.
+    """
+    request_id = request_id or uuid.uuid4().hex
+    correlation_id = correlation_id or request_id
+    _request_id.set(request_id)
+    _correlation_id.set(correlation_id)
+    return request_id, correlation_id
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def get_correlation_id() -> Optional[str]:
+    return _correlation_id.get()
+
+
+class ContextFilter(logging.Filter):
+    """Stamp records with the current request and correlation ids"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get() or "-"
+        record.correlation_id = _correlation_id.get() or "-"
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "correlation_id": getattr(record, "correlation_id", "-"),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class PayloadSampler:
+    """
+    Decides whether a request payload is logged.
+
+    Logs a ``rate`` fraction of payloads, and never more than
+    ``max_per_second`` of them, so logging stays cheap under load.
+    """
+
+    def __init__(self, rate: float = 1.0, max_per_second: float = 10.0):
+        self.rate = rate
+        self.max_per_second = max_per_second
+        self._tokens = max_per_second
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def allow(self) -> bool:
+        if self.rate < 1.0 and random.random() >= self.rate:
+            return False
+        if self.max_per_second <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.max_per_second,
+                               self._tokens + (now - self._updated) * self.max_per_second)
+            self._updated = now
+            if self._tokens < 1:
+                self.dropped += 1
+                return False
+            self._tokens -= 1
+            return True
+
+
+_listener: Optional[QueueListener] = None
+_log_dir: Optional[Path] = None
+_configure_lock = threading.Lock()
+
+
+def configure_logging(log_dir: Optional[Path] = None,
+                      max_bytes: int = 10_000_000,
+                      backup_count: int = 5) -> logging.Logger:
+    """
+    Install the logging pipeline once per process; later calls are no-ops.
+
+    Loggers under ROOT_LOGGER only put records on a queue. A background
+    thread (QueueListener) formats them and writes the rotating file and
+    the console, so the event loop never waits on disk I/O.
+    """
+    global _listener, _log_dir
+    root = logging.getLogger(ROOT_LOGGER)
+    with _configure_lock:
+        if _listener is not None:
+            return root
+
+        log_dir = Path(log_dir or ProductionSettings.LOG_DIR)
+        log_dir.mkdir(parents=True, exist_ok=True)
+        _log_dir = log_dir
+
+        if ProductionSettings.LOG_FORMAT == "json":
+            file_formatter = console_formatter = JsonFormatter()
+        else:
+            file_formatter = logging.Formatter(
+                '%(asctime)s.%(msecs)03d - %(request_id)s - %(correlation_id)s'
+                ' - %(name)s - %(levelname)s - %(message)s',
+                datefmt='%Y-%m-%d %H:%M:%S'
+            )
+            console_formatter = logging.Formatter('%(levelname)s: %(message)s')
 
         # File handler with rotation
         file_handler = RotatingFileHandler(
-            log_dir / f"{name}.log",
+            log_dir / f"{ROOT_LOGGER}.log",
             maxBytes=max_bytes,
             backupCount=backup_count
         )
@@ -46,25 +159,81 @@ class CustomLogger:
         # Console handler
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(console_formatter)
-        console_handler.setLevel(logging.INFO)
+        console_handler.setLevel(ProductionSettings.LOG_LEVEL.upper())
+
+        # Ids are read by the filter in the thread that logs, before the
+        # record is queued
+        queue_handler = QueueHandler(queue.SimpleQueue())
+        queue_handler.addFilter(ContextFilter())
+
+        root.setLevel(logging.DEBUG)
+        root.addHandler(queue_handler)
+        _listener = QueueListener(queue_handler.queue, file_handler, console_handler,
+                                  respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return root
+
+
+def shutdown_logging():
+    """Write out queued records and stop the logging thread"""
+    global _listener
+    with _configure_lock:
+        listener, _listener = _listener, None
+        if listener is None:
+            return
+        listener.stop()
+        root = logging.getLogger(ROOT_LOGGER)
+        for handler in list(root.handlers):
+            if isinstance(handler, QueueHandler):
+                root.removeHandler(handler)
+        for handler in listener.handlers:
+            handler.close()
+
+
+_payload_sampler = PayloadSampler(ProductionSettings.LOG_PAYLOAD_SAMPLE_RATE,
+                                  ProductionSettings.LOG_PAYLOAD_MAX_PER_SECOND)
 
-        # Add handlers
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
 
-        self.request_id = None
+def _trim_context(context: dict) -> dict:
+    trimmed = {}
+    for key, value in context.items():
+        if isinstance(value, str) and len(value) > MAX_CONTEXT_VALUE_CHARS:
+            value = f"{value[:MAX_CONTEXT_VALUE_CHARS]}... ({len(value)} chars)"
+        trimmed[key] = value
+    return trimmed
 
-    def set_request_context(self, request_id=None):
+
+class CustomLogger:
+    """
+    Logger for one module, writing through the shared queued pipeline.
+
+    Creating any number of these is cheap and adds no handlers: they are
+    installed once per process by configure_logging.
+    """
+
+    def __init__(self,
+                 name: str = ROOT_LOGGER,
+                 log_dir: str = None,
+                 max_bytes: int = 10_000_000,  # 10MB
+                 backup_count: int = 5):
+        configure_logging(log_dir, max_bytes, backup_count)
+        if name != ROOT_LOGGER and not name.startswith(ROOT_LOGGER + "."):
+            name = f"{ROOT_LOGGER}.{name}"
+        self.logger = logging.getLogger(name)
+
+    @property
+    def request_id(self) -> Optional[str]:
+        return get_request_id()
+
+    def set_request_context(self, request_id=None, correlation_id=None):
         """Set request context for the current operation"""
-        self.request_id = request_id or str(uuid.uuid4())
-        # Add request_id to logger's extra fields
-        self.logger = logging.LoggerAdapter(
-            self.logger,
-            {'request_id': self.request_id}
-        )
+        return set_request_context(request_id, correlation_id)
 
     def log_request(self, data: dict):
-        """Log API request data with structured format"""
+        """Log API request data with structured format (sampled)"""
+        if not _payload_sampler.allow():
+            return
         request_data = {
             'timestamp': datetime.utcnow().isoformat(),
             'request_id': self.request_id,
@@ -75,14 +244,15 @@ class CustomLogger:
         self.logger.info(f"Request: {request_data}")
 
     def log_response(self, data: dict):
-        """Log API response data"""
-        self.logger.info(f"Response sent: {data}")
+        """Log API response data (sampled)"""
+        if _payload_sampler.allow():
+            self.logger.info(f"Response sent: {data}")
 
     def log_error(self, error: Exception, context: dict = None):
-        """Log error with context"""
+        """Log error with context; long context values are shortened"""
         error_msg = f"Error occurred: {str(error)}"
         if context:
-            error_msg += f" | Context: {context}"
+            error_msg += f" | Context: {_trim_context(context)}"
         self.logger.error(error_msg, exc_info=True)
 
     def log_api_usage(self, response_data: dict):
@@ -107,7 +277,7 @@ class CustomLogger:
 
     def cleanup_old_logs(self, max_days: int = 30):
         """Clean up log files older than max_days"""
-        log_dir = Path(self.logger.handlers[0].baseFilename).parent
+        log_dir = _log_dir or Path(ProductionSettings.LOG_DIR)
         current_time = datetime.now().timestamp()
 
         for log_file in log_dir.glob("*.log*"):
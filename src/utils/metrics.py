@@ -0,0 +1,281 @@
+import asyncio
+import json
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config.production import ProductionSettings
+
+LabelValues = Tuple[str, ...]
+
+# Bucket upper bounds in seconds
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 90, 120)
+EXTRACTION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Metric:
+    """A named family of samples, one per combination of label values"""
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> LabelValues:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {json.dumps(key): value for key, value in self.values.items()}
+
+
+class Gauge(Counter):
+    """A value that goes up and down; summed across live workers"""
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (),
+                 buckets: Iterable[float] = HTTP_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (not cumulative), +Inf count, sum]
+        self.values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * len(self.buckets), 0, 0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+                    break
+            else:
+                state[1] += 1
+            state[2] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {json.dumps(key): [list(counts), inf, total]
+                    for key, (counts, inf, total) in self.values.items()}
+
+
+class MetricsRegistry:
+    """
+    Metrics for this process, exported in Prometheus text format.
+
+    Each uvicorn worker keeps its own registry and periodically writes a
+    snapshot to ``<directory>/<pid>.json``. A scrape, answered by whichever
+    worker receives it, merges every snapshot: counters and histograms from
+    all workers (including ones that have exited, so totals never go
+    backwards) and gauges from live workers only. Without a directory only
+    this process's metrics are exported.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = Path(directory) if directory else None
+        self.metrics: Dict[str, Metric] = {}
+        self._flusher: Optional[asyncio.Task] = None
+
+    def _register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Iterable[str] = (),
+                  buckets: Iterable[float] = HTTP_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def snapshot(self) -> dict:
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def flush(self):
+        """Write this process's snapshot for the other workers to read"""
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{os.getpid()}.json"
+        temp = path.with_suffix(".tmp")
+        temp.write_text(json.dumps(self.snapshot()))
+        os.replace(temp, path)
+
+    def start(self, interval: float):
+        """Flush every interval seconds until close(); scrapes see data at most that old"""
+        if self.directory is not None and self._flusher is None:
+            self._flusher = asyncio.get_running_loop().create_task(
+                self._flush_loop(interval))
+
+    async def _flush_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except OSError:
+                pass
+
+    async def close(self):
+        """Stop flushing and write a final snapshot"""
+        flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            flusher.cancel()
+            try:
+                await flusher
+            except asyncio.CancelledError:
+                pass
+        try:
+            self.flush()
+        except OSError:
+            pass
+
+    def _snapshots(self) -> List[Tuple[dict, bool]]:
+        """(snapshot, worker is alive) for every worker that has flushed"""
+        if self.directory is None:
+            return [(self.snapshot(), True)]
+        self.flush()
+        snapshots = []
+        for path in self.directory.glob("*.json"):
+            if not path.stem.isdigit():
+                continue
+            try:
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                # Removed or half-written by a worker that just exited
+                continue
+            snapshots.append((snapshot, _alive(int(path.stem))))
+        return snapshots
+
+    def render(self) -> str:
+        """All workers' metrics in Prometheus text exposition format"""
+        snapshots = self._snapshots()
+        lines = []
+        for name, metric in self.metrics.items():
+            merged: Dict[str, object] = {}
+            for snapshot, alive in snapshots:
+                if metric.kind == "gauge" and not alive:
+                    continue
+                for key, value in snapshot.get(name, {}).items():
+                    merged[key] = _merge(merged.get(key), value)
+
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key in sorted(merged):
+                labels = dict(zip(metric.labels, json.loads(key)))
+                value = merged[key]
+                if metric.kind != "histogram":
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                counts, inf, total = value
+                cumulative = 0
+                for bound, count in zip(metric.buckets, counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels, le=_number(bound))} {cumulative}")
+                cumulative += inf
+                lines.append(f"{name}_bucket{_labels(labels, le='+Inf')} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge(current, value):
+    if current is None:
+        return value
+    if isinstance(value, list):
+        return [[a + b for a, b in zip(current[0], value[0])],
+                current[1] + value[1], current[2] + value[2]]
+    return current + value
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict, **extra) -> str:
+    pairs = {**labels, **extra}
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+registry = MetricsRegistry(ProductionSettings.METRICS_DIR or None)
+
+REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route, method and status",
+    ("route", "method", "status"))
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds",
+    "Time from request received to last response byte sent, by route",
+    ("route", "method"))
+IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "Requests being handled right now")
+LLM_LATENCY = registry.histogram(
+    "llm_request_duration_seconds",
+    "OpenAI completion calls, including retries, by model and outcome",
+    ("model", "outcome"), buckets=LLM_BUCKETS)
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "Tokens sent to and received from OpenAI",
+    ("model", "direction"))
+LLM_COST = registry.counter(
+    "llm_cost_usd_total", "Estimated OpenAI spend in USD", ("model",))
+EXTRACTION_LATENCY = registry.histogram(
+    "extraction_duration_seconds",
+    "Text extraction time for uploads that were not cached, by file type",
+    ("file_type",), buckets=EXTRACTION_BUCKETS)
+COALESCED_REQUESTS = registry.counter(
+    "coalesced_requests_total",
+    "Tailoring calls by role: leader made the OpenAI call, follower shared "
+    "one already in flight", ("role",))
+CACHE_LOOKUPS = registry.counter(
+    "cache_lookups_total",
+    "Cache lookups by cache and result; hit ratio is hit / (hit + miss)",
+    ("cache", "result"))
@@ -0,0 +1,104 @@
+import asyncio
+import gzip
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+
+class OutputStore:
+    """
+    Directory of saved tailored resumes.
+
+    Files are named by the SHA-256 of their content, so concurrent saves
+    never collide and saving the same resume twice keeps one file. Each
+    write goes to a temp file in the same directory and is renamed into
+    place, so readers never see a partial file. Blocking work runs in a
+    thread. Old files are pruned by age and count, at most once per
+    ``prune_interval`` seconds.
+    """
+
+    def __init__(self,
+                 base_path: Path,
+                 prefix: str = "tailored_resume_",
+                 compress: bool = False,
+                 max_files: Optional[int] = None,
+                 max_age: Optional[float] = None,
+                 prune_interval: float = 60.0):
+        self.base_path = Path(base_path)
+        self.prefix = prefix
+        self.compress = compress
+        self.max_files = max_files
+        self.max_age = max_age
+        self.prune_interval = prune_interval
+        self._last_prune = 0.0
+
+    @property
+    def suffix(self) -> str:
+        return ".txt.gz" if self.compress else ".txt"
+
+    def path_for(self, content: str) -> Path:
+        """Where content is (or would be) stored"""
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+        return self.base_path / f"{self.prefix}{digest}{self.suffix}"
+
+    async def save(self, content: str) -> Path:
+        """Store content and return its path"""
+        path = await asyncio.to_thread(self._write, content)
+        await self._maybe_prune()
+        return path
+
+    def _write(self, content: str) -> Path:
+        path = self.path_for(content)
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        data = content.encode("utf-8")
+        if self.compress:
+            data = gzip.compress(data)
+
+        tmp = tempfile.NamedTemporaryFile(
+            dir=self.base_path, prefix=".tmp-", suffix=self.suffix, delete=False)
+        try:
+            with tmp:
+                tmp.write(data)
+            os.replace(tmp.name, path)
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+        return path
+
+    def prune(self) -> int:
+        """Delete files past max_age, then the oldest beyond max_files"""
+        now = time.time()
+        files = []
+        for path in self.base_path.glob(f"{self.prefix}*"):
+            try:
+                files.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        files.sort(reverse=True)
+
+        doomed = []
+        if self.max_age is not None:
+            doomed += [path for mtime, path in files if now - mtime > self.max_age]
+            files = [(mtime, path) for mtime, path in files
+                     if now - mtime <= self.max_age]
+        if self.max_files is not None:
+            doomed += [path for _, path in files[self.max_files:]]
+
+        for path in doomed:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        return len(doomed)
+
+    async def _maybe_prune(self):
+        if self.max_files is None and self.max_age is None:
+            return
+        now = time.monotonic()
+        if now - self._last_prune < self.prune_interval:
+            return
+        self._last_prune = now
+        await asyncio.to_thread(self.prune)
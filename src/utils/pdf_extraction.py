@@ -0,0 +1,135 @@
+import asyncio
+import mmap
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
+from .upload import peak_rss_kb
+
+
+@dataclass
+class PageBatch:
+    """Text of a contiguous run of pages, extracted by one worker"""
+    start: int
+    texts: List[str]
+    seconds: List[float]
+    page_count: int
+    peak_rss_kb: Optional[int]
+
+    @property
+    def chars(self) -> int:
+        return sum(len(text) for text in self.texts)
+
+
+@dataclass
+class PdfText:
+    """Text of a whole PDF assembled from its page batches"""
+    text: str
+    page_count: int
+    page_seconds: List[float]
+    truncated: bool
+    peak_rss_kb: Optional[int]
+
+    @property
+    def pages_extracted(self) -> int:
+        return len(self.page_seconds)
+
+
+def join_pages(texts: List[str]) -> str:
+    """Join page texts in one allocation"""
+    return "\n".join(texts).strip()
+
+
+def extract_page_batch(path: str, start: int, stop: int,
+                       max_pages: Optional[int] = None,
+                       max_chars: Optional[int] = None) -> PageBatch:
+    """
+    Extract pages [start, stop) of the PDF at path; runs in an extraction worker.
+
+    Stops early once max_chars of text have been read.
+
+    Raises:
+        ValueError: If the PDF has more than max_pages pages
+    """
+    import PyPDF2
+
+    with open(path, 'rb') as f:
+        # Map the file so PyPDF2 reads straight from the page cache
+        # rather than from a private copy of the whole document
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            reader = PyPDF2.PdfReader(mapped)
+            page_count = len(reader.pages)
+            if max_pages is not None and page_count > max_pages:
+                raise ValueError(
+                    f"PDF has {page_count} pages; at most {max_pages} are supported")
+
+            texts, seconds = [], []
+            chars = 0
+            for index in range(start, min(stop, page_count)):
+                began = time.perf_counter()
+                text = reader.pages[index].extract_text()
+                seconds.append(time.perf_counter() - began)
+                texts.append(text)
+                chars += len(text)
+                if max_chars and chars >= max_chars:
+                    break
+    return PageBatch(start, texts, seconds, page_count, peak_rss_kb())
+
+
+async def extract_pdf(path: str,
+                      submit: Callable[..., Awaitable[PageBatch]],
+                      pages_per_task: int,
+                      max_pages: Optional[int] = None,
+                      max_chars: Optional[int] = None) -> PdfText:
+    """
+    Extract a PDF by spreading its pages across extraction workers.
+
+    The first batch runs alone: it tells us the page count and, for the
+    common one- or two-page resume, is the whole document. The remaining
+    pages are split into batches of ``pages_per_task`` that run in
+    parallel and are joined in page order. Once the text read so far
+    reaches ``max_chars``, batches not yet started are cancelled.
+
+    Args:
+        path: Spooled PDF file
+        submit: Runs ``extract_page_batch(*args)`` in a worker and awaits it
+        pages_per_task: Pages extracted per worker task
+        max_pages: Reject PDFs with more pages than this
+        max_chars: Stop reading pages after this much text (falsy: no limit)
+    """
+    pages_per_task = max(1, pages_per_task)
+    first = await submit(extract_page_batch, path, 0, pages_per_task,
+                         max_pages, max_chars)
+    batches = [first]
+    chars = first.chars
+
+    if not (max_chars and chars >= max_chars) and first.page_count > pages_per_task:
+        pending = [
+            asyncio.ensure_future(submit(extract_page_batch, path, start,
+                                         start + pages_per_task, None, max_chars))
+            for start in range(pages_per_task, first.page_count, pages_per_task)
+        ]
+        try:
+            for future in pending:
+                batch = await future
+                batches.append(batch)
+                chars += batch.chars
+                if max_chars and chars >= max_chars:
+                    break
+        finally:
+            for future in pending:
+                future.cancel()
+                # Nobody awaits the rest; don't let their errors go unretrieved
+                future.add_done_callback(
+                    lambda f: f.cancelled() or f.exception())
+
+    texts = [text for batch in batches for text in batch.texts]
+    seconds = [s for batch in batches for s in batch.seconds]
+    text = join_pages(texts)
+    truncated = len(texts) < first.page_count
+    if max_chars and len(text) > max_chars:
+        text = text[:max_chars]
+        truncated = True
+    rss = [batch.peak_rss_kb for batch in batches if batch.peak_rss_kb is not None]
+    return PdfText(text, first.page_count, seconds, truncated,
+                   max(rss) if rss else None)
@@ -0,0 +1,79 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+
+class StageTimer:
+    """
+    Time spent in each stage of one request.
+
+    Repeated stages accumulate, and stages that run concurrently (the resume
+    and job description extracting at once) each count their own time, so
+    the stages can add up to more than the total.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def mark(self, name: str):
+        """Record the time since the request started as stage name"""
+        self.stages[name] = time.perf_counter() - self.started
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def to_dict(self) -> dict:
+        """Stage durations in milliseconds, plus the total so far"""
+        timings = {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()}
+        timings["total"] = round(self.elapsed() * 1000, 2)
+        return timings
+
+    def server_timing(self) -> str:
+        """The stages as a Server-Timing header value"""
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.to_dict().items())
+
+
+_timer: ContextVar[Optional[StageTimer]] = ContextVar("stage_timer", default=None)
+
+
+def start_timer() -> StageTimer:
+    """Start timing stages for the current request (or task) and its children"""
+    timer = StageTimer()
+    _timer.set(timer)
+    return timer
+
+
+def current_timer() -> Optional[StageTimer]:
+    return _timer.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as stage name; a no-op outside a timed request"""
+    timer = _timer.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+
+def mark(name: str):
+    """Record the time since the request started as stage name"""
+    timer = _timer.get()
+    if timer is not None:
+        timer.mark(name)
+
+
+def timings() -> Optional[dict]:
+    """The current request's stage timings, for response metadata"""
+    timer = _timer.get()
+    return timer.to_dict() if timer is not None else None
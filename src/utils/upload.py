@@ -0,0 +1,90 @@
+import hashlib
+import os
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Bytes copied per read while spooling; bounds per-upload memory in the API process
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds its byte cap"""
+
+    def __init__(self, filename: str, max_bytes: int):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        super().__init__(
+            f"{filename} is larger than the {max_bytes} byte upload limit")
+
+
+@dataclass
+class SpooledUpload:
+    """An upload copied to a named temp file that extraction workers can open"""
+    path: Path
+    filename: str
+    size: int
+    sha256: str
+
+    def close(self):
+        """Delete the temp file"""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def spool_upload(file: BinaryIO, filename: str,
+                 max_bytes: Optional[int] = None) -> SpooledUpload:
+    """
+    Stream an upload to a named temp file in fixed-size chunks.
+
+    The content is hashed on the way through and never held in memory as a
+    whole. Reading stops as soon as ``max_bytes`` is exceeded. Blocking;
+    call it from a thread.
+
+    Raises:
+        UploadTooLargeError: If the upload is larger than max_bytes
+    """
+    digest = hashlib.sha256()
+    size = 0
+    suffix = Path(filename).suffix.lower()
+    out = tempfile.NamedTemporaryFile(
+        prefix="upload-", suffix=suffix, delete=False)
+    try:
+        with out:
+            while True:
+                chunk = file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLargeError(filename, max_bytes)
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.unlink(out.name)
+        raise
+    return SpooledUpload(Path(out.name), filename, size, digest.hexdigest())
+
+
+def peak_rss_kb() -> Optional[int]:
+    """High-water resident set size of this process in KiB (None if unknown)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports KiB
+    return peak // 1024 if sys.platform == "darwin" else peak
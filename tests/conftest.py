@@ -0,0 +1,20 @@
+"""
+Shared pytest configuration.
+Puts src/ on the import path the same way the Docker image does (PYTHONPATH=/app/src).
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+# The app validates the key format at import time; tests never reach OpenAI
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-key")
+
+# Keep caches and other runtime state out of the working tree
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="resume-tailor-cache-"))
+os.environ.setdefault("JOBS_DB", os.path.join(tempfile.mkdtemp(prefix="resume-tailor-jobs-"), "jobs.sqlite3"))
+os.environ.setdefault("OUTPUT_DIR", tempfile.mkdtemp(prefix="resume-tailor-output-"))
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="resume-tailor-logs-"))
+os.environ.setdefault("METRICS_DIR", tempfile.mkdtemp(prefix="resume-tailor-metrics-"))
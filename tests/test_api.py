@@ -2,21 +2,94 @@
 Basic tests for Resume Tailor API endpoints.
 Run with: pytest tests/
 """
+import asyncio
+import dataclasses
+import gzip
+import hashlib
+import importlib
+import io
+import json
+import logging
+import os
+import socket
+import time
+from types import SimpleNamespace
+
+import docx
+import httpx
+import openai
 import pytest
 from httpx import AsyncClient
 from fastapi.testclient import TestClient
 
+from api import app
+from api.app import get_resume_service
+from config.production import ProductionSettings
+from config.settings import Settings, get_settings
+from api.rate_limit import RateLimiter, RateLimitRule
+from services import ResumeService
+from services.cache import MemoryLRU, ResultCache
+from services.coalesce import SingleFlight
+from services.near_duplicate import NearDuplicateIndex, adapt
+from services.scoring import KeywordScorer
+from services.jobs import CallbackPolicy, CallbackRejected, JobQueue, JobStore
+from utils.disk_cache import DiskCache
+from utils.extraction_cache import ExtractionCache
+from resume_tailor import ResumeTailor
+from resume_tailor.tailor import calculate_cost
+from resume_tailor.router import ModelRouter, SpendBudget
+from resume_tailor.compaction import compact
+from resume_tailor.tokens import TokenCounter
+from resume_tailor.retry import (CircuitBreaker, CircuitOpenError, RetryPolicy,
+                                 call_with_retries, is_retryable, server_retry_after)
+from utils import TokenLimitError
+from utils.logger import (ContextFilter, CustomLogger, JsonFormatter, PayloadSampler,
+                          ROOT_LOGGER, set_request_context)
+from utils.metrics import MetricsRegistry
+from utils.output_store import OutputStore
+from utils.extraction_pool import ExtractionPool
+from utils.file_handler import extract_text_from_file, shutdown_extraction_pool
+from utils.pdf_extraction import extract_pdf
+from benchmarks import extraction as extraction_bench, startup as startup_bench
+from benchmarks.loadtest import percentile, summarize
+from benchmarks.mock_openai import Latency, MockConfig, create_app as create_mock_openai
+
+
+def make_pdf(pages):
+    """Minimal PDF with one line of Helvetica text per page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    font = 3 + 2 * len(pages)
+    for i, text in enumerate(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R"
+            f" /Resources << /Font << /F1 {font} 0 R >> >> >>".encode())
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
 
-# TODO: Import your app
-# from api import app
+
+def hanging_parser(path, file_extension):
+    """Extraction stand-in that never returns, like a parser stuck on a hostile file."""
+    time.sleep(600)
 
 
 @pytest.fixture
 def client():
     """Create test client."""
-    # Uncomment when app is properly imported
-    # return TestClient(app)
-    pass
+    return TestClient(app)
 
 
 class TestHealthEndpoints:
@@ -71,6 +144,31 @@ class TestTailorEndpoint:
         pass
 
 
+class TestServiceContainer:
+    """The service, tailor and OpenAI client are built once per worker."""
+
+    def test_service_shared_and_closed_with_lifespan(self):
+        app_module = importlib.import_module("api.app")
+        with TestClient(app):
+            # Built by the lifespan's background warm-up
+            deadline = time.monotonic() + 10
+            while app_module.container is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            built = app_module.container
+            assert built is not None
+            assert get_resume_service() is get_resume_service() is built.service
+            assert built.service.tailor is built.tailor
+            assert built.tailor.client is built.client
+        assert app_module.container is None
+        assert built.client.is_closed()
+
+    def test_health_reports_pool_without_new_client(self, client):
+        """/health reuses the shared client and reports its connection pool."""
+        pool = client.get("/health").json()["openai_pool"]
+        assert pool["max_connections"] == ProductionSettings.OPENAI_MAX_CONNECTIONS
+        assert {"active", "idle", "waiting", "wait_ms_avg", "wait_ms_max"} <= set(pool)
+
+
 class TestFileUploadEndpoint:
     """Test file upload endpoints."""
 
@@ -92,8 +190,124 @@ class TestFileUploadEndpoint:
 
     def test_upload_invalid_file_type(self, client):
         """Test error for invalid file type."""
-        # Test with .exe or other invalid extension
-        pass
+        files = {
+            "Resume": ("resume.exe", b"MZ" * 100, "application/octet-stream"),
+            "JD": ("job.txt", b"Senior backend engineer role " * 5, "text/plain"),
+        }
+        response = client.post("/tailor-upload", files=files)
+        assert response.status_code == 400
+        assert response.json()["error"]["code"] == "VALIDATION_ERROR"
+        assert ".exe" in response.json()["error"]["message"]
+
+    def test_docx_extracted_in_process_pool(self):
+        """DOCX parsing runs in the extraction pool and returns paragraph text."""
+        document = docx.Document()
+        document.add_paragraph("Senior Python Developer")
+        document.add_paragraph("Built FastAPI services")
+        buffer = io.BytesIO()
+        document.save(buffer)
+        buffer.seek(0)
+
+        try:
+            text = asyncio.run(extract_text_from_file(buffer, "resume.docx"))
+        finally:
+            shutdown_extraction_pool()
+        assert text == "Senior Python Developer\nBuilt FastAPI services"
+
+    def test_timed_out_extraction_kills_only_its_worker(self, monkeypatch):
+        """A parse that hangs past the timeout is killed; the pool stays up."""
+        file_handler = importlib.import_module("utils.file_handler")
+        monkeypatch.setattr(file_handler, "_extract_path", hanging_parser)
+        monkeypatch.setattr(file_handler, "get_extraction_cache", lambda: None)
+        pool = file_handler.get_extraction_pool()
+        try:
+            with pytest.raises(ValueError, match="Timed out"):
+                asyncio.run(extract_text_from_file(io.BytesIO(b"PK stub"), "resume.docx",
+                                                   timeout=3))
+            assert file_handler.get_extraction_pool() is pool
+        finally:
+            shutdown_extraction_pool()
+
+    def test_abandoned_task_does_not_disturb_other_workers(self):
+        pool = ExtractionPool(2)
+
+        async def scenario():
+            hung = asyncio.ensure_future(pool.run(hanging_parser, "stuck.pdf", ".pdf"))
+            healthy_pid = await pool.run(os.getpid)
+            await asyncio.sleep(0.5)
+            hung_worker, = pool._busy
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(hung, 1)
+            hung_worker.process.join(timeout=5)
+            assert not hung_worker.process.is_alive()
+            # The healthy worker was left alone and serves the next task
+            assert await pool.run(os.getpid) == healthy_pid
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            pool.shutdown()
+
+    def test_extraction_cache_is_versioned(self, tmp_path):
+        """Cached text is reused for identical bytes but not across extractor versions."""
+        disk = DiskCache(tmp_path / "extractions.sqlite3", max_bytes=1024 * 1024)
+        cache = ExtractionCache(disk, version="1")
+        digest = hashlib.sha256(b"%PDF-1.4 ...").hexdigest()
+        key = cache.key(digest, ".pdf")
+
+        async def scenario():
+            assert await cache.get(key) is None
+            await cache.set(key, "extracted text")
+            assert await cache.get(key) == "extracted text"
+            upgraded = ExtractionCache(disk, version="2")
+            assert await upgraded.get(upgraded.key(digest, ".pdf")) is None
+
+        asyncio.run(scenario())
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_pdf_pages_extracted_in_parallel_batches(self, tmp_path):
+        """Page batches are joined in order, timed per page and stop at max_chars."""
+        path = tmp_path / "cv.pdf"
+        path.write_bytes(make_pdf([f"Page {n} text" for n in range(1, 6)]))
+
+        async def submit(fn, *args):
+            return await asyncio.to_thread(fn, *args)
+
+        pdf = asyncio.run(extract_pdf(str(path), submit, pages_per_task=2))
+        assert pdf.text.splitlines() == [f"Page {n} text" for n in range(1, 6)]
+        assert (pdf.page_count, pdf.pages_extracted, pdf.truncated) == (5, 5, False)
+
+        pdf = asyncio.run(extract_pdf(str(path), submit, pages_per_task=2, max_chars=20))
+        assert pdf.text == "Page 1 text\nPage 2 t"
+        assert pdf.truncated
+        assert pdf.pages_extracted == 2
+
+    def test_oversized_upload_rejected(self, client, monkeypatch):
+        """A file over the per-file cap is a 413, and so is an oversized body."""
+        app_module = importlib.import_module("api.app")
+        monkeypatch.setattr(app_module.api_config, "max_upload_size", 1024)
+        files = {
+            "Resume": ("resume.txt", b"x" * 2048, "text/plain"),
+            "JD": ("job.txt", b"Senior backend engineer role " * 5, "text/plain"),
+        }
+        response = client.post("/tailor-upload", files=files)
+        assert response.status_code == 413
+        assert response.json()["error"]["code"] == "PAYLOAD_TOO_LARGE"
+        # Refused by the middleware while the part streamed, not after spooling
+        assert "byte upload limit" in response.json()["error"]["message"]
+
+        body_limit = app_module.api_config.max_body_size
+        files["Resume"] = ("resume.txt", b"x" * (body_limit + 1), "text/plain")
+        response = client.post("/tailor-upload", files=files)
+        assert response.status_code == 413
+
+    def test_oversized_json_body_rejected(self, client):
+        """Bodies that are not uploads are capped at max_request_size."""
+        app_module = importlib.import_module("api.app")
+        padding = "x" * (app_module.api_config.max_request_size + 1)
+        response = client.post("/score", json={"resume_text": padding, "job_description": ""})
+        assert response.status_code == 413
+        assert response.json()["error"]["code"] == "PAYLOAD_TOO_LARGE"
 
     def test_upload_empty_file(self, client):
         """Test error for empty file."""
@@ -103,11 +317,340 @@ class TestFileUploadEndpoint:
 class TestRateLimiting:
     """Test rate limiting functionality."""
 
-    def test_rate_limit_exceeded(self, client):
+    def test_rate_limit_exceeded(self, client, monkeypatch):
         """Test rate limit returns 429."""
-        # Make many requests quickly
-        # Last one should return 429
-        pass
+        app_module = importlib.import_module("api.app")
+        limiter = RateLimiter(RateLimitRule(limit=2, period=60),
+                              route_rules={"/ping": None})
+        monkeypatch.setattr(app_module, "rate_limiter", limiter)
+
+        for expected_remaining in ("1", "0"):
+            response = client.get("/openapi.json")
+            assert response.status_code == 200
+            assert response.headers["RateLimit-Limit"] == "2"
+            assert response.headers["RateLimit-Remaining"] == expected_remaining
+
+        response = client.get("/openapi.json")
+        assert response.status_code == 429
+        assert response.json()["error"]["code"] == "RATE_LIMIT_EXCEEDED"
+        assert int(response.headers["Retry-After"]) > 0
+
+    def test_exempt_route_not_limited(self, client, monkeypatch):
+        """Test exempt routes skip the limiter entirely."""
+        app_module = importlib.import_module("api.app")
+        limiter = RateLimiter(RateLimitRule(limit=1, period=60),
+                              route_rules={"/ping": None})
+        monkeypatch.setattr(app_module, "rate_limiter", limiter)
+
+        for _ in range(3):
+            response = client.get("/ping")
+            assert response.status_code == 200
+            assert "RateLimit-Limit" not in response.headers
+
+    def test_idle_buckets_expire(self):
+        """Test the sweeper drops buckets once they have refilled."""
+        async def scenario():
+            limiter = RateLimiter(RateLimitRule(limit=5, period=10), shards=1)
+            limiter.hit("10.0.0.1", "/tailor")
+            assert limiter.bucket_count() == 1
+            assert limiter.sweep_shard(0) == 0
+            assert limiter.sweep_shard(0, now=time.monotonic() + 10) == 1
+            await limiter.close()
+
+        asyncio.run(scenario())
+
+
+class FakeTailor:
+    """Stand-in for ResumeTailor that counts calls instead of hitting OpenAI."""
+
+    model = "gpt-4"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def tailor_resume(self, resume_text, job_description, tone="professional",
+                            optimize_for=None):
+        self.calls += 1
+        if "FAIL" in job_description:
+            raise RuntimeError("upstream exploded")
+        return {
+            "content": f"Tailored: {resume_text[:20]}",
+            "usage": {"input_tokens": 100, "output_tokens": 50,
+                      "total_tokens": 150, "cost_usd": 0.006}
+        }
+
+    async def stream_tailor_resume(self, resume_text, job_description, tone="professional",
+                                   optimize_for=None):
+        result = await self.tailor_resume(resume_text, job_description, tone)
+        for word in result["content"].split(" "):
+            yield {"type": "token", "content": word + " "}
+        yield {"type": "done", **result}
+
+
+class TestResultCache:
+    """Test the two-tier tailoring result cache."""
+
+    def test_repeat_request_is_served_from_cache(self, tmp_path):
+        """Normalized duplicates hit the cache, across fresh memory tiers too."""
+        tailor = FakeTailor()
+        disk = DiskCache(tmp_path / "results.sqlite3", max_bytes=1024 * 1024)
+
+        async def scenario():
+            service = ResumeService(tailor=tailor, cache=ResultCache(MemoryLRU(8), disk))
+            first = await service.tailor_resume("Python  developer\n", "Backend role", "professional")
+            second = await service.tailor_resume("Python developer", "Backend role ", "professional")
+            assert (first["cache"], second["cache"]) == ("miss", "hit")
+            assert second["usage"]["cost_usd"] == 0.0
+
+            # Another worker has an empty memory tier but shares the disk tier
+            other = ResumeService(tailor=tailor, cache=ResultCache(MemoryLRU(8), disk))
+            third = await other.tailor_resume("Python developer", "Backend role", "professional")
+            assert third["cache"] == "hit"
+            assert third["content"] == first["content"]
+
+            bypass = await other.tailor_resume("Python developer", "Backend role",
+                                               "professional", use_cache=False)
+            assert bypass["cache"] == "bypass"
+
+        asyncio.run(scenario())
+        assert tailor.calls == 2
+
+    def test_disk_cache_evicts_least_recently_used(self, tmp_path):
+        """The disk tier stays under its byte budget."""
+        disk = DiskCache(tmp_path / "results.sqlite3", max_bytes=250)
+        for i in range(5):
+            disk.set(f"key{i}", b"x" * 100)
+        assert disk.total_bytes() <= 250
+        assert disk.get("key0") is None
+        assert disk.get("key4") == b"x" * 100
+
+
+class TestStreaming:
+    """Test the server-sent-events tailoring endpoints."""
+
+    @pytest.fixture
+    def tailor(self):
+        tailor = FakeTailor()
+        app.dependency_overrides[get_resume_service] = lambda: ResumeService(tailor=tailor)
+        yield tailor
+        app.dependency_overrides.clear()
+
+    @staticmethod
+    def parse_events(body):
+        events = []
+        for block in body.strip().split("\n\n"):
+            name, data = block.split("\n")
+            events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+        return events
+
+    def test_tailor_stream(self, client, tailor):
+        """Tokens arrive as events and the last event carries usage metadata."""
+        response = client.post("/tailor/stream", json={
+            "resume_text": "Experienced Python developer " * 10,
+            "job_description": "Senior backend engineer role " * 5,
+            "save_output": False
+        })
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = self.parse_events(response.text)
+        assert [name for name, _ in events[:-1]] == ["token"] * (len(events) - 1)
+        name, done = events[-1]
+        assert name == "done"
+        assert done["metadata"]["tokens_used"] == 150
+        assert done["metadata"]["cost_usd"] == 0.006
+
+    def test_tailor_upload_stream(self, client, tailor):
+        """Uploaded text files are extracted before streaming starts."""
+        files = {
+            "Resume": ("resume.txt", b"Experienced Python developer " * 10, "text/plain"),
+            "JD": ("job.txt", b"Senior backend engineer role " * 5, "text/plain"),
+        }
+        response = client.post("/tailor-upload/stream", files=files, data={"Save": "false"})
+        events = self.parse_events(response.text)
+        assert events[-1][0] == "done"
+        assert events[-1][1]["metadata"]["resume_file"] == "resume.txt"
+
+
+class TestBatch:
+    """Test the one-resume, many-job-descriptions endpoints."""
+
+    @pytest.fixture
+    def tailor(self):
+        tailor = FakeTailor()
+        app.dependency_overrides[get_resume_service] = lambda: ResumeService(tailor=tailor)
+        yield tailor
+        app.dependency_overrides.clear()
+
+    @pytest.fixture
+    def batch_request(self):
+        return {
+            "resume_text": "Experienced Python developer " * 10,
+            "job_descriptions": [
+                "Senior backend engineer role number one " * 3,
+                "FAIL this backend engineer role please now " * 3,
+                "Senior backend engineer role number three " * 3,
+            ]
+        }
+
+    def test_batch_isolates_failures(self, client, tailor, batch_request):
+        """One failing job description doesn't fail the others."""
+        response = client.post("/tailor/batch", json=batch_request)
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["index"] for item in data["results"]] == [0, 1, 2]
+        assert [item["status"] for item in data["results"]] == ["success", "error", "success"]
+        assert data["results"][1]["error"]["code"] == "API_ERROR"
+        assert data["metadata"]["succeeded"] == 2
+        assert data["metadata"]["cost_usd"] == 0.012
+
+    def test_batch_ndjson_stream(self, client, tailor, batch_request):
+        """Streaming mode emits one line per item and a summary line."""
+        response = client.post("/tailor/batch?stream=true", json=batch_request)
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(line["index"] for line in lines[:-1]) == [0, 1, 2]
+        assert lines[-1]["summary"]["failed"] == 1
+
+
+    def test_batch_ndjson_lines_are_not_held_back(self, tailor, batch_request):
+        """A line reaches the client before the rest of the batch, even with gzip accepted."""
+        release = None
+        finish = tailor.tailor_resume
+
+        async def tailor_resume(resume_text, job_description, *args, **kwargs):
+            if "three" in job_description:
+                await release.wait()
+            return await finish(resume_text, job_description, *args, **kwargs)
+
+        tailor.tailor_resume = tailor_resume
+        body = json.dumps(batch_request).encode()
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "POST", "scheme": "http", "path": "/tailor/batch",
+            "raw_path": b"/tailor/batch", "query_string": b"stream=true", "root_path": "",
+            "headers": [(b"host", b"testserver"), (b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode()),
+                        (b"accept-encoding", b"gzip")],
+            "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+        }
+
+        async def scenario():
+            nonlocal release
+            release = asyncio.Event()
+            messages = asyncio.Queue()
+            requests = [{"type": "http.request", "body": body, "more_body": False}]
+
+            async def receive():
+                if requests:
+                    return requests.pop()
+                await asyncio.Event().wait()
+
+            response = asyncio.ensure_future(app(scope, receive, messages.put))
+            start = await asyncio.wait_for(messages.get(), 5)
+            assert b"gzip" not in dict(start["headers"]).get(b"content-encoding", b"")
+            message = await asyncio.wait_for(messages.get(), 5)
+            while not message.get("body"):
+                message = await asyncio.wait_for(messages.get(), 5)
+            assert not release.is_set()
+            assert "index" in json.loads(message["body"].decode().splitlines()[0])
+            release.set()
+            await asyncio.wait_for(response, 5)
+
+        asyncio.run(scenario())
+
+class TestJobs:
+    """Test the queued tailoring jobs API."""
+
+    def test_job_lifecycle(self, monkeypatch):
+        """A queued job is picked up by a worker and its result can be polled."""
+        app_module = importlib.import_module("api.app")
+        tailor = FakeTailor()
+        monkeypatch.setattr(app_module, "get_resume_service",
+                            lambda: ResumeService(tailor=tailor))
+
+        with TestClient(app) as client:
+            response = client.post("/jobs", json={
+                "resume_text": "Experienced Python developer " * 10,
+                "job_description": "Senior backend engineer role " * 5,
+                "save_output": False
+            })
+            assert response.status_code == 202
+            job_id = response.json()["job_id"]
+
+            for _ in range(100):
+                job = client.get(f"/jobs/{job_id}").json()
+                if job["status"] in ("succeeded", "failed"):
+                    break
+                time.sleep(0.05)
+
+        assert job["status"] == "succeeded"
+        assert job["result"]["metadata"]["tokens_used"] == 150
+        assert tailor.calls == 1
+
+    def test_unknown_job_is_404(self, client):
+        response = client.get("/jobs/does-not-exist")
+        assert response.status_code == 404
+        assert response.json()["error"]["code"] == "NOT_FOUND"
+
+    @pytest.mark.parametrize("url", [
+        "http://93.184.216.34/hook",
+        "https://127.0.0.1/hook",
+        "https://localhost/hook",
+        "https://169.254.169.254/latest/meta-data",
+        "https://10.0.0.5/hook",
+        "https://[::ffff:192.168.0.1]/hook",
+    ])
+    def test_callback_to_private_or_plain_http_rejected(self, url):
+        with pytest.raises(CallbackRejected):
+            asyncio.run(CallbackPolicy().check(url))
+
+    def test_callback_allowlist(self):
+        asyncio.run(CallbackPolicy().check("https://93.184.216.34/hook"))
+        with pytest.raises(CallbackRejected, match="not allowed"):
+            asyncio.run(CallbackPolicy([".example.com"]).check("https://93.184.216.34/hook"))
+
+    def test_webhook_connects_to_the_vetted_address(self, tmp_path, monkeypatch):
+        """The POST goes to the checked IP, so the host can't be rebound in between."""
+        monkeypatch.setattr(socket, "getaddrinfo", lambda host, port, *args, **kwargs: [
+            (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("93.184.216.34", port))])
+        sent = []
+
+        async def send(client, request, **kwargs):
+            sent.append(request)
+            return httpx.Response(200, request=request)
+
+        monkeypatch.setattr(httpx.AsyncClient, "send", send)
+        queue = JobQueue(JobStore(tmp_path / "jobs.sqlite3"), handler=None)
+        asyncio.run(queue._notify("https://hooks.example.com:8443/done?x=1", {"job_id": "j1"}))
+
+        request, = sent
+        assert str(request.url) == "https://93.184.216.34:8443/done?x=1"
+        assert request.headers["host"] == "hooks.example.com:8443"
+        assert request.extensions["sni_hostname"] == "hooks.example.com"
+
+    @pytest.mark.parametrize("callback_url", [
+        "https://127.0.0.1:8000/internal",
+        "http://example.com/x",
+    ])
+    def test_job_with_unsafe_callback_refused(self, client, callback_url):
+        response = client.post("/jobs", json={
+            "resume_text": "Experienced Python developer " * 10,
+            "job_description": "Senior backend engineer role " * 5,
+            "callback_url": callback_url
+        })
+        assert response.status_code == 400
+        assert response.json()["error"]["code"] == "VALIDATION_ERROR"
+
+    def test_abandoned_job_is_reclaimed(self, tmp_path):
+        """A job whose worker died becomes claimable once its lease runs out."""
+        store = JobStore(tmp_path / "jobs.sqlite3")
+        job_id = store.enqueue({"resume_text": "..."})
+        assert store.claim(lease_seconds=-1)["id"] == job_id
+        reclaimed = store.claim(lease_seconds=60)
+        assert reclaimed["id"] == job_id
+        assert reclaimed["attempts"] == 2
+        assert store.claim(lease_seconds=60) is None
 
 
 class TestErrorHandling:
@@ -159,3 +702,723 @@ class TestPerformance:
 # - sample_resume.docx
 # - sample_resume.txt
 # - sample_job.txt
+
+
+class TestOutputStore:
+    """Saved resumes are content-addressed, atomic and pruned."""
+
+    def test_saves_are_content_addressed_and_compressed(self, tmp_path):
+        store = OutputStore(tmp_path, compress=True)
+
+        async def scenario():
+            return await asyncio.gather(
+                store.save("Resume A"), store.save("Resume B"), store.save("Resume A"))
+
+        first, second, again = asyncio.run(scenario())
+        assert first == again != second
+        assert first.name.endswith(".txt.gz")
+        assert gzip.decompress(first.read_bytes()) == b"Resume A"
+        assert sorted(p.name for p in tmp_path.iterdir()) == sorted({first.name, second.name})
+
+    def test_prune_by_age_and_count(self, tmp_path):
+        store = OutputStore(tmp_path, max_files=2, max_age=3600)
+        paths = [store._write(f"Resume {n}") for n in range(4)]
+        for age, path in enumerate(paths):
+            stamp = time.time() - age * 1000 - (7200 if age == 3 else 0)
+            os.utime(path, (stamp, stamp))
+        (tmp_path / ".gitkeep").touch()
+
+        assert store.prune() == 2
+        assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+            [".gitkeep", paths[0].name, paths[1].name])
+
+
+class TestTokenBudget:
+    """Prompts are budgeted against the context window before any call."""
+
+    def test_max_tokens_scales_with_resume(self):
+        tailor = ResumeTailor("gpt-4", max_output_tokens=2000, min_output_tokens=256,
+                              compaction=False)
+        _, short, _ = tailor._prepare("Python developer. " * 20, "Backend role", "professional")
+        _, longer, _ = tailor._prepare("Python developer. " * 200, "Backend role", "professional")
+        assert 256 <= short.max_tokens < longer.max_tokens <= 2000
+        assert short.context_window == 8192
+
+    def test_over_long_input_rejected_or_trimmed(self):
+        resume = "Python developer with FastAPI experience. " * 200
+        job = "We need a senior backend engineer. " * 600
+
+        with pytest.raises(TokenLimitError) as excinfo:
+            ResumeTailor("gpt-4", overflow="reject", compaction=False)._prepare(
+                resume, job, "professional")
+        assert excinfo.value.token_count > excinfo.value.max_tokens
+
+        messages, budget, _ = ResumeTailor("gpt-4", overflow="trim", compaction=False)._prepare(
+            resume, job, "professional")
+        assert budget.trimmed
+        assert budget.predicted_input_tokens + budget.max_tokens <= 8192
+        assert resume in messages[1]["content"]
+
+
+    def test_counter_leaves_environment_alone(self, monkeypatch):
+        """Without the start-up tokenizer setting, counting estimates and sets nothing."""
+        monkeypatch.delenv("TIKTOKEN_CACHE_DIR", raising=False)
+        counter = TokenCounter("gpt-4")
+        assert not counter.exact
+        assert "TIKTOKEN_CACHE_DIR" not in os.environ
+
+
+class TestCompaction:
+    """Prompt inputs are normalized, de-duplicated and ranked against the JD."""
+
+    RESUME = "\n".join([
+        "Jane Doe",
+        "EXPERIENCE",
+        "- Built   FastAPI services in Python handling 2k requests per second",
+        "- Organised the office charity bake sale and holiday party every year",
+        "- Built FastAPI services in Python handling 2k requests per second",
+        "- Tuned PostgreSQL queries and Redis caching for the Python API layer",
+    ])
+    JOB = "Senior Python engineer: FastAPI, PostgreSQL, Redis, API performance."
+
+    def test_normalizes_and_dedupes_without_budget(self):
+        result = compact(self.RESUME, self.JOB, len)
+        assert result.lines_deduplicated == 1
+        assert result.lines_dropped == 0
+        assert "Built FastAPI services" in result.resume_text
+
+    def test_drops_least_relevant_bullets_to_fit(self):
+        result = compact(self.RESUME, self.JOB, len, resume_budget=200)
+        assert result.lines_dropped == 1
+        assert "bake sale" not in result.resume_text
+        assert result.resume_text.splitlines()[:2] == ["Jane Doe", "EXPERIENCE"]
+        assert "PostgreSQL" in result.resume_text
+
+    def test_tokens_saved_reported(self):
+        tailor = ResumeTailor("gpt-4", prompt_token_budget=0)
+        _, _, compaction = tailor._prepare(self.RESUME + "\n\n\n\n", self.JOB, "professional")
+        assert compaction.tokens_saved > 0
+
+
+def openai_error(cls, status, headers=None):
+    response = httpx.Response(status, headers=headers or {},
+                              request=httpx.Request("POST", "https://api.openai.com"))
+    return cls("error", response=response, body=None)
+
+
+class TestRetryPolicy:
+    """OpenAI errors are retried by type, honouring server waits, behind a breaker."""
+
+    def test_classifies_errors(self):
+        assert is_retryable(openai_error(openai.RateLimitError, 429))
+        assert is_retryable(openai_error(openai.InternalServerError, 503))
+        assert not is_retryable(openai_error(openai.BadRequestError, 400))
+        assert not is_retryable(openai_error(openai.AuthenticationError, 401))
+
+    def test_server_wait_headers(self):
+        assert server_retry_after(openai_error(
+            openai.RateLimitError, 429, {"retry-after-ms": "250"})) == 0.25
+        assert server_retry_after(openai_error(
+            openai.RateLimitError, 429, {"retry-after": "7"})) == 7
+        assert server_retry_after(openai_error(
+            openai.RateLimitError, 429, {"x-ratelimit-reset-tokens": "1m30s"})) == 90
+
+    def test_long_server_wait_fails_fast(self):
+        policy = RetryPolicy(max_retries=3, max_delay=5)
+        assert policy.delay(1, openai_error(openai.RateLimitError, 429, {"retry-after": "2"})) == 2
+        assert policy.delay(1, openai_error(openai.RateLimitError, 429, {"retry-after": "60"})) is None
+        assert policy.delay(4, openai_error(openai.RateLimitError, 429)) is None
+
+    def test_counts_retries(self):
+        attempts = []
+
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise openai_error(openai.InternalServerError, 500)
+            return "ok"
+
+        result, retries = asyncio.run(
+            call_with_retries(flaky, RetryPolicy(initial_delay=0)))
+        assert (result, retries) == ("ok", 2)
+
+    def test_breaker_opens_and_recovers(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+        async def failing():
+            raise openai_error(openai.InternalServerError, 500)
+
+        async def ok():
+            return "ok"
+
+        for _ in range(2):
+            with pytest.raises(openai.InternalServerError):
+                asyncio.run(call_with_retries(failing, RetryPolicy(max_retries=0), breaker))
+        with pytest.raises(CircuitOpenError) as excinfo:
+            asyncio.run(call_with_retries(ok, RetryPolicy(), breaker))
+        assert excinfo.value.retry_after > 0
+
+        breaker.opened_at -= 30
+        assert asyncio.run(call_with_retries(ok, RetryPolicy(), breaker)) == ("ok", 0)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_open_circuit_returns_503(self, client):
+        async def tailor_resume(*args, **kwargs):
+            raise CircuitOpenError(12)
+
+        tailor = FakeTailor()
+        tailor.tailor_resume = tailor_resume
+        app.dependency_overrides[get_resume_service] = lambda: ResumeService(tailor=tailor)
+        try:
+            response = client.post("/tailor", json={
+                "resume_text": "Experienced Python developer " * 10,
+                "job_description": "Looking for a senior Python engineer " * 5
+            })
+        finally:
+            app.dependency_overrides.clear()
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "12"
+        assert response.json()["error"]["code"] == "SERVICE_UNAVAILABLE"
+
+
+class TestModelRouter:
+    """Requests are routed by size, hint, observed latency and budget."""
+
+    MODELS = ["gpt-4", "gpt-4o", "gpt-3.5-turbo"]
+
+    def router(self, **kwargs):
+        return ModelRouter(self.MODELS, price=calculate_cost, **kwargs)
+
+    def test_longest_prefix_pricing(self):
+        assert calculate_cost("gpt-4-turbo", 1000, 1000) == 0.04
+        assert calculate_cost("gpt-4o-mini", 1000, 1000) == 0.00075
+
+    def test_hints(self):
+        router = self.router(short_prompt_tokens=1000)
+        assert router.route(500, 500).model == "gpt-3.5-turbo"
+        assert router.route(2000, 500).model == "gpt-4o"
+        assert router.route(500, 500, optimize_for="quality").model == "gpt-4o"
+        with pytest.raises(ValueError):
+            router.route(500, 500, optimize_for="fastest")
+
+    def test_latency_and_budget(self):
+        router = self.router(short_prompt_tokens=1000, latency_target=2.0)
+        router.record("gpt-4o", 5.0)
+        assert router.route(2000, 500).model == "gpt-4"
+        assert router.route(500, 500, optimize_for="latency").model != "gpt-4o"
+
+        router = self.router(budget=SpendBudget(0.001))
+        route = router.route(2000, 500, optimize_for="quality")
+        assert (route.model, route.reason) == ("gpt-3.5-turbo", "budget_exhausted")
+
+    def test_streams_route_on_first_token_latency(self):
+        router = self.router(short_prompt_tokens=1000, latency_target=2.0)
+        router.record("gpt-4", 30.0, first_token=True)
+        router.record("gpt-4o", 30.0, first_token=True)
+        # A slow stream start says nothing about full-response latency
+        assert router.route(2000, 500).model == "gpt-4o"
+        assert router.route(2000, 500, streaming=True).model == "gpt-3.5-turbo"
+        router.record("gpt-4", 0.4, first_token=True)
+        assert "gpt-4" in router.stats()["first_token"]
+
+    def test_stream_without_usage_is_estimated(self):
+        class Stream:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def __aiter__(self):
+                for text in ("Tailored ", "resume"):
+                    yield SimpleNamespace(
+                        usage=None,
+                        choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+        async def create(model, **kwargs):
+            return Stream()
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        tailor = ResumeTailor("gpt-4", client=client, router=ModelRouter(["gpt-4"], price=calculate_cost))
+        cache = ResultCache(MemoryLRU(8))
+        service = ResumeService(tailor=tailor, cache=cache)
+
+        async def scenario():
+            events = [event async for event in service.stream_tailor_resume(
+                "Experienced Python developer " * 10, "Senior Python engineer " * 5)]
+            return events[-1], await cache.get(next(iter(cache.memory._entries)))
+
+        done, cached = asyncio.run(scenario())
+        usage = done["usage"]
+        assert usage["estimated"]
+        assert usage["input_tokens"] == done["token_budget"]["predicted_input_tokens"]
+        assert usage["output_tokens"] > 0 and usage["cost_usd"] > 0
+        assert cached["usage"] == usage
+
+    def test_falls_back_on_timeout(self):
+        calls = []
+
+        async def create(model, **kwargs):
+            calls.append(model)
+            if model == "gpt-4":
+                raise openai.APITimeoutError(request=httpx.Request("POST", "https://x"))
+            return SimpleNamespace(
+                usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5, total_tokens=15),
+                choices=[SimpleNamespace(message=SimpleNamespace(content="Tailored"))])
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        tailor = ResumeTailor(
+            "gpt-4", client=client, retry_policy=RetryPolicy(max_retries=3),
+            router=ModelRouter(["gpt-4"], price=calculate_cost, fallback="gpt-4o-mini"))
+        cache = ResultCache(MemoryLRU(8))
+        service = ResumeService(tailor=tailor, cache=cache)
+        result = asyncio.run(service.tailor_resume(
+            "Experienced Python developer " * 10, "Senior Python engineer " * 5))
+        # The timeout goes straight to the fallback instead of being retried
+        assert calls == ["gpt-4", "gpt-4o-mini"]
+        assert result["model"] == "gpt-4o-mini"
+        assert result["routing"]["fallback_used"]
+        # Not cached under the key that names the primary model
+        assert not cache.memory._entries
+
+
+class TestMetrics:
+    """/metrics exposes Prometheus text merged from every worker's snapshot."""
+
+    def test_request_metrics(self, client):
+        client.get("/ping")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert 'http_requests_total{route="/ping",method="GET",status="200"}' in body
+        assert 'http_request_duration_seconds_bucket{route="/ping",method="GET",le="+Inf"}' in body
+        assert "# TYPE llm_request_duration_seconds histogram" in body
+
+    def test_merges_worker_snapshots(self, tmp_path):
+        registry = MetricsRegistry(tmp_path)
+        requests = registry.counter("requests_total", "Requests", ("route",))
+        in_flight = registry.gauge("in_flight", "In flight")
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+        requests.inc(route="/tailor")
+        in_flight.inc()
+        latency.observe(0.5)
+
+        # A worker that has exited: its counts stay, its gauges do not
+        (tmp_path / "999999999.json").write_text(json.dumps({
+            "requests_total": {'["/tailor"]': 2},
+            "in_flight": {"[]": 3},
+            "latency_seconds": {"[]": [[1, 0], 1, 5.05]}
+        }))
+
+        lines = registry.render().splitlines()
+        assert 'requests_total{route="/tailor"} 3' in lines
+        assert "in_flight 1" in lines
+        assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{le="1"} 2' in lines
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+        assert "latency_seconds_count 3" in lines
+
+
+class TestServerTiming:
+    """Stage durations come back in a Server-Timing header and in metadata."""
+
+    @pytest.fixture
+    def tailor(self):
+        tailor = FakeTailor()
+        app.dependency_overrides[get_resume_service] = lambda: ResumeService(tailor=tailor)
+        yield tailor
+        app.dependency_overrides.clear()
+
+    def test_upload_stages(self, client, tailor):
+        files = {
+            "Resume": ("resume.txt", b"Experienced Python developer building APIs " * 10, "text/plain"),
+            "JD": ("job.txt", b"Senior backend engineer role in Python " * 5, "text/plain"),
+        }
+        response = client.post("/tailor-upload", files=files, data={"Save": "false"},
+                               headers={"Cache-Control": "no-cache"})
+        assert response.status_code == 200
+
+        header = response.headers["Server-Timing"]
+        for name in ("rate_limit", "request", "upload", "extraction", "total"):
+            assert f"{name};dur=" in header
+        timings = response.json()["metadata"]["timings"]
+        assert {"request", "upload", "extraction", "total"} <= set(timings)
+        assert timings["total"] >= timings["request"]
+
+
+class TestLogging:
+    """Logging is queued, configured once, and tagged per request."""
+
+    def test_handlers_installed_once(self):
+        for name in ("a", "b", "a"):
+            CustomLogger(name)
+        handlers = logging.getLogger(ROOT_LOGGER).handlers
+        assert len(handlers) == 1
+        assert CustomLogger("services.cache").logger.name == "resume_tailor.services.cache"
+
+    def test_request_ids_do_not_leak_between_tasks(self):
+        stamp = ContextFilter()
+
+        async def handle(request_id):
+            set_request_context(request_id)
+            await asyncio.sleep(0)
+            record = logging.LogRecord("x", logging.INFO, __file__, 1, "msg", None, None)
+            stamp.filter(record)
+            return record.request_id
+
+        async def scenario():
+            return await asyncio.gather(*(handle(f"req-{i}") for i in range(5)))
+
+        assert asyncio.run(scenario()) == [f"req-{i}" for i in range(5)]
+
+    def test_json_format(self):
+        set_request_context("req-1", "corr-1")
+        record = logging.LogRecord("resume_tailor", logging.INFO, __file__, 1, "hello %s", ("x",), None)
+        ContextFilter().filter(record)
+        entry = json.loads(JsonFormatter().format(record))
+        assert (entry["message"], entry["request_id"], entry["correlation_id"]) == (
+            "hello x", "req-1", "corr-1")
+
+    def test_payload_sampling_caps_rate(self):
+        sampler = PayloadSampler(rate=1.0, max_per_second=5)
+        assert sum(sampler.allow() for _ in range(50)) <= 6
+        assert sampler.dropped >= 44
+
+    def test_ids_in_response_headers(self, client):
+        response = client.get("/ping", headers={"X-Correlation-ID": "upstream-123"})
+        assert response.headers["X-Correlation-ID"] == "upstream-123"
+        assert response.headers["X-Request-ID"] != "upstream-123"
+
+
+class TestLoadHarness:
+    """The mock OpenAI server and the load-test report"""
+
+    def test_tailor_against_mock(self):
+        mock = create_mock_openai(MockConfig(latency=Latency.parse("fixed:0"), completion_tokens=20))
+        client = openai.AsyncOpenAI(
+            api_key="sk-mock", base_url="http://mock/v1", max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=mock)))
+        tailor = ResumeTailor(model="gpt-4", client=client)
+        result = asyncio.run(tailor.tailor_resume("Python developer " * 20, "Senior Python role"))
+        assert result["usage"]["output_tokens"] == 20
+        assert result["content"].startswith("experience")
+
+    def test_stream_ends_with_usage(self):
+        mock = TestClient(create_mock_openai(MockConfig(latency=Latency.parse("fixed:0"),
+                                                        completion_tokens=30)))
+        response = mock.post("/v1/chat/completions", json={
+            "model": "gpt-4", "messages": [{"role": "user", "content": "hi"}],
+            "stream": True, "stream_options": {"include_usage": True}})
+        events = [line[6:] for line in response.text.splitlines() if line.startswith("data: ")]
+        assert events[-1] == "[DONE]"
+        assert json.loads(events[-2])["usage"]["completion_tokens"] == 30
+
+    def test_rate_limited_with_retry_after(self):
+        mock = TestClient(create_mock_openai(MockConfig(rate_limit_ratio=1.0, retry_after=2)))
+        response = mock.post("/v1/chat/completions", json={"model": "gpt-4", "messages": []})
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "2"
+
+    def test_report(self):
+        rows = [{"endpoint": "tailor", "status": 200, "latency": ms / 1000} for ms in range(1, 101)]
+        rows.append({"endpoint": "upload", "status": 500, "latency": 0.5})
+        report = summarize(rows, duration=10)
+        assert percentile([3, 1, 2], 50) == 2
+        assert report["endpoints"]["tailor"]["latency_ms"]["p95"] == 95
+        assert report["endpoints"]["upload"]["errors"] == {"500": 1}
+        assert report["overall"]["throughput_rps"] == 10
+
+
+class TestExtractionBenchmarks:
+    """Synthetic corpus and baseline comparison"""
+
+    def test_corpus_is_reproducible(self, tmp_path):
+        first = extraction_bench.build_corpus(tmp_path / "a", ["small"], seed=7)
+        second = extraction_bench.build_corpus(tmp_path / "b", ["small"], seed=7)
+        backends = extraction_bench.backends()
+        for a, b in zip(first, second):
+            extract = next(iter(backends[a.kind].values()))
+            assert extract(a.path) == extract(b.path)
+        assert [doc.pages for doc in first if doc.kind == "pdf"] == [2]
+
+    def test_backends_agree(self, tmp_path):
+        corpus = extraction_bench.build_corpus(tmp_path, ["small"])
+        results = extraction_bench.run(corpus, repeat=1)
+        for document in ("pdf-small", "docx-small"):
+            assert len({result["chars"] for result in results[document].values()}) == 1
+
+    def test_regressions(self):
+        result = {"min_ms": 10.0, "peak_alloc_kb": 100}
+        baseline = {"pdf-small": {"pdf": result}}
+        compare = extraction_bench.compare
+        assert compare(baseline, {"pdf-small": {"pdf": {**result, "min_ms": 13.0}}}) == []
+        slower = compare(baseline, {"pdf-small": {"pdf": {**result, "min_ms": 20.0}}})
+        assert [r.metric for r in slower] == ["min_ms"]
+        # A machine half as fast is not a regression
+        assert compare(baseline, {"pdf-small": {"pdf": {**result, "min_ms": 20.0}}},
+                       speed=0.5) == []
+        bigger = compare(baseline, {"pdf-small": {"pdf": {**result, "peak_alloc_kb": 200}}})
+        assert [r.metric for r in bigger] == ["peak_alloc_kb"]
+
+
+class TestStartup:
+    """Settings snapshot and lazy imports"""
+
+    def test_settings_loaded_once_and_frozen(self):
+        assert get_settings() is get_settings() is ProductionSettings
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            ProductionSettings.MODEL_NAME = "gpt-3.5-turbo"
+
+    def test_settings_from_env(self):
+        settings = Settings.from_env({"GPT_SECRET_KEY": "sk-legacy",
+                                      "ROUTER_MODELS": "gpt-4o, gpt-4o-mini,"})
+        assert settings.OPENAI_API_KEY == "sk-legacy"
+        assert settings.ROUTER_MODELS == ("gpt-4o", "gpt-4o-mini")
+        assert settings.MAX_TOKENS == 2000 and not settings.is_production()
+
+    def test_app_import_skips_sdk_and_parsers(self):
+        modules = startup_bench.measure_once(dict(os.environ))
+        assert "api.app" in modules
+        assert not set(startup_bench.LAZY_MODULES) & set(modules)
+
+
+class SlowTailor(FakeTailor):
+    """FakeTailor whose calls take a while, so requests overlap"""
+
+    def __init__(self, delay=0.05):
+        super().__init__()
+        self.delay = delay
+        self.cancelled = 0
+
+    async def tailor_resume(self, *args, **kwargs):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return await super().tailor_resume(*args, **kwargs)
+
+
+class TestCoalescing:
+    """Concurrent identical requests share one upstream call"""
+
+    RESUME = "Python developer with five years of experience building APIs."
+
+    def test_identical_requests_share_one_call(self):
+        tailor = SlowTailor()
+        service = ResumeService(tailor=tailor, flights=SingleFlight())
+
+        async def scenario():
+            return await asyncio.gather(*(
+                service.tailor_resume(self.RESUME, "Backend engineer") for _ in range(3)))
+
+        results = asyncio.run(scenario())
+        assert tailor.calls == 1
+        assert sorted(r["coalesced"]["shared"] for r in results) == [False, True, True]
+        assert {r["coalesced"]["callers"] for r in results} == {3}
+        # Only the request that made the call reports what it cost
+        assert sum(r["usage"]["cost_usd"] for r in results) == 0.006
+        assert len(service.flights) == 0
+
+    def test_different_inputs_not_coalesced(self):
+        tailor = SlowTailor()
+        service = ResumeService(tailor=tailor, flights=SingleFlight())
+
+        async def scenario():
+            return await asyncio.gather(
+                service.tailor_resume(self.RESUME, "Backend engineer"),
+                service.tailor_resume(self.RESUME, "Frontend engineer"))
+
+        asyncio.run(scenario())
+        assert tailor.calls == 2
+
+    def test_errors_are_shared(self):
+        tailor = SlowTailor()
+        service = ResumeService(tailor=tailor, flights=SingleFlight())
+
+        async def scenario():
+            return await asyncio.gather(*(
+                service.tailor_resume(self.RESUME, "FAIL") for _ in range(2)),
+                return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in asyncio.run(scenario()))
+        assert tailor.calls == 1
+
+    def test_call_cancelled_only_when_every_waiter_leaves(self):
+        tailor = SlowTailor(delay=0.2)
+        flights = SingleFlight()
+        service = ResumeService(tailor=tailor, flights=flights)
+
+        async def scenario():
+            first = asyncio.ensure_future(service.tailor_resume(self.RESUME, "Backend engineer"))
+            second = asyncio.ensure_future(service.tailor_resume(self.RESUME, "Backend engineer"))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            result = await second
+            assert tailor.cancelled == 0 and result["content"]
+
+            third = asyncio.ensure_future(service.tailor_resume(self.RESUME, "Backend engineer"))
+            await asyncio.sleep(0.01)
+            third.cancel()
+            await asyncio.sleep(0.01)
+            assert tailor.cancelled == 1
+            assert len(flights) == 0
+
+        asyncio.run(scenario())
+
+
+class CompanyTailor(FakeTailor):
+    """Names the job description's first line (the company) in its content."""
+
+    async def tailor_resume(self, resume_text, job_description, tone="professional",
+                            optimize_for=None):
+        result = await super().tailor_resume(resume_text, job_description, tone, optimize_for)
+        company = job_description.split(" is hiring")[0]
+        return {**result, "content": f"Excited to join {company} in Austin."}
+
+
+class TestNearDuplicates:
+    """Nearly identical job descriptions reuse the cached result."""
+
+    RESUME = "Python developer with five years of experience building APIs."
+    POSTING = (" is hiring a senior backend engineer in {city} to design, build and operate "
+               "Python services on AWS. You will own REST APIs end to end, work with "
+               "PostgreSQL and Redis, mentor junior engineers, review code, and improve "
+               "reliability and observability across a distributed platform serving "
+               "millions of requests per day. Five years of experience required.")
+
+    def posting(self, company, city="Austin"):
+        return company + self.POSTING.format(city=city)
+
+    def service(self, tailor, threshold=0.6):
+        return ResumeService(tailor=tailor, cache=ResultCache(MemoryLRU(32)),
+                             near_duplicates=NearDuplicateIndex(threshold=threshold))
+
+    def test_similarity_estimates_jaccard(self):
+        index = NearDuplicateIndex()
+        base = index.signature(self.posting("Acme"))
+        assert index.similarity(base, index.signature(self.posting("Acme"))) == 1.0
+        assert index.similarity(base, index.signature(self.posting("Globex"))) > 0.8
+        assert index.similarity(base, index.signature("Pastry chef for a bakery")) < 0.2
+
+    def test_index_is_scoped_and_bounded(self):
+        index = NearDuplicateIndex(max_entries=2)
+        signature = index.signature(self.posting("Acme"))
+        index.add("resume-a", "key1", self.posting("Acme"), signature)
+        assert index.query("resume-b", signature) is None
+        match = index.query("resume-a", index.signature(self.posting("Globex")))
+        assert match.cache_key == "key1" and match.job_description == self.posting("Acme")
+
+        index.add("resume-a", "key2", "Pastry chef", index.signature("Pastry chef"))
+        index.add("resume-a", "key3", "Barista", index.signature("Barista"))
+        assert len(index) == 2
+        assert index.query("resume-a", signature) is None
+
+    def test_adapt_swaps_capitalized_phrases_only(self):
+        content, replacements = adapt(
+            "Built services at Acme Corp and mentored junior engineers.",
+            "Acme Corp needs a senior engineer", "Globex Inc needs a staff engineer")
+        assert content == "Built services at Globex Inc and mentored junior engineers."
+        assert replacements == [("Acme Corp", "Globex Inc")]
+
+    def test_adapt_refuses_skill_or_resume_differences(self):
+        content = "Deployed Python services on AWS."
+        assert adapt(content, "Run Python services on AWS", "Run Python services on GCP") is None
+        # The old company is the candidate's employer, not just the posting's
+        assert adapt("Five years at Acme.", "Acme needs an engineer", "Globex needs an engineer",
+                     resume_text="Engineer at Acme since 2019") is None
+
+    def test_skill_only_difference_is_not_reused(self):
+        tailor = CompanyTailor()
+        service = self.service(tailor)
+        gcp_posting = self.posting("Acme").replace("on AWS", "on GCP")
+
+        async def scenario():
+            await service.tailor_resume(self.RESUME, self.posting("Acme"))
+            return await service.tailor_resume(self.RESUME, gcp_posting)
+
+        result = asyncio.run(scenario())
+        assert tailor.calls == 2
+        assert result["cache"] == "miss"
+        assert result["near_duplicate"]["similarity"] >= 0.6
+        assert result["near_duplicate"]["refused"] is True
+        assert result["near_duplicate"]["reused"] is False
+
+    def test_near_duplicate_reuses_and_adapts_result(self):
+        tailor = CompanyTailor()
+        service = self.service(tailor)
+
+        async def scenario():
+            first = await service.tailor_resume(self.RESUME, self.posting("Acme"))
+            second = await service.tailor_resume(self.RESUME, self.posting("Globex", "Denver"))
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert tailor.calls == 1
+        assert first["cache"] == "miss" and first["near_duplicate"]["similarity"] is None
+        assert second["cache"] == "near_hit"
+        assert second["content"] == "Excited to join Globex in Denver."
+        assert second["usage"]["cost_usd"] == 0.0
+        assert second["near_duplicate"]["reused"] is True
+        assert second["near_duplicate"]["similarity"] >= 0.6
+        assert ["Acme", "Globex"] in second["near_duplicate"]["replacements"]
+
+    def test_other_resume_or_dissimilar_posting_calls_openai(self):
+        tailor = CompanyTailor()
+        service = self.service(tailor, threshold=0.99)
+
+        async def scenario():
+            await service.tailor_resume(self.RESUME, self.posting("Acme"))
+            other_resume = await service.tailor_resume("Go developer", self.posting("Globex"))
+            below = await service.tailor_resume(self.RESUME, self.posting("Globex"))
+            return other_resume, below
+
+        other_resume, below = asyncio.run(scenario())
+        assert tailor.calls == 3
+        assert other_resume["near_duplicate"]["similarity"] is None
+        assert below["cache"] == "miss" and below["near_duplicate"]["reused"] is False
+        assert 0.6 < below["near_duplicate"]["similarity"] < 0.99
+
+
+class TestScoring:
+    """Local keyword scoring of a resume against a job description."""
+
+    JOB = ("Acme is hiring a senior backend engineer to design, build and operate Python "
+           "services on AWS.\nYou will own REST APIs end to end, work with PostgreSQL and "
+           "Redis, and use Docker and Kubernetes.\nExperience with Kafka and machine learning "
+           "pipelines is a plus. Python and AWS are required.")
+    RESUME = ("Backend developer with five years of Python and Django experience building "
+              "REST APIs on PostgreSQL.\nDeployed services with Docker on AWS and mentored "
+              "engineers across several product teams in a fast-growing company.")
+
+    def test_coverage_and_missing_terms(self):
+        score = KeywordScorer().score(self.RESUME, self.JOB)
+        assert {"python", "aws", "postgresql", "docker"} <= set(score.matched_skills)
+        assert score.missing_skills == ["kafka", "kubernetes", "machine learning", "redis"]
+        assert "kubernetes" in score.missing_keywords and "python" in score.matched_keywords
+        # Bigrams do not span punctuation or stopwords
+        assert "design build" not in score.missing_keywords + score.matched_keywords
+        assert 0 < score.keyword_coverage < 1 and 0 < score.score < 100
+
+    def test_tailoring_raises_the_score(self):
+        tailored = self.RESUME + "\nRan Kafka, Redis and Kubernetes for machine learning pipelines."
+        scores = KeywordScorer().compare(self.RESUME, tailored, self.JOB)
+        assert scores["after"]["score"] > scores["before"]["score"]
+        assert scores["after"]["skill_coverage"] == 1.0
+        assert "kubernetes" not in scores["after"]["missing_keywords"]
+
+    def test_score_endpoint(self, client):
+        response = client.post("/score", json={"resume_text": self.RESUME,
+                                               "job_description": self.JOB})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["score"] == KeywordScorer().score(self.RESUME, self.JOB).score
+        assert "redis" in data["missing_skills"]
+        assert data["metadata"]["processing_time"] < 1
+
+    def test_tailoring_metadata_has_before_and_after(self):
+        service = ResumeService(tailor=FakeTailor(), scorer=KeywordScorer())
+        result = asyncio.run(service.tailor_resume(self.RESUME, self.JOB))
+        assert set(result["ats_score"]) == {"before", "after"}
+        assert result["ats_score"]["before"]["score"] > 0